@@ -0,0 +1,276 @@
+"""End-to-end provisioning benchmarks against the local API emulator.
+
+Each scenario runs in a fresh process against an emulator (src/emulator.py)
+that answers with realistic per-call latencies and operation durations:
+
+* folders:       init_project_folders on an empty organization
+* org-policies:  apply_organization_policies on the attendee and both team folders
+* attendees-N:   provision_playground_projects for an N-row CSV
+* teams-N:       provision_team_projects for an N-row CSV
+
+and reports wall time, API calls per project, p50/p95 per-project latency
+and peak memory (max RSS of the scenario's process). Operation polls
+(operations.get) depend on timing rather than on the code path, so they
+are reported separately as operation_polls and left out of the API calls.
+
+Real Google APIs take seconds per operation, so all latencies, poll
+intervals, backoffs and quotas are scaled by --time-scale (0.01 by
+default): the benchmark keeps the real proportions but finishes in minutes.
+Results are only comparable at the same time scale.
+
+    python benchmarks/bench_provisioning.py                     # 10/100/1000 rows, compared to baseline.json
+    python benchmarks/bench_provisioning.py --sizes 10 100 --save results.json
+    python benchmarks/bench_provisioning.py --update-baseline
+
+The run fails (exit status 1) when a metric regresses past THRESHOLDS.
+"""
+import argparse
+import contextlib
+import csv
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+DEFAULT_SIZES = (10, 100, 1000)
+DEFAULT_TIME_SCALE = 0.01
+
+# Unscaled seconds per response, roughly as observed against the real APIs
+LATENCY = {
+    'cloudresourcemanager.projects.create': 0.6,
+    'cloudresourcemanager.*.setIamPolicy': 0.4,
+    'cloudbilling.projects.updateBillingInfo': 0.5,
+    'serviceusage.services.batchEnable': 0.5,
+    '*.operations.get': 0.15,
+    '*': 0.25,
+}
+# Unscaled seconds before a long-running operation is done
+OPERATION_DURATION = {
+    'cloudresourcemanager.projects.create': 12,
+    'cloudresourcemanager.folders.create': 6,
+    'serviceusage.services.batchEnable': 20,
+}
+LATENCY_JITTER = 0.2
+# Calls counted as operation_polls rather than api_calls
+POLL_METHOD_SUFFIX = 'operations.get'
+
+# Allowed growth over the baseline before a metric counts as a regression
+THRESHOLDS = {
+    'wall_seconds': 0.25,
+    'p50_seconds': 0.25,
+    'p95_seconds': 0.25,
+    'api_calls_per_project': 0.15,
+    'peak_memory_mb': 0.30,
+}
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of `values` (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+def _scaled(value, scale):
+    if isinstance(value, dict):
+        return {key: seconds * scale for key, seconds in value.items()}
+    return value * scale
+
+
+def write_csvs(directory, rows):
+    """Writes an attendees and a teams CSV with `rows` rows each; returns their paths."""
+    attendees = os.path.join(directory, 'attendees.csv')
+    teams = os.path.join(directory, 'teams.csv')
+    with open(attendees, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['email'])
+        writer.writerows([f"attendee{i:04d}@example.com"] for i in range(rows))
+    with open(teams, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['team_name', 'team_members'])
+        writer.writerows([f"team{i:04d}", '|'.join(f"member{i:04d}.{m}@example.com" for m in range(3))] for i in range(rows))
+    return attendees, teams
+
+
+def _scale_client(scale):
+    """Scales the client's poll intervals, backoffs and rate limits to the benchmark's time scale."""
+    from src import api, config
+    from src.ratelimit import RateLimiter
+    config.OPERATION_POLL_INITIAL_INTERVAL *= scale
+    config.OPERATION_POLL_MAX_INTERVAL *= scale
+    api.retry_policy.initial_backoff *= scale
+    api.retry_policy.max_backoff *= scale
+    api.retry_policy.deadline *= scale
+    api.rate_limiter = RateLimiter({surface: rate / scale for surface, rate in config.API_RATE_LIMITS_PER_MINUTE.items()})
+
+
+def _run_scenario(scenario, rows, emulator_url, organization_id, scale, queue, measuring):
+    """Runs one scenario in this (fresh) process and puts its measurements on `queue`.
+
+    Once its setup is done the process puts 'ready' on `queue` and waits for
+    `measuring` to be set, so setup calls are left out of the call counts.
+    """
+    import google.auth.credentials
+    from src import config
+    import main
+
+    _scale_client(scale)
+    credentials = google.auth.credentials.AnonymousCredentials()
+    client_factory = main.build_client_pool(credentials, emulator_url=emulator_url)
+    crm_v3, serviceusage_v1, cloudbilling_v1 = client_factory.acquire()
+    latencies, failed = [], 0
+
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, 'w') as devnull:
+        attendees_file, teams_file = write_csvs(directory, rows)
+        with contextlib.redirect_stdout(devnull):
+            folder_ids = main.init_project_folders(organization_id, crm_v3) if scenario != 'folders' else None
+            queue.put('ready')
+            measuring.wait()
+            start = time.perf_counter()
+            if scenario == 'folders':
+                main.init_project_folders(organization_id, crm_v3)
+            elif scenario == 'org-policies':
+                orgpolicy_pool = main.build_orgpolicy_pool(client_factory.credentials, emulator_url=emulator_url)
+                orgpolicy_v2, = orgpolicy_pool.acquire()
+                changes = main.apply_organization_policies([folder_ids['general'], folder_ids['team1'], folder_ids['team2']],
+                                                           orgpolicy_v2, max_workers=config.PROVISIONING_MAX_WORKERS,
+                                                           client_factory=orgpolicy_pool)
+                failed = sum(1 for change in changes if change.error)
+            else:
+                provision = main.provision_playground_projects if scenario == 'attendees' else main.provision_team_projects
+                folder_id = folder_ids['general'] if scenario == 'attendees' else folder_ids['team1']
+                summary = provision(attendees_file if scenario == 'attendees' else teams_file, crm_v3, serviceusage_v1,
+                                    cloudbilling_v1, folder_id, max_workers=config.PROVISIONING_MAX_WORKERS,
+                                    client_factory=client_factory)
+                latencies = [result.elapsed for result in summary.results]
+                failed = summary.failed
+            wall = time.perf_counter() - start
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put({
+        'wall_seconds': wall,
+        'latencies': latencies,
+        'failed': failed,
+        'peak_memory_mb': peak / (1024 * 1024 if sys.platform == 'darwin' else 1024),
+    })
+
+
+def run_benchmark(scenario, rows, scale=DEFAULT_TIME_SCALE):
+    """Runs one scenario against a fresh emulator; returns its metrics."""
+    from src import config
+    from src.emulator import Emulator, EmulatorSettings, DEFAULT_ORGANIZATION_ID
+
+    settings = EmulatorSettings(
+        latency=_scaled(LATENCY, scale),
+        latency_jitter=LATENCY_JITTER * scale,
+        operation_duration=_scaled(OPERATION_DURATION, scale),
+        quotas={surface: rate / scale for surface, rate in config.API_RATE_LIMITS_PER_MINUTE.items()},
+        seed=0,
+    )
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    measuring = context.Event()
+    with Emulator(settings) as emulator:
+        process = context.Process(target=_run_scenario, args=(scenario, rows, emulator.url, DEFAULT_ORGANIZATION_ID, scale, queue, measuring))
+        process.start()
+        queue.get()
+        setup_calls = emulator.call_counts()
+        measuring.set()
+        measured = queue.get()
+        process.join()
+        calls = {method: count - setup_calls.get(method, 0) for method, count in emulator.call_counts().items()}
+    operation_polls = sum(count for method, count in calls.items() if method.endswith(POLL_METHOD_SUFFIX))
+    api_calls = sum(calls.values()) - operation_polls
+    projects = rows if scenario in ('attendees', 'teams') else 1
+    return {
+        'rows': rows if scenario in ('attendees', 'teams') else 0,
+        'wall_seconds': round(measured['wall_seconds'], 3),
+        'api_calls': api_calls,
+        'api_calls_per_project': round(api_calls / projects, 2),
+        'operation_polls': operation_polls,
+        'p50_seconds': round(percentile(measured['latencies'], 0.50), 3),
+        'p95_seconds': round(percentile(measured['latencies'], 0.95), 3),
+        'failed': measured['failed'],
+        'peak_memory_mb': round(measured['peak_memory_mb'], 1),
+    }
+
+
+def scenarios(sizes):
+    yield 'folders', 'folders', 0
+    yield 'org-policies', 'org-policies', 0
+    for kind in ('attendees', 'teams'):
+        for rows in sizes:
+            yield f"{kind}-{rows}", kind, rows
+
+
+def compare(results, baseline, thresholds=THRESHOLDS):
+    """Returns a message for every metric that regressed past its threshold."""
+    if results.get('time_scale') != baseline.get('time_scale'):
+        return [f"time scale {results.get('time_scale')} does not match the baseline's {baseline.get('time_scale')}"]
+    regressions = []
+    for name, metrics in results['benchmarks'].items():
+        expected = baseline['benchmarks'].get(name)
+        if expected is None:
+            continue
+        if metrics.get('failed', 0) > expected.get('failed', 0):
+            regressions.append(f"{name}: {metrics['failed']} failed projects (baseline {expected.get('failed', 0)})")
+        for metric, allowed in thresholds.items():
+            if not expected.get(metric):
+                continue
+            growth = metrics[metric] / expected[metric] - 1
+            if growth > allowed:
+                regressions.append(f"{name}: {metric} {metrics[metric]} vs baseline {expected[metric]} "
+                                   f"(+{growth:.0%}, allowed +{allowed:.0%})")
+    return regressions
+
+
+def print_table(results):
+    columns = ['wall_seconds', 'api_calls_per_project', 'operation_polls', 'p50_seconds', 'p95_seconds', 'failed', 'peak_memory_mb']
+    print(f"{'benchmark':<16}" + ''.join(f"{column:>23}" for column in columns))
+    for name, metrics in results['benchmarks'].items():
+        print(f"{name:<16}" + ''.join(f"{metrics[column]:>23}" for column in columns))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark provisioning against the local API emulator.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help="CSV row counts to run.")
+    parser.add_argument('--time-scale', type=float, default=DEFAULT_TIME_SCALE, help="Factor applied to every simulated delay.")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Baseline results to compare against.")
+    parser.add_argument('--save', help="Write the results to this JSON file.")
+    parser.add_argument('--update-baseline', action='store_true', help="Store these results as the new baseline.")
+    args = parser.parse_args(argv)
+
+    results = {'time_scale': args.time_scale, 'benchmarks': {}}
+    for name, scenario, rows in scenarios(args.sizes):
+        print(f"Running {name}...", flush=True)
+        results['benchmarks'][name] = run_benchmark(scenario, rows, args.time_scale)
+    print_table(results)
+
+    for path in filter(None, [args.save, args.baseline if args.update_baseline else None]):
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Results written to {path}")
+    if args.update_baseline or not os.path.exists(args.baseline):
+        return 0
+
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f))
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        return 1
+    print("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,6 @@
 import sys
 import os
 import readline # Enables command history
-from googleapiclient.discovery import build
 
 # ANSI escape codes for colors
 class Colors:
@@ -32,38 +31,83 @@ def print_debug(message):
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'src')))
 
 from main import (
+    metrics,
+    rate_limiter,
+    print_metrics_summary,
     get_credentials,
+    build_client_pool,
+    build_orgpolicy_pool,
+    build_budget_pool,
     provision_playground_projects,
     provision_team_projects,
+    watch_playground_projects,
     check_folder,
     list_folders,
     list_projects_in_folder,
     init_project_folders,
     apply_organization_policies,
     revert_organization_policies,
+    plan_teardown,
+    print_teardown_plan,
+    print_teardown_report,
+    teardown_folder,
+    provision_folder_budgets,
+    provision_project_budgets,
+    quiet_output,
+    load_project_pool,
+    fill_project_pool,
+    assign_pool_project,
 )
 from src import config
+from src.allocator import ProjectIdMap
+from src.conflicts import STRATEGIES as CONFLICT_STRATEGIES
+from src.ingest import CsvValidationError
+from src.journal import ProvisioningJournal, KIND_ATTENDEE, KIND_TEAM
+from src.watch import WatchCursor
+from src.warmpool import PoolRefiller
 
 # Global variables to store folder IDs
 main_hackathon_folder_id = config.MAIN_HACKATHON_FOLDER_ID
 general_attendees_folder_id = config.GENERAL_ATTENDEES_FOLDER_ID
 hackathon_teams1_folder_id = config.HACKATHON_TEAMS1_FOLDER_ID
 hackathon_teams2_folder_id = config.HACKATHON_TEAMS2_FOLDER_ID
+# Team batches beyond team1/team2 (see config.FOLDER_TREE)
+team_batch_folder_ids = dict(config.TEAM_BATCH_FOLDER_IDS)
 
 debug_mode = False
 
+# Who we are signed in as; a main.UserEmail is only looked up when first printed
+user_identity = None
+
+# Pre-provisioned attendee projects, set up by 'pool start'
+project_pool = None
+pool_refiller = None
+
 def print_help():
     """Prints a help message with available commands."""
     print_info("\nAvailable Commands:")
-    print_info("  init <parent_id>                   - Initialize the hackathon folder structure.")
-    print_info("  provision attendees <path_to_csv>  - Provision projects for general attendees.")
-    print_info("  provision teams <path_to_csv>      - Provision projects for hackathon teams.")
+    print_info("  init <parent_id> [--dry-run]       - Initialize the hackathon folder structure.")
+    print_info("  provision attendees <path_to_csv> [--skip-invalid] [--on-conflict=<strategy>] [--dry-run] - Provision projects for general attendees.")
+    print_info("  provision teams <path_to_csv> [--skip-invalid] [--on-conflict=<strategy>] [--dry-run]     - Provision projects for hackathon teams.")
+    print_info("  provision attendees --watch <path_to_csv> [--on-conflict=<strategy>] - Keep provisioning rows appended to the file (Ctrl+C stops).")
+    print_info("      --dry-run only reads: it prints the plan and an estimate of API calls and wall time.")
+    print_info(f"      Taken project IDs: {' | '.join(CONFLICT_STRATEGIES)} (default: {config.PROJECT_CONFLICT_STRATEGY}).")
+    print_info("  budgets <playground|teamN> [--dry-run] - Create or fix the per-project budgets of a folder.")
     print_info("  check folder <folder_id>           - Check if a folder is accessible.")
-    print_info("  list folders                       - List all available folders.")
-    print_info("  list projects <playground|team>    - List projects in the playground or team folder.")
-    print_info("  apply-policies <folder_id>         - Apply organization policies to a folder.")
-    print_info("  revert-policies <folder_id>        - Revert organization policies on a folder.")
+    print_info("  list folders [name_prefix]         - List all available folders.")
+    print_info("  list projects <playground|teamN> [name_prefix] - List projects in the playground or a team batch folder.")
+    print_info("  apply-policies [folder_id ...] [--dry-run]  - Apply organization policies (default: attendee and all team folders).")
+    print_info("  revert-policies [folder_id ...] [--dry-run] - Revert organization policies (default: attendee and all team folders).")
+    print_info("  teardown <folder_id> [--dry-run] [--keep-root] - Delete all projects and subfolders of a folder (and the folder).")
+    print_info("  pool start|status|stop             - Keep a pool of ready attendee projects, refilled in the background.")
+    print_info("  pool fill [count]                  - Provision pool projects now (default: up to the pool size).")
+    print_info("  checkin <email>                    - Give a walk-in attendee a project from the pool.")
+    print_info("  journal status                     - Show provisioning journal progress.")
+    print_info("  journal reset <attendees|teams|all> - Forget recorded provisioning progress.")
+    print_info("  rates                              - Show current per-API request rates.")
+    print_info("  metrics [reset|export [path]]      - Show, reset or export API call and stage metrics.")
     print_info("  debug on|off                       - Turn API payload debugging on or off.")
+    print_info("  whoami                             - Show the Google Cloud account in use.")
     print_info("  help                               - Show this help message.")
     print_info("  exit                               - Exit the application.\n")
 
@@ -86,14 +130,75 @@ def save_folder_ids_to_config():
                 f.write(f"HACKATHON_TEAMS1_FOLDER_ID = '{hackathon_teams1_folder_id}'\n")
             elif line.startswith('HACKATHON_TEAMS2_FOLDER_ID ='):
                 f.write(f"HACKATHON_TEAMS2_FOLDER_ID = '{hackathon_teams2_folder_id}'\n")
+            elif line.startswith('TEAM_BATCH_FOLDER_IDS ='):
+                f.write(f"TEAM_BATCH_FOLDER_IDS = {team_batch_folder_ids!r}\n")
             else:
                 f.write(line)
     print_success("Folder IDs saved to src/config.py.")
 
+def team_folder_ids():
+    """Returns {'team1': folder ID, 'team2': ..., ...} for every initialized team batch."""
+    folder_ids = {'team1': hackathon_teams1_folder_id, 'team2': hackathon_teams2_folder_id, **team_batch_folder_ids}
+    return {key: folder_id for key, folder_id in folder_ids.items() if folder_id}
+
+def event_folder_ids():
+    """Returns the attendee folder and every team batch folder that has been initialized."""
+    return [folder_id for folder_id in [general_attendees_folder_id, *team_folder_ids().values()] if folder_id]
+
+def export_metrics(path=None):
+    """Writes the collected metrics as an OpenMetrics text file."""
+    path = path or config.METRICS_PATH
+    try:
+        metrics.write_openmetrics(path)
+        print_info(f"Metrics written to {path}.")
+    except OSError as e:
+        print_error(f"Error writing metrics to {path}: {e}")
+
+def report_run_metrics():
+    """Prints the metrics of the run that just finished and exports them."""
+    print_metrics_summary(metrics)
+    export_metrics()
+
+def start_project_pool(crm_v3, client_factory):
+    """Loads the ready pool projects of the attendee folder and starts refilling the pool in the background."""
+    global project_pool, pool_refiller
+    project_pool, pending = load_project_pool(general_attendees_folder_id, crm_v3)
+
+    def refill():
+        # The refill thread has its own clients; its progress output would clutter the prompt
+        clients = client_factory.acquire()
+        try:
+            with quiet_output():
+                fill_project_pool(project_pool, general_attendees_folder_id, *clients, debug_mode,
+                                  client_factory=client_factory, pending=pending)
+            pending.clear()
+        finally:
+            client_factory.release(clients)
+
+    pool_refiller = PoolRefiller(project_pool, refill).start()
+    print_success(f"Project pool started: {project_pool.level()} ready, refilling to {project_pool.size} in the background.")
+
+def print_pool_status():
+    if project_pool is None:
+        print_info("The project pool is not running. Use 'pool start'.")
+        return
+    print_info(f"Project pool: {project_pool.level()} ready, {project_pool.filling()} being provisioned, "
+               f"target {project_pool.size}, low watermark {project_pool.low_watermark}.")
+    if pool_refiller is not None and pool_refiller.last_error is not None:
+        print_error(f"Last refill failed: {pool_refiller.last_error}")
+
+def warn_if_pool_low():
+    """Alerts, before the prompt, while the pool is below its low watermark."""
+    if project_pool is not None and project_pool.is_low():
+        print_warning(f"Project pool is low: {project_pool.level()} ready (low watermark {project_pool.low_watermark}), "
+                      f"{project_pool.filling()} being provisioned.")
+        if pool_refiller is not None and pool_refiller.last_error is not None:
+            print_error(f"Last refill failed: {pool_refiller.last_error}")
+
 def main_loop():
     """The main interactive loop for the CLI."""
     global main_hackathon_folder_id, general_attendees_folder_id,  hackathon_teams1_folder_id, hackathon_teams2_folder_id
-    global debug_mode
+    global team_batch_folder_ids, debug_mode, project_pool, pool_refiller, user_identity
 
     # Load folder IDs from config at startup
     main_hackathon_folder_id = config.MAIN_HACKATHON_FOLDER_ID
@@ -101,22 +206,31 @@ def main_loop():
     hackathon_teams1_folder_id = config.HACKATHON_TEAMS1_FOLDER_ID
     hackathon_teams2_folder_id = config.HACKATHON_TEAMS2_FOLDER_ID
 
+    # Records provisioning progress so interrupted runs can be resumed
+    journal = ProvisioningJournal(config.PROVISIONING_JOURNAL_PATH)
+
     print_info("Welcome to the Hackathon Project Provisioning CLI.")
     print_info("Type 'help' for a list of commands.")
 
     # Get credentials and build service clients once at the start
     try:
-        credentials, display_name = get_credentials()
-        crm_v3 = build('cloudresourcemanager', 'v3', credentials=credentials)
-        serviceusage_v1 = build('serviceusage', 'v1', credentials=credentials)
-        cloudbilling_v1 = build('cloudbilling', 'v1', credentials=credentials)
-        print_success(f"Successfully authenticated with Google Cloud as: {display_name}")
+        credentials, user_identity = get_credentials()
+        # Each provisioning worker leases its own clients and connection (httplib2 is not
+        # thread-safe); all of them share the credential and its token refresh
+        client_factory = build_client_pool(credentials)
+        crm_v3, serviceusage_v1, cloudbilling_v1 = client_factory.acquire()
+        orgpolicy_pool = build_orgpolicy_pool(client_factory.credentials)
+        orgpolicy_v2, = orgpolicy_pool.acquire()
+        budget_pool = build_budget_pool(client_factory.credentials)
+        billingbudgets_v1, = budget_pool.acquire()
+        print_success("Loaded Google Cloud credentials. Type 'whoami' to see the account.")
     except Exception as e:
         print_error(f"Failed to authenticate with Google Cloud: {e}")
         print_warning("Please ensure you have run 'gcloud auth application-default login'.")
 
     while True:
         try:
+            warn_if_pool_low()
             raw_input = input("provisioner> ")
             if not raw_input:
                 continue
@@ -130,6 +244,8 @@ def main_loop():
                 break
             elif command == "help":
                 print_help()
+            elif command == "whoami":
+                print_info(f"Authenticated with Google Cloud as: {user_identity}")
             elif command == "debug":
                 if not args:
                     print_error("Error: 'debug' requires 'on' or 'off'. Usage: debug on|off")
@@ -143,14 +259,60 @@ def main_loop():
                     print_info("API payload debugging is OFF.")
                 else:
                     print_error("Error: Invalid debug subcommand. Use 'on' or 'off'.")
+            elif command == "rates":
+                print_info("API request rates (per minute):")
+                for surface, (rate, configured_rate, throttled) in rate_limiter.rates().items():
+                    line = f"  {surface:<42} {rate:7.1f} / {configured_rate:.0f}  (429s: {throttled})"
+                    if rate < configured_rate:
+                        print_warning(line)
+                    else:
+                        print_info(line)
+            elif command == "metrics":
+                subcommand = args[0].lower() if args else None
+                if subcommand is None:
+                    print_metrics_summary(metrics)
+                elif subcommand == "reset":
+                    metrics.reset()
+                    print_success("Metrics reset.")
+                elif subcommand == "export":
+                    export_metrics(args[1] if len(args) > 1 else None)
+                else:
+                    print_error(f"Error: Unknown subcommand '{subcommand}' for 'metrics'.")
+            elif command == "journal":
+                if not args:
+                    print_error("Error: 'journal' requires a subcommand (status or reset).")
+                    continue
+                subcommand = args[0].lower()
+                if subcommand == "status":
+                    for label, kind in [("Attendees", KIND_ATTENDEE), ("Teams", KIND_TEAM)]:
+                        total, complete, with_error = journal.status(kind)
+                        print_info(f"{label}: {total} rows recorded, {complete} fully provisioned, {with_error} with errors.")
+                elif subcommand == "reset":
+                    kinds = {"attendees": KIND_ATTENDEE, "teams": KIND_TEAM, "all": None}
+                    if len(args) < 2 or args[1].lower() not in kinds:
+                        print_error("Error: Usage: journal reset <attendees|teams|all>")
+                        continue
+                    journal.reset(kinds[args[1].lower()])
+                    print_success(f"Journal reset for {args[1].lower()}.")
+                else:
+                    print_error(f"Error: Unknown subcommand '{subcommand}' for 'journal'.")
             elif command == "init":
                 if not args:
                     print_error("Error: 'init' requires a parent ID (organization or folder).")
                     continue
                 parent_id = args[0]
                 try:
-                    main_hackathon_folder_id, general_attendees_folder_id, hackathon_teams1_folder_id, hackathon_teams2_folder_id = init_project_folders(parent_id, crm_v3, debug_mode)
-                    print_success(f"Initialized folders: Main: {main_hackathon_folder_id}, General: {general_attendees_folder_id}, Team1: {hackathon_teams1_folder_id}, Team2: {hackathon_teams2_folder_id}")
+                    if "--dry-run" in [arg.lower() for arg in args[1:]]:
+                        init_project_folders(parent_id, crm_v3, debug_mode, dry_run=True)
+                        continue
+                    folder_ids = init_project_folders(parent_id, crm_v3, debug_mode)
+                    main_hackathon_folder_id = folder_ids.get('main')
+                    general_attendees_folder_id = folder_ids.get('general')
+                    hackathon_teams1_folder_id = folder_ids.get('team1')
+                    hackathon_teams2_folder_id = folder_ids.get('team2')
+                    team_batch_folder_ids = {key: folder_id for key, folder_id in folder_ids.items()
+                                             if key.startswith('team') and key not in ('team1', 'team2')}
+                    print_success("Initialized folders: " + ", ".join(f"{key}: {folder_id}" for key, folder_id in folder_ids.items()))
                     save_folder_ids_to_config()
                 except Exception as e:
                     print_error(f"Error during initialization: {e}")
@@ -160,35 +322,68 @@ def main_loop():
                     continue
                 
                 subcommand = args[0].lower()
-                file_path = args[1]
+                file_path = next((arg for arg in args[1:] if not arg.startswith("--")), None)
+                options = [arg.lower() for arg in args[1:] if arg.startswith("--")]
+                watch = "--watch" in options
+                skip_invalid = "--skip-invalid" in options
+                dry_run = "--dry-run" in options
+                conflict_strategy = next((option.split('=', 1)[1] for option in options if option.startswith("--on-conflict=")), None)
+                if conflict_strategy is not None and conflict_strategy not in CONFLICT_STRATEGIES:
+                    print_error(f"Error: --on-conflict must be one of: {', '.join(CONFLICT_STRATEGIES)}.")
+                    continue
 
                 if not file_path:
                     print_error(f"Error: 'provision {subcommand}' requires a file path.")
                     continue
 
+                if watch and (subcommand != "attendees" or dry_run):
+                    print_error("Error: --watch only applies to 'provision attendees', without --dry-run.")
+                    continue
+
                 if subcommand == "attendees":
                     if not general_attendees_folder_id:
                         print_error("Error: General attendees folder not initialized. Please run 'init' first.")
                         continue
+                    if watch:
+                        print_info(f"Watching {file_path} for new attendees; press Ctrl+C to stop.")
+                        metrics.reset()
+                        try:
+                            watch_playground_projects(file_path, crm_v3, serviceusage_v1, cloudbilling_v1, general_attendees_folder_id, debug_mode, client_factory=client_factory, journal=journal, conflict_strategy=conflict_strategy, id_map=ProjectIdMap(config.PROJECT_ID_MAP_PATH), cursor=WatchCursor(config.WATCH_CURSOR_PATH),
+                                                      on_batch=lambda summary: provision_project_budgets([result.project_id for result in summary.results if result.project_id], config.PLAYGROUND_PROJECT_BUDGET_USD, crm_v3, billingbudgets_v1, debug_mode, client_factory=budget_pool))
+                        except KeyboardInterrupt:
+                            print_info(f"\nStopped watching {file_path}. Rows already read are remembered in {config.WATCH_CURSOR_PATH}.")
+                        report_run_metrics()
+                        continue
+                    if dry_run:
+                        provision_playground_projects(file_path, crm_v3, serviceusage_v1, cloudbilling_v1, general_attendees_folder_id, debug_mode, client_factory=client_factory, journal=journal, skip_invalid=skip_invalid, id_map=ProjectIdMap(config.PROJECT_ID_MAP_PATH), dry_run=True)
+                        continue
                     print_info(f"Starting provisioning for attendees from {file_path}...")
-                    provision_playground_projects(file_path, crm_v3, serviceusage_v1, cloudbilling_v1, general_attendees_folder_id, debug_mode)
+                    metrics.reset()
+                    provision_playground_projects(file_path, crm_v3, serviceusage_v1, cloudbilling_v1, general_attendees_folder_id, debug_mode, client_factory=client_factory, journal=journal, preflight=True, skip_invalid=skip_invalid, conflict_strategy=conflict_strategy, id_map=ProjectIdMap(config.PROJECT_ID_MAP_PATH))
+                    provision_folder_budgets(general_attendees_folder_id, config.PLAYGROUND_PROJECT_BUDGET_USD, crm_v3, billingbudgets_v1, debug_mode, client_factory=budget_pool)
                     print_success("Finished provisioning for attendees.")
+                    report_run_metrics()
                 elif subcommand == "teams":
-                    if not hackathon_teams1_folder_id or not hackathon_teams2_folder_id :
+                    batches = team_folder_ids()
+                    if not batches:
                         print_error("Error: Hackathon teams folder not initialized. Please run 'init' first.")
                         continue
-                    # ask which teams folder to be created, team 1 or team 2?
-                    which_team_folder = input("Provision for Team 1 or Team 2? (1/2): ")
-                    if which_team_folder == '1':
-                        hackathon_teams_folder_id = hackathon_teams1_folder_id
-                    elif which_team_folder == '2':
-                        hackathon_teams_folder_id = hackathon_teams2_folder_id
-                    else:
-                        print_error("Invalid choice. Please enter '1' or '2'.")
+                    # ask which team batch folder the projects go to
+                    choices = [key[len('team'):] for key in batches]
+                    which_team_folder = input(f"Provision for which team batch? ({'/'.join(choices)}): ").strip()
+                    if which_team_folder not in choices:
+                        print_error(f"Invalid choice. Please enter one of: {', '.join(choices)}.")
+                        continue
+                    hackathon_teams_folder_id = batches[f"team{which_team_folder}"]
+                    if dry_run:
+                        provision_team_projects(file_path, crm_v3, serviceusage_v1, cloudbilling_v1, hackathon_teams_folder_id, debug_mode, client_factory=client_factory, journal=journal, skip_invalid=skip_invalid, id_map=ProjectIdMap(config.PROJECT_ID_MAP_PATH), dry_run=True)
                         continue
                     print_info(f"Starting provisioning for teams from {file_path}...")
-                    provision_team_projects(file_path, crm_v3, serviceusage_v1, cloudbilling_v1, hackathon_teams_folder_id, debug_mode)
+                    metrics.reset()
+                    provision_team_projects(file_path, crm_v3, serviceusage_v1, cloudbilling_v1, hackathon_teams_folder_id, debug_mode, client_factory=client_factory, journal=journal, preflight=True, skip_invalid=skip_invalid, conflict_strategy=conflict_strategy, id_map=ProjectIdMap(config.PROJECT_ID_MAP_PATH))
+                    provision_folder_budgets(hackathon_teams_folder_id, config.TEAM_PROJECT_BUDGET_USD, crm_v3, billingbudgets_v1, debug_mode, client_factory=budget_pool)
                     print_success("Finished provisioning for teams.")
+                    report_run_metrics()
                 else:
                     print_error(f"Error: Unknown subcommand '{subcommand}' for 'provision'.")
             elif command == "check":
@@ -210,62 +405,152 @@ def main_loop():
                     if not main_hackathon_folder_id:
                         print_error("Error: Main hackathon folder not initialized. Please run 'init' first.")
                         continue
-                    folders = list_folders(main_hackathon_folder_id, crm_v3)
-                    if folders:
-                        print_info("Available Folders:")
-                        for folder in folders:
-                            print_info(f"  - {folder['displayName']} ({folder['name']})")
-                    else:
+                    name_prefix = args[1] if len(args) > 1 else None
+                    count = 0
+                    for folder in list_folders(main_hackathon_folder_id, crm_v3, display_name_prefix=name_prefix):
+                        if count == 0:
+                            print_info("Available Folders:")
+                        count += 1
+                        print_info(f"  - {folder['displayName']} ({folder['name']})")
+                    if count == 0:
                         print_warning("No folders found or an error occurred.")
                 elif subcommand == "projects":
                     if len(args) < 2:
-                        print_error("Error: Usage: list projects <playground|team1|team2>")
+                        print_error("Error: Usage: list projects <playground|teamN> [name_prefix]")
                         continue
                     folder_type = args[1].lower()
+                    name_prefix = args[2] if len(args) > 2 else None
                     target_folder_id = None
                     if folder_type == "playground":
                         target_folder_id = general_attendees_folder_id
-                    elif folder_type == "team1":
-                        target_folder_id = hackathon_teams1_folder_id
-                    elif folder_type == "team2":
-                        target_folder_id = hackathon_teams2_folder_id
+                    elif folder_type.startswith("team") and folder_type in config.FOLDER_TREE:
+                        target_folder_id = team_folder_ids().get(folder_type)
                     else:
-                        print_error("Error: Invalid project type. Use 'playground' or 'team1/team2'.")
+                        print_error(f"Error: Invalid project type. Use 'playground' or one of: {', '.join(k for k in config.FOLDER_TREE if k.startswith('team'))}.")
                         continue
 
                     if not target_folder_id:
                         print_error(f"Error: {folder_type} folder not initialized. Please run 'init' first.")
                         continue
 
-                    projects = list_projects_in_folder(target_folder_id, crm_v3)
-                    if projects:
-                        print_info(f"Projects in {folder_type} folder ({target_folder_id}):")
-                        for project in projects:
-                            print_info(f"  - {project['displayName']} ({project['projectId']})")
-                    else:
+                    count = 0
+                    for project in list_projects_in_folder(target_folder_id, crm_v3, display_name_prefix=name_prefix):
+                        if count == 0:
+                            print_info(f"Projects in {folder_type} folder ({target_folder_id}):")
+                        count += 1
+                        print_info(f"  - {project['displayName']} ({project['projectId']})")
+                    if count == 0:
                         print_warning(f"No projects found in {folder_type} folder or an error occurred.")
+                    else:
+                        print_info(f"{count} projects listed.")
                 else:
                     print_error(f"Error: Unknown subcommand '{subcommand}' for 'list'.")
-            elif command == "apply-policies":
+            elif command == "budgets":
                 if not args:
-                    print_error("Error: 'apply-policies' requires a folder ID.")
+                    print_error("Error: Usage: budgets <playground|teamN> [--dry-run]")
+                    continue
+                folder_type = args[0].lower()
+                if folder_type == "playground":
+                    target_folder_id, amount = general_attendees_folder_id, config.PLAYGROUND_PROJECT_BUDGET_USD
+                elif folder_type.startswith("team") and folder_type in config.FOLDER_TREE:
+                    target_folder_id, amount = team_folder_ids().get(folder_type), config.TEAM_PROJECT_BUDGET_USD
+                else:
+                    print_error(f"Error: Invalid project type. Use 'playground' or one of: {', '.join(k for k in config.FOLDER_TREE if k.startswith('team'))}.")
+                    continue
+                if not target_folder_id:
+                    print_error(f"Error: {folder_type} folder not initialized. Please run 'init' first.")
                     continue
-                folder_id = args[0]
                 try:
-                    apply_organization_policies(folder_id, crm_v3, debug_mode)
-                    print_success(f"Successfully applied organization policies to folder {folder_id}.")
+                    provision_folder_budgets(target_folder_id, amount, crm_v3, billingbudgets_v1, debug_mode,
+                                             client_factory=budget_pool, dry_run="--dry-run" in args)
                 except Exception as e:
-                    print_error(f"Error applying organization policies: {e}")
-            elif command == "revert-policies":
+                    print_error(f"Error provisioning budgets: {e}")
+            elif command in ("apply-policies", "revert-policies"):
+                dry_run = "--dry-run" in args
+                folder_ids = [arg for arg in args if not arg.startswith("--")] or event_folder_ids()
+                if not folder_ids:
+                    print_error(f"Error: '{command}' requires folder IDs, or run 'init' first to use the event's folders.")
+                    continue
+                sync = apply_organization_policies if command == "apply-policies" else revert_organization_policies
+                try:
+                    changes = sync(folder_ids, orgpolicy_v2, debug_mode, client_factory=orgpolicy_pool, dry_run=dry_run)
+                    if dry_run:
+                        print_info("Dry run: no policy was changed.")
+                    elif any(change.error for change in changes):
+                        print_warning("Some organization policies could not be written; re-run to retry them.")
+                    else:
+                        print_success(f"Organization policies are up to date on {len(folder_ids)} folder(s).")
+                except Exception as e:
+                    print_error(f"Error syncing organization policies: {e}")
+            elif command == "pool":
+                subcommand = args[0].lower() if args else None
+                if subcommand == "status":
+                    print_pool_status()
+                    continue
+                if subcommand not in ("start", "fill", "stop"):
+                    print_error("Error: Usage: pool start|status|fill [count]|stop")
+                    continue
+                if not general_attendees_folder_id:
+                    print_error("Error: General attendees folder not initialized. Please run 'init' first.")
+                    continue
+                if subcommand == "fill" and len(args) > 1 and not args[1].isdigit():
+                    print_error("Error: The pool fill count must be a number.")
+                    continue
+                try:
+                    if subcommand == "start":
+                        if pool_refiller is not None:
+                            print_info("The project pool is already running.")
+                        else:
+                            start_project_pool(crm_v3, client_factory)
+                    elif subcommand == "stop":
+                        if pool_refiller is not None:
+                            print_info("Stopping the pool refill (waits for projects being provisioned)...")
+                            pool_refiller.stop()
+                            pool_refiller = None
+                        print_success("Project pool refill stopped.")
+                    else:
+                        count = int(args[1]) if len(args) > 1 else None
+                        if project_pool is None:
+                            project_pool, _ = load_project_pool(general_attendees_folder_id, crm_v3)
+                        fill_project_pool(project_pool, general_attendees_folder_id, crm_v3, serviceusage_v1, cloudbilling_v1,
+                                          debug_mode, client_factory=client_factory, count=count)
+                except Exception as e:
+                    print_error(f"Error managing the project pool: {e}")
+            elif command == "checkin":
                 if not args:
-                    print_error("Error: 'revert-policies' requires a folder ID.")
+                    print_error("Error: 'checkin' requires an email address. Usage: checkin <email>")
+                    continue
+                if project_pool is None:
+                    print_error("Error: The project pool is not running. Use 'pool start' first.")
+                    continue
+                try:
+                    assign_pool_project(project_pool, args[0], crm_v3, debug_mode, journal=journal,
+                                        id_map=ProjectIdMap(config.PROJECT_ID_MAP_PATH))
+                except ValueError as e:
+                    print_error(f"Error: {e}")
+                except Exception as e:
+                    print_error(f"Error checking in {args[0]}: {e}")
+                if pool_refiller is not None:
+                    pool_refiller.wake()
+            elif command == "teardown":
+                if not args:
+                    print_error("Error: 'teardown' requires a folder ID. Usage: teardown <folder_id> [--dry-run] [--keep-root]")
                     continue
                 folder_id = args[0]
                 try:
-                    revert_organization_policies(folder_id, crm_v3, debug_mode)
-                    print_success(f"Successfully reverted organization policies on folder {folder_id}.")
+                    plan = plan_teardown(folder_id, crm_v3, include_root="--keep-root" not in args)
+                    print_teardown_plan(plan, debug_mode)
+                    if "--dry-run" in args:
+                        print_info("Dry run: nothing was deleted.")
+                        continue
+                    confirmation = input(f"This cannot be undone. Type the folder ID ({folder_id}) to delete everything above: ").strip()
+                    if confirmation != folder_id:
+                        print_warning("Teardown cancelled.")
+                        continue
+                    report = teardown_folder(plan, crm_v3, client_factory=client_factory)
+                    print_teardown_report(report)
                 except Exception as e:
-                    print_error(f"Error reverting organization policies: {e}")
+                    print_error(f"Error during teardown: {e}")
             else:
                 print_error(f"Error: Unknown command '{command}'. Type 'help' for a list of commands.")
 
@@ -274,6 +559,8 @@ def main_loop():
             break
         except FileNotFoundError:
             print_error(f"Error: The file '{file_path}' was not found.")
+        except CsvValidationError as e:
+            print_error(f"Error: {e} Fix the file, or re-run with --skip-invalid to provision only the valid rows.")
         except Exception as e:
             print_error(f"An unexpected error occurred: {e}")
 
@@ -0,0 +1,112 @@
+"""Batch-wide project ID allocation with collision detection.
+
+Project IDs are derived from emails and team names by
+sanitize_project_id_part, which lowercases, replaces punctuation and cuts at
+30 characters, so different rows can map to one ID ('john.smith' and
+'john_smith', or two long names sharing a prefix). Such collisions used to
+surface only as a 409 mid-run. allocate_project_ids runs the whole CSV
+through the sanitizers first, indexes the candidate IDs, and gives every row
+whose ID is contested a deterministic disambiguator derived from its row key.
+
+Assignments are kept in a JSON mapping file (config.PROJECT_ID_MAP_PATH),
+{kind: {row key: project ID}}, so reruns, and later CSVs that add rows,
+reuse the IDs already handed out.
+"""
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+
+from src.conflicts import suffixed_id
+
+DISAMBIGUATOR_LEN = 4
+MAP_FORMAT = 1
+
+
+def disambiguator(key, salt=0):
+    """Returns a short hex tag that depends only on the row key (and `salt`)."""
+    text = key if salt == 0 else f"{key}#{salt}"
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:DISAMBIGUATOR_LEN]
+
+
+class ProjectIdMap:
+    """Row key to project ID assignments, persisted as JSON. A None path keeps them in memory only."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._ids = {}
+        if path is not None:
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except FileNotFoundError:
+                data = {}
+            if data and data.get('format') != MAP_FORMAT:
+                raise ValueError(f"Unsupported project ID map format in {path}")
+            self._ids = data.get('projects', {})
+
+    def get(self, kind, key):
+        return self._ids.get(kind, {}).get(key)
+
+    def assign(self, kind, key, project_id):
+        self._ids.setdefault(kind, {})[key] = project_id
+
+    def project_ids(self, kind):
+        return set(self._ids.get(kind, {}).values())
+
+    def save(self):
+        if self.path is None:
+            return
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump({'format': MAP_FORMAT, 'projects': self._ids}, f, indent=2, sort_keys=True)
+        os.replace(temporary, self.path)
+
+
+@dataclass
+class IdCollision:
+    """Rows whose sanitized project IDs were the same, and the IDs they got instead."""
+    project_id: str
+    assigned: dict = field(default_factory=dict)  # row key -> project ID
+
+
+def allocate_project_ids(rows, kind, id_map=None, save=True):
+    """Assigns a unique project ID to every ProjectRow in `rows`, in place.
+
+    Rows already in `id_map` keep their recorded ID. A new row keeps its
+    sanitized ID unless another row of the batch, or an ID recorded earlier,
+    has it too; then every new row contesting it gets
+    '<id>-<disambiguator(row key)>'. The result does not depend on row order.
+    Saves `id_map` (unless `save` is False) and returns the IdCollision list.
+    """
+    id_map = id_map if id_map is not None else ProjectIdMap()
+    taken = id_map.project_ids(kind)
+    candidates = {}
+    for row in rows:
+        recorded = id_map.get(kind, row.key)
+        if recorded is not None:
+            row.project_id = recorded
+        else:
+            candidates.setdefault(row.project_id, []).append(row)
+
+    collisions = []
+    for project_id, contenders in candidates.items():
+        if len(contenders) == 1 and project_id not in taken:
+            taken.add(project_id)
+            id_map.assign(kind, contenders[0].key, project_id)
+            continue
+        collision = IdCollision(project_id)
+        for row in sorted(contenders, key=lambda row: row.key):
+            salt = 0
+            while True:
+                row.project_id = suffixed_id(project_id, disambiguator(row.key, salt))
+                if row.project_id not in taken and row.project_id not in candidates:
+                    break
+                salt += 1
+            taken.add(row.project_id)
+            id_map.assign(kind, row.key, row.project_id)
+            collision.assigned[row.key] = row.project_id
+        collisions.append(collision)
+    if save:
+        id_map.save()
+    return collisions
@@ -0,0 +1,50 @@
+"""The single point through which every Google API request is executed.
+
+Callers name the API method they are calling (for example
+'cloudresourcemanager.projects.create'). The rate limiter charges the call to
+that method's surface, the retry policy uses it to decide whether the call is
+safe to repeat, and every attempt's latency and outcome is recorded under it
+in `metrics`.
+"""
+import itertools
+import time
+
+from googleapiclient.errors import HttpError
+
+from src import config
+from src.metrics import MetricsRegistry
+from src.ratelimit import RateLimiter
+from src.retry import RetryPolicy, RetryBudget
+
+rate_limiter = RateLimiter(config.API_RATE_LIMITS_PER_MINUTE)
+retry_policy = RetryPolicy(
+    max_attempts=config.RETRY_MAX_ATTEMPTS,
+    initial_backoff=config.RETRY_INITIAL_BACKOFF_SECONDS,
+    max_backoff=config.RETRY_MAX_BACKOFF_SECONDS,
+    deadline=config.RETRY_DEADLINE_SECONDS,
+    budget=RetryBudget(ratio=config.RETRY_BUDGET_RATIO),
+)
+metrics = MetricsRegistry()
+
+
+def _attempt(request, api_method, attempt):
+    rate_limiter.acquire(api_method)
+    if attempt > 1:
+        metrics.record_retry(api_method)
+    start = time.perf_counter()
+    try:
+        response = request.execute()
+    except Exception as e:
+        metrics.record_call(api_method, time.perf_counter() - start, e)
+        if isinstance(e, HttpError) and e.resp.status == 429:
+            rate_limiter.record_throttled(api_method)
+        raise
+    metrics.record_call(api_method, time.perf_counter() - start)
+    rate_limiter.record_success(api_method)
+    return response
+
+
+def execute(request, api_method):
+    """Executes a googleapiclient request within its surface's rate limit, retrying transient failures."""
+    attempts = itertools.count(1)
+    return retry_policy.call(lambda: _attempt(request, api_method, next(attempts)), api_method)
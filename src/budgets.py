@@ -0,0 +1,79 @@
+"""Per-project budgets, planned against the billing account's existing ones.
+
+Every provisioned project gets a monthly budget of
+config.PLAYGROUND_PROJECT_BUDGET_USD or config.TEAM_PROJECT_BUDGET_USD on
+config.BILLING_ACCOUNT_ID. The account's budgets are listed once and indexed
+by the single project they are scoped to. Each project's budget is then
+classified as `create` (no budget yet), `update` (the amount or alert
+thresholds differ) or `unchanged`, and only the first two are written.
+"""
+from dataclasses import dataclass
+
+from src import config
+
+ACTION_CREATE = 'create'
+ACTION_UPDATE = 'update'
+ACTION_UNCHANGED = 'unchanged'
+
+CURRENCY = 'USD'
+# Fields written by an update; the project filter of an existing budget is left alone
+UPDATE_MASK = 'displayName,amount,thresholdRules'
+
+
+def budget_body(project_id, project_name, amount_usd, thresholds=None):
+    """Returns the Budget resource for a monthly `amount_usd` budget on one project.
+
+    `project_name` is the project's resource name, 'projects/<number>'.
+    """
+    thresholds = config.BUDGET_ALERT_THRESHOLDS if thresholds is None else thresholds
+    return {
+        'displayName': f"{project_id} budget",
+        'budgetFilter': {'projects': [project_name], 'calendarPeriod': 'MONTH'},
+        'amount': {'specifiedAmount': {'currencyCode': CURRENCY, 'units': str(int(amount_usd))}},
+        'thresholdRules': [{'thresholdPercent': threshold} for threshold in thresholds],
+    }
+
+
+def index_budgets(budgets):
+    """Returns {'projects/<number>': budget} for budgets scoped to exactly one project."""
+    index = {}
+    for budget in budgets:
+        projects = (budget.get('budgetFilter') or {}).get('projects') or []
+        if len(projects) == 1:
+            index[projects[0]] = budget
+    return index
+
+
+def _amount(budget):
+    specified = (budget.get('amount') or {}).get('specifiedAmount') or {}
+    return specified.get('currencyCode', CURRENCY), int(specified.get('units') or 0), int(specified.get('nanos') or 0)
+
+
+def _thresholds(budget):
+    return sorted(float(rule.get('thresholdPercent', 0)) for rule in budget.get('thresholdRules') or [])
+
+
+@dataclass
+class BudgetChange:
+    """What a run does, or did, to the budget of one project."""
+    project_id: str
+    action: str
+    body: dict
+    budget_name: str = None
+    error: str = None
+
+
+def plan_budgets(projects, index, amount_usd, thresholds=None):
+    """Classifies the budget of every project resource in `projects` against `index`."""
+    changes = []
+    for project in projects:
+        desired = budget_body(project['projectId'], project['name'], amount_usd, thresholds)
+        existing = index.get(project['name'])
+        if existing is None:
+            action = ACTION_CREATE
+        elif _amount(existing) == _amount(desired) and _thresholds(existing) == _thresholds(desired):
+            action = ACTION_UNCHANGED
+        else:
+            action = ACTION_UPDATE
+        changes.append(BudgetChange(project['projectId'], action, desired, existing['name'] if existing else None))
+    return changes
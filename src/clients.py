@@ -0,0 +1,129 @@
+"""Pool of per-worker API clients sharing one credential.
+
+httplib2 connections are not thread-safe, so a worker thread cannot use the
+clients built for another one. Building a fresh set per call reconnects, and
+`build()` scopes the credential again for every client, so every client would
+refresh its own access token. A ClientPool instead gives each worker an
+AuthorizedHttp of its own (one keep-alive connection per host, shared by all
+of that worker's clients) on top of a single SharedCredentials, whose token is
+refreshed once, under a lock, for every thread. A set can also get one
+transport per client (`transports`), so that its clients can be used from
+different threads at once, as the overlapping steps of src/steps.py do.
+
+Client sets are leased with `acquire()` and handed back with `release()`, so
+the next provisioning run reuses warm connections instead of opening new ones.
+"""
+import contextlib
+import threading
+
+
+class SharedCredentials:
+    """Wraps a google-auth credential so that all threads share one token.
+
+    Only one thread refreshes at a time. Threads that were waiting for the lock
+    find the token already renewed and use it instead of refreshing again.
+    """
+
+    def __init__(self, credentials):
+        self._credentials = credentials
+        self._lock = threading.Lock()
+        self.refresh_count = 0
+
+    @property
+    def token(self):
+        return self._credentials.token
+
+    @property
+    def valid(self):
+        return self._credentials.valid
+
+    @property
+    def expired(self):
+        return self._credentials.expired
+
+    def refresh(self, request):
+        stale_token = self._credentials.token
+        with self._lock:
+            if self._credentials.token != stale_token and self._credentials.valid:
+                return
+            self._credentials.refresh(request)
+            self.refresh_count += 1
+
+    def before_request(self, request, method, url, headers):
+        if not self._credentials.valid:
+            self.refresh(request)
+        self._credentials.before_request(request, method, url, headers)
+
+    def apply(self, headers, token=None):
+        self._credentials.apply(headers, token=token)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self._credentials, name)
+
+
+def authorized_http(credentials):
+    """Returns a keep-alive AuthorizedHttp using googleapiclient's default timeouts."""
+    import google_auth_httplib2
+    from googleapiclient.http import build_http
+    return google_auth_httplib2.AuthorizedHttp(credentials, http=build_http())
+
+
+class ClientPool:
+    """Leases (crm_v3, serviceusage_v1, cloudbilling_v1)-style client sets to workers.
+
+    `build_clients(*https)` builds one set of clients on top of `transports`
+    new AuthorizedHttp objects. Calling the pool is the same as `acquire()`,
+    so it can be passed wherever a `client_factory` is expected.
+    """
+
+    def __init__(self, credentials, build_clients, transports=1):
+        self.credentials = credentials if isinstance(credentials, SharedCredentials) else SharedCredentials(credentials)
+        self._build_clients = build_clients
+        self._transports_per_set = transports
+        self._lock = threading.Lock()
+        self._idle = []
+        self._transports = {}
+
+    def acquire(self):
+        """Returns an idle client set, or builds one on a new connection."""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        https = [authorized_http(self.credentials) for _ in range(self._transports_per_set)]
+        clients = self._build_clients(*https)
+        with self._lock:
+            self._transports[id(clients)] = (clients, https)
+        return clients
+
+    def release(self, clients):
+        """Hands a client set back for the next worker; its connections stay open."""
+        with self._lock:
+            if id(clients) in self._transports:
+                self._idle.append(clients)
+
+    __call__ = acquire
+
+    @contextlib.contextmanager
+    def lease(self):
+        clients = self.acquire()
+        try:
+            yield clients
+        finally:
+            self.release(clients)
+
+    def size(self):
+        """Returns (client sets built, client sets idle)."""
+        with self._lock:
+            return len(self._transports), len(self._idle)
+
+    def close(self):
+        """Closes every connection the pool opened."""
+        with self._lock:
+            transports = list(self._transports.values())
+            self._transports.clear()
+            self._idle.clear()
+        for _, https in transports:
+            for http in https:
+                http.http.close()
@@ -15,6 +15,9 @@ PLAYGROUND_PROJECT_BUDGET_USD = 5
 # Default budget amount for team projects (per month in USD)
 TEAM_PROJECT_BUDGET_USD = 100
 
+# Fractions of a project's budget at which budget alert emails are sent
+BUDGET_ALERT_THRESHOLDS = [0.5, 0.9, 1.0]
+
 # List of Google APIs to enable for new projects
 APIS_TO_ENABLE = [
     'aiplatform.googleapis.com',
@@ -30,12 +33,26 @@ APIS_TO_ENABLE = [
     'cloudbilling.googleapis.com',
 ]
 
+# Maximum number of services per serviceusage services.batchEnable call
+SERVICEUSAGE_BATCH_ENABLE_LIMIT = 20
+
 # Folder names
 MAIN_FOLDER_NAME = "Hackathon Playground"
 GENERAL_FOLDER_NAME = "Individual Attendees"
 TEAM1_FOLDER_NAME = "Hackathon Batch1"
 TEAM2_FOLDER_NAME = "Hackathon Batch2"
 
+# Folder tree created by `init`, as {key: (display name, parent key)}. The
+# parent key None stands for the organization or folder passed to `init`.
+# Keys starting with 'team' are team batches; add more (e.g.
+# 'team3': ("Hackathon Batch3", 'main')) and re-run `init` to create them.
+FOLDER_TREE = {
+    'main': (MAIN_FOLDER_NAME, None),
+    'general': (GENERAL_FOLDER_NAME, 'main'),
+    'team1': (TEAM1_FOLDER_NAME, 'main'),
+    'team2': (TEAM2_FOLDER_NAME, 'main'),
+}
+
 # Project Id/Naming Conventions
 PLAYGROUND_PROJECT_ID_PREFIX = "idv-"
 PLAYGROUND_PROJECT_ID_SUFFIX = ""
@@ -47,11 +64,117 @@ TEAM_PROJECT_ID_SUFFIX = ""
 TEAM_PROJECT_NAME_PREFIX = "team project for "
 TEAM_PROJECT_NAME_SUFFIX = ""
 
+# Number of projects provisioned in parallel by 'provision attendees|teams'
+PROVISIONING_MAX_WORKERS = 8
+
+# Labels set on every created project; an existing project is only adopted if it carries them
+PROJECT_LABELS = {'managed-by': 'playground-prepare'}
+
+# What to do when a project ID is already taken: 'skip', 'adopt' (only projects
+# in the target folder carrying PROJECT_LABELS), 'suffix' (retry with a random
+# suffix) or 'adopt-or-suffix'. Overridden by 'provision --on-conflict=<strategy>'.
+PROJECT_CONFLICT_STRATEGY = 'adopt-or-suffix'
+# Suffixed IDs tried before a row is given up
+PROJECT_CONFLICT_MAX_ATTEMPTS = 3
+
+# Pre-provisioned projects for walk-in attendees ('pool' and 'checkin'): SIZE
+# ready projects are kept in the attendee folder, refilled in the background
+# every REFILL_INTERVAL seconds, and the CLI warns when fewer than
+# LOW_WATERMARK are left. Pool project IDs are ID_PREFIX plus a random suffix.
+PROJECT_POOL_SIZE = 20
+PROJECT_POOL_LOW_WATERMARK = 5
+PROJECT_POOL_REFILL_INTERVAL = 30
+PROJECT_POOL_ID_PREFIX = "idv-pool-"
+PROJECT_POOL_DISPLAY_NAME = "idv pool project"
+
+# Attempts at read-merge-write of a project IAM policy when the etag shows a concurrent change
+IAM_POLICY_MAX_ATTEMPTS = 5
+
+# Per-minute request quotas, one token bucket each. A key is either a full API
+# method or '<service>.read' / '<service>.write' covering that service's other
+# calls. Rates drop when the API answers 429 and recover as calls succeed.
+API_RATE_LIMITS_PER_MINUTE = {
+    'cloudresourcemanager.projects.create': 60,
+    'cloudresourcemanager.read': 1200,
+    'cloudresourcemanager.write': 600,
+    'cloudbilling.projects.updateBillingInfo': 300,
+    'serviceusage.services.batchEnable': 120,
+    'serviceusage.read': 1200,
+    'orgpolicy.write': 600,
+    'billingbudgets.write': 300,
+}
+
+# Retries of transient API failures (429, 5xx, timeouts): jittered exponential
+# backoff from INITIAL up to MAX seconds, at most MAX_ATTEMPTS attempts and
+# DEADLINE seconds per call, and retries overall limited to BUDGET_RATIO of calls
+RETRY_MAX_ATTEMPTS = 6
+RETRY_INITIAL_BACKOFF_SECONDS = 1.0
+RETRY_MAX_BACKOFF_SECONDS = 32.0
+RETRY_DEADLINE_SECONDS = 120.0
+RETRY_BUDGET_RATIO = 0.2
+
+# Page size used when listing folders, projects and services
+LIST_PAGE_SIZE = 200
+
+# Base URL of a local API emulator (e.g. 'http://127.0.0.1:8085', started with
+# `python -m src.emulator`). When set, all clients talk to it with anonymous
+# credentials instead of calling googleapis.com; None uses the real APIs.
+EMULATOR_URL = None
+
+# OpenMetrics text file with per-API-call and per-stage metrics, rewritten after
+# every provisioning run (for node_exporter's textfile collector or similar)
+METRICS_PATH = 'provisioning_metrics.prom'
+
+# Directory caching the Google API discovery documents the clients are built
+# from, so start-up needs no network round trip (see src/discovery.py)
+DISCOVERY_CACHE_DIR = '~/.cache/playground_prepare/discovery'
+
+# SQLite file recording per-row provisioning progress, used to resume interrupted runs
+PROVISIONING_JOURNAL_PATH = 'provisioning_journal.db'
+
+# JSON file mapping every attendee email / team name to the project ID it was
+# given, so reruns reuse IDs that needed a disambiguator (see src/allocator.py)
+PROJECT_ID_MAP_PATH = 'project_id_map.json'
+
+# 'provision attendees --watch <csv>': seconds between checks of the file for new
+# rows, and where the read position of every watched file is kept
+WATCH_POLL_INTERVAL = 2
+# Times a row that failed while watching is provisioned before it is left to a rerun
+WATCH_ROW_MAX_ATTEMPTS = 5
+WATCH_CURSOR_PATH = 'watch_cursor.json'
+
+# Long-running operation polling: first check after INITIAL seconds, then the
+# interval grows by MULTIPLIER per poll up to MAX seconds
+OPERATION_POLL_INITIAL_INTERVAL = 0.5
+OPERATION_POLL_MAX_INTERVAL = 5
+OPERATION_POLL_MULTIPLIER = 1.5
+# An operation still not done after this many seconds fails the row
+OPERATION_POLL_TIMEOUT = 600
+
+# Used by plan / dry-run estimates (see src/estimate.py) for methods not yet
+# called in this session: seconds per response and per long-running operation,
+# keyed by API method or glob
+ESTIMATE_LATENCY_SECONDS = {
+    'cloudresourcemanager.projects.create': 0.6,
+    'cloudresourcemanager.*.setIamPolicy': 0.4,
+    'cloudbilling.projects.updateBillingInfo': 0.5,
+    'serviceusage.services.batchEnable': 0.5,
+    '*.operations.get': 0.15,
+    '*': 0.25,
+}
+ESTIMATE_OPERATION_SECONDS = {
+    'cloudresourcemanager.projects.create': 12,
+    'cloudresourcemanager.folders.create': 6,
+    'serviceusage.services.batchEnable': 20,
+}
+
 # Initialized Folder IDs (will be updated after init command)
 MAIN_HACKATHON_FOLDER_ID = None
 GENERAL_ATTENDEES_FOLDER_ID = None
 HACKATHON_TEAMS1_FOLDER_ID = None
 HACKATHON_TEAMS2_FOLDER_ID = None
+# IDs of further team batch folders from FOLDER_TREE (team3, ...), keyed by tree key
+TEAM_BATCH_FOLDER_IDS = {}
 
 # 組織政策，用於限制服務和虛擬機器執行個體
 ORGANIZATION_POLICY = {
@@ -0,0 +1,97 @@
+"""Unattended handling of project IDs that already exist.
+
+A create that answers 409 used to stop the worker on an input() prompt,
+which stalled the whole run. A ConflictResolver decides instead, following
+config.PROJECT_CONFLICT_STRATEGY:
+
+* skip:            leave the row unprovisioned;
+* adopt:           if the existing project is ours (ACTIVE, in the target
+                   folder and carrying config.PROJECT_LABELS), carry on with
+                   billing, IAM and API enablement on it; otherwise skip;
+* suffix:          retry with a random suffix, at most
+                   config.PROJECT_CONFLICT_MAX_ATTEMPTS times;
+* adopt-or-suffix: adopt when the project is ours, otherwise suffix.
+
+Every decision is recorded so the run can report them at the end.
+"""
+import os
+import threading
+from dataclasses import dataclass
+
+from src import config
+
+STRATEGY_SKIP = 'skip'
+STRATEGY_ADOPT = 'adopt'
+STRATEGY_SUFFIX = 'suffix'
+STRATEGY_ADOPT_OR_SUFFIX = 'adopt-or-suffix'
+STRATEGIES = (STRATEGY_SKIP, STRATEGY_ADOPT, STRATEGY_SUFFIX, STRATEGY_ADOPT_OR_SUFFIX)
+
+DECISION_SKIPPED = 'skipped'
+DECISION_ADOPTED = 'adopted'
+DECISION_RENAMED = 'renamed'
+DECISION_GAVE_UP = 'gave up'
+
+PROJECT_ID_MAX_LEN = 30
+
+
+def random_suffix():
+    return os.urandom(3).hex()  # 6 random hex characters
+
+
+def suffixed_id(project_id, suffix, max_len=PROJECT_ID_MAX_LEN):
+    """Appends '-<suffix>' to a project ID, shortening it to stay within `max_len`."""
+    base = project_id[:max_len - len(suffix) - 1].rstrip('-')
+    return f"{base}-{suffix}"
+
+
+@dataclass
+class ConflictDecision:
+    """What was done about one project ID that already existed."""
+    project_id: str
+    decision: str
+    final_project_id: str = None
+    reason: str = ''
+
+
+class ConflictResolver:
+    """Decides, without asking anyone, what to do when a project ID is taken. Thread-safe."""
+
+    def __init__(self, strategy=None, max_attempts=None, labels=None, suffix=random_suffix):
+        self.strategy = strategy or config.PROJECT_CONFLICT_STRATEGY
+        if self.strategy not in STRATEGIES:
+            raise ValueError(f"Unknown conflict strategy '{self.strategy}'; use one of: {', '.join(STRATEGIES)}.")
+        self.max_attempts = config.PROJECT_CONFLICT_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        self.labels = config.PROJECT_LABELS if labels is None else labels
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._decisions = []
+
+    @property
+    def may_adopt(self):
+        return self.strategy in (STRATEGY_ADOPT, STRATEGY_ADOPT_OR_SUFFIX)
+
+    @property
+    def may_rename(self):
+        return self.strategy in (STRATEGY_SUFFIX, STRATEGY_ADOPT_OR_SUFFIX)
+
+    def ownership_problem(self, project, parent):
+        """Returns why `project` (a resource, or None if not visible) is not ours to adopt, or None if it is."""
+        if project is None:
+            return "owned by someone else or not visible"
+        if project.get('state', 'ACTIVE') != 'ACTIVE':
+            return f"project is {project['state']}"
+        if project.get('parent') != parent:
+            return f"project is under {project.get('parent')}, not {parent}"
+        labels = project.get('labels') or {}
+        missing = [key for key, value in self.labels.items() if labels.get(key) != value]
+        if missing:
+            return f"project lacks the labels {', '.join(missing)}"
+        return None
+
+    def record(self, project_id, decision, final_project_id=None, reason=''):
+        with self._lock:
+            self._decisions.append(ConflictDecision(project_id, decision, final_project_id, reason))
+
+    def decisions(self):
+        with self._lock:
+            return list(self._decisions)
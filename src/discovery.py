@@ -0,0 +1,176 @@
+"""Discovery-document cache and lazily built API clients.
+
+`build()` may download a service's discovery document before it returns a
+client. Here documents are looked up, in order:
+
+1. in memory, once this process has loaded them;
+2. in config.DISCOVERY_CACHE_DIR, where each document is stored next to an
+   index recording its SHA-256, the API revision and where it came from. A
+   file whose digest does not match is discarded;
+3. among the documents bundled with googleapiclient;
+4. on the network, as a last resort.
+
+Documents found in steps 3 and 4 are written to the cache, so the CLI keeps
+working offline (for example against src/emulator.py) once it has seen them.
+
+`LazyClient` defers building a client until its first use, so neither the CLI
+start-up nor a worker that never calls an API pays for it. googleapiclient's
+discovery module is only imported when a client is actually built.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from src import config
+
+# Bumped whenever the cache layout changes; older caches are ignored
+CACHE_FORMAT = 1
+INDEX_FILE = 'index.json'
+DISCOVERY_URL = 'https://{service}.googleapis.com/$discovery/rest?version={version}'
+FETCH_TIMEOUT_SECONDS = 10
+
+
+class DiscoveryError(Exception):
+    """Raised when no usable discovery document can be found for an API."""
+
+
+def _digest(content):
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def _bundled_document(service, version):
+    try:
+        from googleapiclient.discovery_cache import get_static_doc
+    except ImportError:
+        return None
+    return get_static_doc(service, version)
+
+
+def _fetch_document(service, version):
+    import urllib.request
+    url = DISCOVERY_URL.format(service=service, version=version)
+    with urllib.request.urlopen(url, timeout=FETCH_TIMEOUT_SECONDS) as response:
+        return response.read().decode('utf-8')
+
+
+class DiscoveryCache:
+    """Thread-safe store of discovery documents, in memory and on disk."""
+
+    def __init__(self, directory=None):
+        self.directory = os.path.expanduser(directory or config.DISCOVERY_CACHE_DIR)
+        self._documents = {}
+        self._lock = threading.Lock()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _read_index(self):
+        try:
+            with open(self._path(INDEX_FILE)) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if index.get('format') != CACHE_FORMAT:
+            return {}
+        return index.get('documents', {})
+
+    def _write(self, key, content, source):
+        """Stores a document and its index entry; the cache is best-effort, so OS errors are ignored."""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            documents = self._read_index()
+            temporary = self._path(f"{key}.json.tmp")
+            with open(temporary, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(temporary, self._path(f"{key}.json"))
+            documents[key] = {
+                'sha256': _digest(content),
+                'revision': json.loads(content).get('revision'),
+                'source': source,
+                'stored': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            }
+            temporary = self._path(f"{INDEX_FILE}.tmp")
+            with open(temporary, 'w') as f:
+                json.dump({'format': CACHE_FORMAT, 'documents': documents}, f, indent=2, sort_keys=True)
+            os.replace(temporary, self._path(INDEX_FILE))
+        except OSError:
+            pass
+
+    def _read_cached(self, key):
+        entry = self._read_index().get(key)
+        if entry is None:
+            return None
+        try:
+            with open(self._path(f"{key}.json"), encoding='utf-8') as f:
+                content = f.read()
+        except OSError:
+            return None
+        if _digest(content) != entry.get('sha256'):
+            return None
+        return content
+
+    def document(self, service, version):
+        """Returns the discovery document of service/version as JSON text."""
+        key = f"{service}.{version}"
+        with self._lock:
+            content = self._documents.get(key)
+            if content is None:
+                content = self._read_cached(key)
+                if content is None:
+                    content, source = _bundled_document(service, version), 'bundled'
+                    if content is None:
+                        try:
+                            content, source = _fetch_document(service, version), 'network'
+                        except OSError as e:
+                            raise DiscoveryError(f"No discovery document for {key}: {e}") from e
+                    self._write(key, content, source)
+                self._documents[key] = content
+            return content
+
+    def entries(self):
+        """Returns the on-disk index: {'service.version': {'sha256', 'revision', 'source', 'stored'}}."""
+        return self._read_index()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def default_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiscoveryCache()
+        return _cache
+
+
+def build_client(service, version, credentials=None, client_options=None, cache=None, http=None):
+    """Builds an API client from a cached discovery document; never fetches one if cached.
+
+    Pass either `credentials` or an already authorized `http`, not both.
+    """
+    from googleapiclient.discovery import build_from_document
+    document = (cache or default_cache()).document(service, version)
+    return build_from_document(document, credentials=credentials, client_options=client_options, http=http)
+
+
+class LazyClient:
+    """Stands in for an API client and builds it, once, on first attribute access."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _resolve(self):
+        with self._lock:
+            if self._client is None:
+                self._client = self._factory()
+            return self._client
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self._resolve(), name)
@@ -0,0 +1,761 @@
+"""A local HTTP stand-in for the Google Cloud APIs the provisioning code calls.
+
+Serves the parts of cloudresourcemanager v3, cloudbilling v1, billingbudgets
+v1, serviceusage v1 and orgpolicy v2 used by src/main.py: organizations,
+folders, projects, long-running operations, IAM policies, billing info,
+budgets, service enablement and org policies. Each API is mounted under its own path prefix, so a client
+built with `client_options={'api_endpoint': f'{url}/<service>/'}` talks to the
+emulator instead of googleapis.com (see main.build_service_clients).
+
+The point is to exercise provisioning realistically on a machine with no
+network. EmulatorSettings controls:
+
+* latency: seconds added to every response, with optional jitter;
+* operation_duration: seconds before a long-running operation reports done;
+* quotas: per-minute limits keyed like config.API_RATE_LIMITS_PER_MINUTE,
+  answered with 429 RESOURCE_EXHAUSTED once exceeded;
+* faults: Fault entries that fail matching calls with an HTTP status, or
+  drop the connection when the status is 0.
+
+`latency` and `operation_duration` take either a number or a dict of
+{api_method glob: seconds}, e.g. {'cloudresourcemanager.projects.create': 0.4, '*': 0.05}.
+
+Run `python -m src.emulator --port 8085` and set config.EMULATOR_URL to
+'http://127.0.0.1:8085' to point the interactive CLI at it.
+"""
+import argparse
+import collections
+import fnmatch
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.ratelimit import surface_for
+
+DEFAULT_ORGANIZATION_ID = '123456789012'
+DEFAULT_PAGE_SIZE = 50
+# serviceusage rejects batchEnable calls naming more services than this
+BATCH_ENABLE_LIMIT = 20
+
+STATUS_NAMES = {
+    400: 'INVALID_ARGUMENT',
+    403: 'PERMISSION_DENIED',
+    404: 'NOT_FOUND',
+    409: 'ALREADY_EXISTS',
+    429: 'RESOURCE_EXHAUSTED',
+    500: 'INTERNAL',
+    503: 'UNAVAILABLE',
+}
+
+
+@dataclass
+class Fault:
+    """Fails calls whose API method matches `api_method` (a glob).
+
+    Each matching call fails with `status` with the given probability, at
+    most `times` times (None for no limit). A status of 0 drops the
+    connection without a response. With `after_commit`, the call is carried
+    out first and only its response is lost, as when a timeout or 5xx hides
+    a change the server did make.
+    """
+    api_method: str
+    status: int = 503
+    probability: float = 1.0
+    times: int = None
+    retry_after: float = None
+    after_commit: bool = False
+
+
+@dataclass
+class EmulatorSettings:
+    latency: object = 0.0
+    latency_jitter: float = 0.0
+    operation_duration: object = 0.0
+    quotas: dict = field(default_factory=dict)
+    faults: list = field(default_factory=list)
+    organizations: list = field(default_factory=lambda: [DEFAULT_ORGANIZATION_ID])
+    caller: str = 'user:emulator@example.com'
+    # Enabling services on a project without a billing account fails, as it does for paid APIs
+    require_billing: bool = True
+    seed: int = None
+
+
+def _lookup(value, api_method):
+    """Resolves a number-or-{glob: number} setting for one API method."""
+    if not isinstance(value, dict):
+        return float(value or 0)
+    if api_method in value:
+        return float(value[api_method])
+    for pattern, seconds in value.items():
+        if fnmatch.fnmatchcase(api_method, pattern):
+            return float(seconds)
+    return 0.0
+
+
+class EmulatorError(Exception):
+    """An error response in the Google API JSON error format."""
+
+    def __init__(self, status, message, reason=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.reason = reason or STATUS_NAMES.get(status, 'UNKNOWN')
+        self.api_method = None
+        self.retry_after = None
+
+    def payload(self):
+        return {'error': {'code': self.status, 'message': self.message, 'status': self.reason}}
+
+
+class DropConnection(Exception):
+    """Raised by fault injection to close the connection without answering."""
+
+
+def _camel_case(value):
+    """Renames snake_case keys to camelCase, as the real JSON APIs accept both."""
+    if isinstance(value, dict):
+        return {re.sub(r'_([a-z])', lambda m: m.group(1).upper(), k): _camel_case(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_camel_case(v) for v in value]
+    return value
+
+
+def _parse_query(query):
+    """Parses 'parent=folders/1 AND state=ACTIVE AND displayName="Hack*"' (or ':' forms) into a dict."""
+    terms = {}
+    for term in filter(None, (t.strip() for t in (query or '').split(' AND '))):
+        match = re.match(r'(\w+)\s*[=:]\s*(.*)', term)
+        if not match:
+            raise EmulatorError(400, f"Unsupported query term: {term}")
+        terms[match.group(1)] = match.group(2).strip('"')
+    return terms
+
+
+def _matches_query(resource, terms):
+    for key, expected in terms.items():
+        actual = resource.get(key, '')
+        if expected.endswith('*'):
+            if not actual.lower().startswith(expected[:-1].lower()):
+                return False
+        elif actual != expected:
+            return False
+    return True
+
+
+def _page(items, items_key, params):
+    """Returns one page of `items`, using the offset as the page token."""
+    size = int(params.get('pageSize') or DEFAULT_PAGE_SIZE)
+    start = int(params.get('pageToken') or 0)
+    response = {items_key: items[start:start + size]} if items[start:start + size] else {}
+    if start + size < len(items):
+        response['nextPageToken'] = str(start + size)
+    return response
+
+
+class EmulatorState:
+    """The emulated resources; every method is called with the lock held."""
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.lock = threading.Lock()
+        self.organizations = {f"organizations/{org_id}": {
+            'name': f"organizations/{org_id}", 'displayName': f"emulated-{org_id}.example.com", 'state': 'ACTIVE',
+        } for org_id in settings.organizations}
+        self.folders = {}
+        self.projects = {}
+        # project IDs are reserved from the create call on, even while the operation runs
+        self.reserved_project_ids = set()
+        self.operations = {}
+        self.iam_policies = {}
+        self.billing = {}
+        self.budgets = {}
+        self.services = collections.defaultdict(set)
+        self.org_policies = {}
+        self.calls = collections.Counter()
+        self._numbers = itertools.count(100000000001)
+        self._quota_windows = collections.defaultdict(collections.deque)
+        self._faults_fired = collections.Counter()
+        self._rand = random.Random(settings.seed)
+
+    # -- bookkeeping -------------------------------------------------------
+
+    def admit(self, api_method, now):
+        """Counts a call and applies quotas and fault injection to it.
+
+        Returns the error of an after_commit fault, to raise once the call is handled.
+        """
+        self.calls[api_method] += 1
+        failure = None
+        for index, fault in enumerate(self.settings.faults):
+            if not fnmatch.fnmatchcase(api_method, fault.api_method):
+                continue
+            if fault.times is not None and self._faults_fired[index] >= fault.times:
+                continue
+            if self._rand.random() >= fault.probability:
+                continue
+            self._faults_fired[index] += 1
+            if not fault.status:
+                failure = DropConnection()
+            else:
+                failure = EmulatorError(fault.status, f"Injected fault for {api_method}")
+                failure.retry_after = fault.retry_after
+            if not fault.after_commit:
+                raise failure
+            break
+        quotas = self.settings.quotas
+        surface = surface_for(api_method, quotas)
+        if surface in quotas:
+            window = self._quota_windows[surface]
+            while window and now - window[0] >= 60:
+                window.popleft()
+            if len(window) >= quotas[surface]:
+                error = EmulatorError(429, f"Quota exceeded for quota metric '{surface}' per minute.")
+                error.retry_after = 60 - (now - window[0])
+                raise error
+            window.append(now)
+        return failure
+
+    def settle(self, now):
+        """Completes every operation whose duration has elapsed."""
+        for operation in self.operations.values():
+            if not operation['done'] and operation['_ready_at'] <= now:
+                self._finish(operation)
+
+    def _finish(self, operation):
+        try:
+            operation['response'] = operation.pop('_complete')()
+        except EmulatorError as e:
+            operation['error'] = {'code': e.status, 'message': e.message}
+        operation['done'] = True
+
+    def _start_operation(self, prefix, api_method, now, complete, metadata=None):
+        name = f"operations/{prefix}.{next(self._numbers)}"
+        operation = {'name': name, 'done': False, 'metadata': metadata or {},
+                     '_complete': complete, '_ready_at': now + _lookup(self.settings.operation_duration, api_method)}
+        self.operations[name] = operation
+        if operation['_ready_at'] <= now:
+            self._finish(operation)
+        return operation
+
+    def _new_number(self):
+        return str(next(self._numbers))
+
+    def _etag(self, resource):
+        self.iam_policies.setdefault(resource, {'version': 1, 'bindings': [], '_serial': 0})
+        return f"BwY{self.iam_policies[resource]['_serial']:08d}"
+
+    # -- resource lookups --------------------------------------------------
+
+    def _folder(self, folder_id):
+        folder = self.folders.get(f"folders/{folder_id}")
+        if folder is None:
+            raise EmulatorError(403, f"Permission denied on resource 'folders/{folder_id}' (or it may not exist).")
+        return folder
+
+    def _parent(self, parent):
+        if parent in self.organizations:
+            return self.organizations[parent]
+        if parent.startswith('folders/'):
+            folder = self._folder(parent.split('/', 1)[1])
+            if folder['state'] != 'ACTIVE':
+                raise EmulatorError(400, f"Parent {parent} is not active.", 'FAILED_PRECONDITION')
+            return folder
+        raise EmulatorError(400, f"Invalid parent: {parent}")
+
+    def _project(self, key):
+        """Looks a project up by project ID or number."""
+        project = self.projects.get(key)
+        if project is None:
+            for candidate in self.projects.values():
+                if candidate['name'] == f"projects/{key}":
+                    return candidate
+            raise EmulatorError(403, f"Permission denied on resource project {key} (or it may not exist).")
+        return project
+
+    def _resource(self, kind, resource_id):
+        if kind == 'projects':
+            return self._project(resource_id)
+        if kind == 'folders':
+            return self._folder(resource_id)
+        name = f"organizations/{resource_id}"
+        if name not in self.organizations:
+            raise EmulatorError(403, f"Permission denied on resource '{name}' (or it may not exist).")
+        return self.organizations[name]
+
+    def _stamp(self, resource):
+        stamp = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        resource.setdefault('createTime', stamp)
+        resource['updateTime'] = stamp
+        return resource
+
+    # -- cloudresourcemanager v3 -------------------------------------------
+
+    def get_organization(self, now, params, body, org_id):
+        return self._resource('organizations', org_id)
+
+    def get_folder(self, now, params, body, folder_id):
+        return self._folder(folder_id)
+
+    def _list(self, resources, items_key, params, terms):
+        show_deleted = str(params.get('showDeleted', '')).lower() == 'true'
+        items = [r for r in resources if _matches_query(r, terms) and (show_deleted or r['state'] == 'ACTIVE')]
+        return _page(items, items_key, params)
+
+    def list_folders(self, now, params, body):
+        self._parent(params.get('parent', ''))
+        return self._list(self.folders.values(), 'folders', params, {'parent': params['parent']})
+
+    def search_folders(self, now, params, body):
+        return self._list(self.folders.values(), 'folders', dict(params, showDeleted='true'), _parse_query(params.get('query')))
+
+    def create_folder(self, now, params, body):
+        parent = body.get('parent', '')
+        display_name = body.get('displayName', '')
+        self._parent(parent)
+        if not display_name:
+            raise EmulatorError(400, "Folder displayName is required.")
+        for folder in self.folders.values():
+            if folder['parent'] == parent and folder['displayName'] == display_name and folder['state'] == 'ACTIVE':
+                raise EmulatorError(409, f"A folder named {display_name} already exists under {parent}.", 'FAILED_PRECONDITION')
+        name = f"folders/{self._new_number()}"
+
+        def complete():
+            folder = self._stamp({'name': name, 'parent': parent, 'displayName': display_name, 'state': 'ACTIVE'})
+            self.folders[name] = folder
+            return dict(folder, **{'@type': 'type.googleapis.com/google.cloud.resourcemanager.v3.Folder'})
+        return self._start_operation('cf', 'cloudresourcemanager.folders.create', now, complete,
+                                     {'displayName': display_name, 'parent': parent})
+
+    def delete_folder(self, now, params, body, folder_id):
+        folder = self._folder(folder_id)
+        children = [r for r in itertools.chain(self.folders.values(), self.projects.values())
+                    if r['parent'] == folder['name'] and r['state'] == 'ACTIVE']
+        if children:
+            raise EmulatorError(400, f"Folder {folder['name']} is not empty.", 'FAILED_PRECONDITION')
+
+        def complete():
+            folder['state'] = 'DELETE_REQUESTED'
+            return dict(self._stamp(folder))
+        return self._start_operation('df', 'cloudresourcemanager.folders.delete', now, complete)
+
+    def get_operation(self, now, params, body, operation_id):
+        operation = self.operations.get(f"operations/{operation_id}")
+        if operation is None:
+            raise EmulatorError(404, f"Operation operations/{operation_id} not found.")
+        return {k: v for k, v in operation.items() if not k.startswith('_')}
+
+    def list_projects(self, now, params, body):
+        self._parent(params.get('parent', ''))
+        return self._list(self.projects.values(), 'projects', params, {'parent': params['parent']})
+
+    def search_projects(self, now, params, body):
+        return self._list(self.projects.values(), 'projects', dict(params, showDeleted='true'), _parse_query(params.get('query')))
+
+    def create_project(self, now, params, body):
+        project_id = body.get('projectId', '')
+        parent = body.get('parent', '')
+        if not re.fullmatch(r'[a-z][a-z0-9-]{4,28}[a-z0-9]', project_id):
+            raise EmulatorError(400, f"Invalid project ID: {project_id}")
+        self._parent(parent)
+        if project_id in self.reserved_project_ids:
+            raise EmulatorError(409, f"Requested entity already exists: project {project_id}")
+        self.reserved_project_ids.add(project_id)
+        number = self._new_number()
+
+        def complete():
+            project = self._stamp({'name': f"projects/{number}", 'projectId': project_id, 'parent': parent,
+                                   'displayName': body.get('displayName', project_id), 'state': 'ACTIVE',
+                                   'labels': body.get('labels', {})})
+            self.projects[project_id] = project
+            self.iam_policies[f"projects/{number}"] = {
+                'version': 1, 'bindings': [{'role': 'roles/owner', 'members': [self.settings.caller]}], '_serial': 1}
+            return dict(project, **{'@type': 'type.googleapis.com/google.cloud.resourcemanager.v3.Project'})
+        return self._start_operation('cp', 'cloudresourcemanager.projects.create', now, complete)
+
+    def get_project(self, now, params, body, project_id):
+        return self._project(project_id)
+
+    def patch_project(self, now, params, body, project_id):
+        project = self._project(project_id)
+        fields = params['updateMask'].split(',') if params.get('updateMask') else list(body)
+        for field_name in fields:
+            if field_name not in ('displayName', 'labels'):
+                raise EmulatorError(400, f"Field {field_name} cannot be updated.")
+
+        def complete():
+            for field_name in fields:
+                if field_name in body:
+                    project[field_name] = body[field_name]
+            return dict(self._stamp(project), **{'@type': 'type.googleapis.com/google.cloud.resourcemanager.v3.Project'})
+        return self._start_operation('up', 'cloudresourcemanager.projects.patch', now, complete)
+
+    def delete_project(self, now, params, body, project_id):
+        project = self._project(project_id)
+        if project['state'] != 'ACTIVE':
+            raise EmulatorError(400, f"Project {project_id} is already being deleted.", 'FAILED_PRECONDITION')
+
+        def complete():
+            project['state'] = 'DELETE_REQUESTED'
+            return dict(self._stamp(project))
+        return self._start_operation('dp', 'cloudresourcemanager.projects.delete', now, complete)
+
+    def _policy_key(self, kind, resource_id):
+        return self._resource(kind, resource_id)['name']
+
+    def get_iam_policy(self, now, params, body, kind, resource_id):
+        key = self._policy_key(kind, resource_id)
+        etag = self._etag(key)
+        policy = self.iam_policies[key]
+        return {'version': policy['version'], 'etag': etag, 'bindings': json.loads(json.dumps(policy['bindings']))}
+
+    def set_iam_policy(self, now, params, body, kind, resource_id):
+        key = self._policy_key(kind, resource_id)
+        current_etag = self._etag(key)
+        policy = body.get('policy') or {}
+        if policy.get('etag') and policy['etag'] != current_etag:
+            raise EmulatorError(409, "There were concurrent policy changes. Please retry the whole read-modify-write "
+                                     "with exponential backoff.", 'ABORTED')
+        serial = self.iam_policies[key]['_serial'] + 1
+        self.iam_policies[key] = {'version': policy.get('version', 1), 'bindings': policy.get('bindings', []), '_serial': serial}
+        return self.get_iam_policy(now, params, body, kind, resource_id)
+
+    # -- cloudbilling v1 ---------------------------------------------------
+
+    def get_billing_info(self, now, params, body, project_id):
+        project = self._project(project_id)
+        return self.billing.get(project['projectId'], {
+            'name': f"projects/{project['projectId']}/billingInfo", 'projectId': project['projectId'],
+            'billingAccountName': '', 'billingEnabled': False})
+
+    def update_billing_info(self, now, params, body, project_id):
+        project = self._project(project_id)
+        account = body.get('billingAccountName') or ''
+        if account and not re.fullmatch(r'billingAccounts/[0-9A-F]{6}-[0-9A-F]{6}-[0-9A-F]{6}', account):
+            raise EmulatorError(400, f"Invalid billing account name: {account}")
+        info = {'name': f"projects/{project['projectId']}/billingInfo", 'projectId': project['projectId'],
+                'billingAccountName': account, 'billingEnabled': bool(account)}
+        self.billing[project['projectId']] = info
+        return info
+
+    # -- billingbudgets v1 -------------------------------------------------
+
+    def _billing_account(self, account_id):
+        if not re.fullmatch(r'[0-9A-F]{6}-[0-9A-F]{6}-[0-9A-F]{6}', account_id):
+            raise EmulatorError(400, f"Invalid billing account name: billingAccounts/{account_id}")
+        return f"billingAccounts/{account_id}"
+
+    def _budget(self, account_id, budget_id):
+        name = f"{self._billing_account(account_id)}/budgets/{budget_id}"
+        if name not in self.budgets:
+            raise EmulatorError(404, f"Budget {name} not found.")
+        return self.budgets[name]
+
+    def _store_budget(self, budget):
+        """Validates a budget and stores it; projects are stored by number, as the real API returns them."""
+        specified = (budget.get('amount') or {}).get('specifiedAmount') or {}
+        if not specified.get('units') and not specified.get('nanos'):
+            raise EmulatorError(400, "Budget amount must be specified.")
+        budget_filter = budget.setdefault('budgetFilter', {})
+        budget_filter['projects'] = [self._project(p.split('/', 1)[1])['name'] for p in budget_filter.get('projects', [])]
+        budget['etag'] = f"{next(self._numbers):x}"
+        self.budgets[budget['name']] = budget
+        return budget
+
+    def list_budgets(self, now, params, body, account_id):
+        prefix = f"{self._billing_account(account_id)}/budgets/"
+        budgets = [b for name, b in sorted(self.budgets.items()) if name.startswith(prefix)]
+        return _page(budgets, 'budgets', params)
+
+    def get_budget(self, now, params, body, account_id, budget_id):
+        return self._budget(account_id, budget_id)
+
+    def create_budget(self, now, params, body, account_id):
+        name = f"{self._billing_account(account_id)}/budgets/{next(self._numbers):x}"
+        return self._store_budget(dict(body, name=name))
+
+    def patch_budget(self, now, params, body, account_id, budget_id):
+        budget = dict(self._budget(account_id, budget_id))
+        fields = [f.split('.', 1)[0] for f in params['updateMask'].split(',')] if params.get('updateMask') else list(body)
+        for field_name in fields:
+            if field_name not in ('name', 'etag') and field_name in body:
+                budget[field_name] = body[field_name]
+        return self._store_budget(budget)
+
+    def delete_budget(self, now, params, body, account_id, budget_id):
+        del self.budgets[self._budget(account_id, budget_id)['name']]
+        return {}
+
+    # -- serviceusage v1 ---------------------------------------------------
+
+    def _active_project(self, project_id):
+        project = self._project(project_id)
+        if project['state'] != 'ACTIVE':
+            raise EmulatorError(403, f"Project {project_id} is not active.")
+        return project
+
+    def list_services(self, now, params, body, project_id):
+        project = self._active_project(project_id)
+        enabled = sorted(self.services[project['projectId']])
+        if params.get('filter') not in (None, 'state:ENABLED'):
+            raise EmulatorError(400, f"Unsupported filter: {params['filter']}")
+        services = [{'name': f"{project['name']}/services/{s}", 'parent': project['name'],
+                     'config': {'name': s}, 'state': 'ENABLED'} for s in enabled]
+        return _page(services, 'services', params)
+
+    def _enable(self, now, project_id, names, api_method):
+        project = self._active_project(project_id)
+        if self.settings.require_billing and not self.billing.get(project['projectId'], {}).get('billingEnabled'):
+            raise EmulatorError(400, f"Billing must be enabled for activation of service(s) on project {project_id}.",
+                                'FAILED_PRECONDITION')
+
+        def complete():
+            self.services[project['projectId']].update(names)
+            return {'@type': 'type.googleapis.com/google.api.serviceusage.v1.BatchEnableServicesResponse',
+                    'services': [{'name': f"{project['name']}/services/{s}", 'state': 'ENABLED'} for s in names]}
+        return self._start_operation('acf.p2', api_method, now, complete)
+
+    def batch_enable(self, now, params, body, project_id):
+        names = body.get('serviceIds') or []
+        if not names or len(names) > BATCH_ENABLE_LIMIT:
+            raise EmulatorError(400, f"batchEnable takes 1 to {BATCH_ENABLE_LIMIT} services, got {len(names)}.")
+        return self._enable(now, project_id, list(names), 'serviceusage.services.batchEnable')
+
+    def enable_service(self, now, params, body, project_id, service):
+        return self._enable(now, project_id, [service], 'serviceusage.services.enable')
+
+    # -- orgpolicy v2 ------------------------------------------------------
+
+    def _policy_name(self, kind, resource_id, constraint):
+        self._resource(kind, resource_id)
+        return f"{kind}/{resource_id}/policies/{constraint.replace('constraints/', '', 1)}"
+
+    def get_org_policy(self, now, params, body, kind, resource_id, constraint):
+        name = self._policy_name(kind, resource_id, constraint)
+        if name not in self.org_policies:
+            raise EmulatorError(404, f"Policy {name} not found.")
+        return self.org_policies[name]
+
+    def list_org_policies(self, now, params, body, kind, resource_id):
+        self._resource(kind, resource_id)
+        prefix = f"{kind}/{resource_id}/policies/"
+        policies = [p for name, p in sorted(self.org_policies.items()) if name.startswith(prefix)]
+        return _page(policies, 'policies', params)
+
+    def _store_org_policy(self, name, body):
+        policy = {'name': name, 'spec': dict(body.get('spec') or {})}
+        policy['spec']['etag'] = f"W/\"{next(self._numbers)}\""
+        policy['spec']['updateTime'] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        self.org_policies[name] = policy
+        return policy
+
+    def create_org_policy(self, now, params, body, kind, resource_id):
+        constraint = (body.get('name') or '').rsplit('/policies/', 1)[-1]
+        name = self._policy_name(kind, resource_id, constraint)
+        if name in self.org_policies:
+            raise EmulatorError(409, f"Policy {name} already exists.")
+        return self._store_org_policy(name, body)
+
+    def patch_org_policy(self, now, params, body, kind, resource_id, constraint):
+        self.get_org_policy(now, params, body, kind, resource_id, constraint)
+        return self._store_org_policy(self._policy_name(kind, resource_id, constraint), body)
+
+    def delete_org_policy(self, now, params, body, kind, resource_id, constraint):
+        self.get_org_policy(now, params, body, kind, resource_id, constraint)
+        del self.org_policies[self._policy_name(kind, resource_id, constraint)]
+        return {}
+
+
+_ID = r'(?P<id>[^/:]+)'
+_RESOURCE = r'(?P<kind>projects|folders|organizations)/(?P<id>[^/:]+)'
+
+# (service, HTTP method, path pattern, API method, EmulatorState method)
+ROUTES = [
+    ('cloudresourcemanager', 'GET', rf'v3/organizations/{_ID}', 'organizations.get', 'get_organization'),
+    ('cloudresourcemanager', 'GET', r'v3/folders', 'folders.list', 'list_folders'),
+    ('cloudresourcemanager', 'GET', r'v3/folders:search', 'folders.search', 'search_folders'),
+    ('cloudresourcemanager', 'POST', r'v3/folders', 'folders.create', 'create_folder'),
+    ('cloudresourcemanager', 'GET', rf'v3/folders/{_ID}', 'folders.get', 'get_folder'),
+    ('cloudresourcemanager', 'DELETE', rf'v3/folders/{_ID}', 'folders.delete', 'delete_folder'),
+    ('cloudresourcemanager', 'GET', r'v3/operations/(?P<id>.+)', 'operations.get', 'get_operation'),
+    ('cloudresourcemanager', 'GET', r'v3/projects', 'projects.list', 'list_projects'),
+    ('cloudresourcemanager', 'GET', r'v3/projects:search', 'projects.search', 'search_projects'),
+    ('cloudresourcemanager', 'POST', r'v3/projects', 'projects.create', 'create_project'),
+    ('cloudresourcemanager', 'GET', rf'v3/projects/{_ID}', 'projects.get', 'get_project'),
+    ('cloudresourcemanager', 'PATCH', rf'v3/projects/{_ID}', 'projects.patch', 'patch_project'),
+    ('cloudresourcemanager', 'DELETE', rf'v3/projects/{_ID}', 'projects.delete', 'delete_project'),
+    ('cloudresourcemanager', 'POST', rf'v3/{_RESOURCE}:getIamPolicy', '{kind}.getIamPolicy', 'get_iam_policy'),
+    ('cloudresourcemanager', 'POST', rf'v3/{_RESOURCE}:setIamPolicy', '{kind}.setIamPolicy', 'set_iam_policy'),
+    ('cloudbilling', 'GET', rf'v1/projects/{_ID}/billingInfo', 'projects.getBillingInfo', 'get_billing_info'),
+    ('cloudbilling', 'PUT', rf'v1/projects/{_ID}/billingInfo', 'projects.updateBillingInfo', 'update_billing_info'),
+    ('billingbudgets', 'GET', rf'v1/billingAccounts/{_ID}/budgets', 'billingAccounts.budgets.list', 'list_budgets'),
+    ('billingbudgets', 'POST', rf'v1/billingAccounts/{_ID}/budgets', 'billingAccounts.budgets.create', 'create_budget'),
+    ('billingbudgets', 'GET', rf'v1/billingAccounts/{_ID}/budgets/(?P<budget>[^/:]+)', 'billingAccounts.budgets.get', 'get_budget'),
+    ('billingbudgets', 'PATCH', rf'v1/billingAccounts/{_ID}/budgets/(?P<budget>[^/:]+)', 'billingAccounts.budgets.patch', 'patch_budget'),
+    ('billingbudgets', 'DELETE', rf'v1/billingAccounts/{_ID}/budgets/(?P<budget>[^/:]+)', 'billingAccounts.budgets.delete', 'delete_budget'),
+    ('serviceusage', 'GET', rf'v1/projects/{_ID}/services', 'services.list', 'list_services'),
+    ('serviceusage', 'POST', rf'v1/projects/{_ID}/services:batchEnable', 'services.batchEnable', 'batch_enable'),
+    ('serviceusage', 'POST', rf'v1/projects/{_ID}/services/(?P<service>[^/:]+):enable', 'services.enable', 'enable_service'),
+    ('serviceusage', 'GET', r'v1/operations/(?P<id>.+)', 'operations.get', 'get_operation'),
+    ('orgpolicy', 'GET', rf'v2/{_RESOURCE}/policies', '{kind}.policies.list', 'list_org_policies'),
+    ('orgpolicy', 'POST', rf'v2/{_RESOURCE}/policies', '{kind}.policies.create', 'create_org_policy'),
+    ('orgpolicy', 'GET', rf'v2/{_RESOURCE}/policies/(?P<constraint>.+)', '{kind}.policies.get', 'get_org_policy'),
+    ('orgpolicy', 'PATCH', rf'v2/{_RESOURCE}/policies/(?P<constraint>.+)', '{kind}.policies.patch', 'patch_org_policy'),
+    ('orgpolicy', 'DELETE', rf'v2/{_RESOURCE}/policies/(?P<constraint>.+)', '{kind}.policies.delete', 'delete_org_policy'),
+]
+_COMPILED_ROUTES = [(service, verb, re.compile(pattern), api_method, handler)
+                    for service, verb, pattern, api_method, handler in ROUTES]
+
+
+def route(verb, path):
+    """Maps an HTTP method and path to (API method, handler name, path arguments)."""
+    service, _, rest = path.lstrip('/').partition('/')
+    for route_service, route_verb, pattern, api_method, handler in _COMPILED_ROUTES:
+        if route_service != service or route_verb != verb:
+            continue
+        match = pattern.fullmatch(rest)
+        if match:
+            args = match.groupdict()
+            return f"{service}.{api_method.format(**args)}", handler, list(args.values())
+    raise EmulatorError(404, f"No emulated method for {verb} {path}")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; with Nagle's algorithm on,
+    # every keep-alive response would stall on the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self):
+        emulator = self.server.emulator
+        parsed = urllib.parse.urlsplit(self.path)
+        path = urllib.parse.unquote(parsed.path)
+        params = dict(urllib.parse.parse_qsl(parsed.query))
+        length = int(self.headers.get('Content-Length') or 0)
+        retry_after = None
+        try:
+            body = _camel_case(json.loads(self.rfile.read(length) or b'{}'))
+            api_method, handler, args = route(self.command, path)
+            payload, delay = emulator.dispatch(api_method, handler, params, body, args)
+            status = 200
+        except DropConnection:
+            self.close_connection = True
+            return
+        except EmulatorError as e:
+            status, payload, retry_after = e.status, e.payload(), e.retry_after
+            delay = emulator.latency_for(e.api_method) if e.api_method else 0
+        except ValueError as e:
+            status, payload, delay = 400, EmulatorError(400, f"Invalid JSON payload: {e}").payload(), 0
+        if delay:
+            time.sleep(delay)
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(data)))
+        if retry_after is not None:
+            self.send_header('Retry-After', str(max(1, int(retry_after + 0.5))))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+
+class Emulator:
+    """Runs the emulated APIs on a local port in a background thread.
+
+    Use as a context manager, or call start() and stop(). `url` is the base
+    URL to pass to main.build_service_clients(credentials, emulator_url=...).
+    """
+
+    def __init__(self, settings=None, host='127.0.0.1', port=0):
+        self.settings = settings or EmulatorSettings()
+        self.state = EmulatorState(self.settings)
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.emulator = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def latency_for(self, api_method):
+        jitter = self.settings.latency_jitter
+        return _lookup(self.settings.latency, api_method) + (self.state._rand.uniform(0, jitter) if jitter else 0)
+
+    def dispatch(self, api_method, handler, params, body, args):
+        """Runs one call against the state; returns (payload, response delay)."""
+        now = time.monotonic()
+        with self.state.lock:
+            delay = self.latency_for(api_method)
+            try:
+                failure = self.state.admit(api_method, now)
+                self.state.settle(now)
+                payload = getattr(self.state, handler)(now, params, body, *args)
+                if failure is not None:
+                    raise failure
+            except EmulatorError as e:
+                e.api_method = api_method
+                raise
+            payload = {k: v for k, v in payload.items() if not k.startswith('_')}
+        return payload, delay
+
+    def call_counts(self):
+        """Returns {api_method: calls received}, including failed calls."""
+        with self.state.lock:
+            return dict(self.state.calls)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='api-emulator', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve emulated Resource Manager, Billing, Service Usage and Org Policy APIs.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8085)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response.")
+    parser.add_argument('--latency-jitter', type=float, default=0.0, help="Up to this many extra seconds, at random.")
+    parser.add_argument('--operation-duration', type=float, default=0.0, help="Seconds before an operation is done.")
+    parser.add_argument('--organization', action='append', help="Organization ID to serve (repeatable).")
+    args = parser.parse_args(argv)
+
+    from src import config
+    settings = EmulatorSettings(latency=args.latency, latency_jitter=args.latency_jitter,
+                                operation_duration=args.operation_duration,
+                                quotas=dict(config.API_RATE_LIMITS_PER_MINUTE),
+                                organizations=args.organization or [DEFAULT_ORGANIZATION_ID])
+    emulator = Emulator(settings, args.host, args.port)
+    print(f"Emulating Google Cloud APIs at {emulator.url} for {', '.join(settings.organizations)}")
+    try:
+        emulator._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator._server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""Bounded-concurrency engine used to provision many projects at once.
+
+The Google API client objects returned by `build()` sit on top of httplib2,
+which is not thread-safe. Every worker thread therefore gets its own set of
+clients from a factory instead of sharing the ones built by the CLI.
+"""
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+
+from src import config
+
+STATUS_CREATED = 'created'
+STATUS_SKIPPED = 'skipped'
+STATUS_FAILED = 'failed'
+
+
+@dataclass
+class ProvisioningResult:
+    """Outcome of provisioning a single CSV row."""
+    row_number: int
+    key: str
+    project_id: str = None
+    status: str = STATUS_CREATED
+    error: str = None
+    elapsed: float = 0.0
+
+
+@dataclass
+class ProvisioningSummary:
+    """Aggregated outcome of a provisioning run."""
+    results: list = field(default_factory=list)
+    elapsed: float = 0.0
+    # ConflictDecision for every project ID that was already taken
+    conflicts: list = field(default_factory=list)
+
+    def count(self, status):
+        return sum(1 for result in self.results if result.status == status)
+
+    @property
+    def created(self):
+        return self.count(STATUS_CREATED)
+
+    @property
+    def skipped(self):
+        return self.count(STATUS_SKIPPED)
+
+    @property
+    def failed(self):
+        return self.count(STATUS_FAILED)
+
+    def failures(self):
+        return [result for result in self.results if result.status == STATUS_FAILED]
+
+
+class ThreadLocalClients:
+    """Hands each thread its own service clients, built once per thread.
+
+    When the factory is a ClientPool (anything with `release`), `release_all`
+    hands the clients back to it so that a later run reuses their connections.
+    """
+
+    def __init__(self, client_factory):
+        self._client_factory = client_factory
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._handed_out = []
+
+    def get(self):
+        clients = getattr(self._local, 'clients', None)
+        if clients is None:
+            clients = self._client_factory()
+            self._local.clients = clients
+            with self._lock:
+                self._handed_out.append(clients)
+        return clients
+
+    def release_all(self):
+        release = getattr(self._client_factory, 'release', None)
+        with self._lock:
+            handed_out, self._handed_out = self._handed_out, []
+            self._local = threading.local()
+        if release is not None:
+            for clients in handed_out:
+                release(clients)
+
+
+class ProvisioningEngine:
+    """Runs a worker over many tasks with a bounded number of threads.
+
+    `worker(payload, clients)` returns the provisioned project ID, or None
+    when the row was skipped. Exceptions are captured in the row's result
+    instead of aborting the run.
+
+    Without a `client_factory` the engine cannot give each thread its own
+    clients, so it falls back to running sequentially on `shared_clients`.
+    """
+
+    def __init__(self, max_workers=None, client_factory=None, shared_clients=None):
+        if max_workers is None:
+            max_workers = config.PROVISIONING_MAX_WORKERS
+        if client_factory is None:
+            max_workers = 1
+        self.max_workers = max(1, int(max_workers))
+        self.shared_clients = shared_clients
+        self._thread_clients = ThreadLocalClients(client_factory) if client_factory else None
+
+    def _clients(self):
+        if self._thread_clients is not None:
+            return self._thread_clients.get()
+        return self.shared_clients
+
+    def _run_task(self, row_number, key, payload, worker):
+        result = ProvisioningResult(row_number=row_number, key=key)
+        start = time.monotonic()
+        try:
+            project_id = worker(payload, self._clients())
+            result.project_id = project_id
+            result.status = STATUS_CREATED if project_id else STATUS_SKIPPED
+        except Exception as e:
+            result.status = STATUS_FAILED
+            result.error = str(e)
+        result.elapsed = time.monotonic() - start
+        return result
+
+    def run(self, tasks, worker):
+        """Runs `worker` over `tasks`, an iterable of (row_number, key, payload).
+
+        `tasks` is consumed lazily: at most twice `max_workers` tasks are
+        queued at any time, so the engine itself holds no more than that.
+        (CSV provisioning still loads its rows first, to allocate project IDs.)
+        """
+        summary = ProvisioningSummary()
+        start = time.monotonic()
+        try:
+            if self.max_workers == 1:
+                for row_number, key, payload in tasks:
+                    summary.results.append(self._run_task(row_number, key, payload, worker))
+            else:
+                self._run_concurrently(tasks, worker, summary)
+        finally:
+            # Hand leased clients (and their connections) back, in sequential runs too
+            if self._thread_clients is not None:
+                self._thread_clients.release_all()
+
+        summary.results.sort(key=lambda result: result.row_number)
+        summary.elapsed = time.monotonic() - start
+        return summary
+
+    def _run_concurrently(self, tasks, worker, summary):
+        max_pending = self.max_workers * 2
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='provision')
+        pending = set()
+        try:
+            for row_number, key, payload in tasks:
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    summary.results.extend(future.result() for future in done)
+                # Workers see the caller's context variables (e.g. main.quiet_output)
+                pending.add(executor.submit(contextvars.copy_context().run, self._run_task, row_number, key, payload, worker))
+            done, pending = wait(pending)
+            summary.results.extend(future.result() for future in done)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+        finally:
+            executor.shutdown(wait=True)
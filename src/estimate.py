@@ -0,0 +1,119 @@
+"""API call and wall-time estimates for planned runs.
+
+A dry run lists the mutations a run would make. An Estimator turns them into
+per-method call counts and a wall-time estimate, so concurrency can be sized
+and a run scheduled before an event.
+
+A run is a sequence of phases (e.g. listing a folder, then provisioning its
+rows). Each phase does the same calls for each of its `items`, spread over
+`workers` threads, and takes the longer of two bounds:
+
+* concurrency: ceil(items / workers) times the critical path of one item, the
+  latencies of the calls it waits on in sequence plus the durations of the
+  long-running operations among them;
+* quota: per rate-limit surface (see src/ratelimit.py), the calls beyond the
+  bucket's burst at config.API_RATE_LIMITS_PER_MINUTE.
+
+Latencies are the p50 seen by src/metrics.py in this session where a method
+has been called, else config.ESTIMATE_LATENCY_SECONDS. Operation durations
+come from config.ESTIMATE_OPERATION_SECONDS, and their polls follow
+config.OPERATION_POLL_*; polls shared by concurrent rows (OperationTracker)
+make the real count lower.
+"""
+import fnmatch
+import math
+from dataclasses import dataclass, field
+
+from src import config
+from src.ratelimit import BURST_SECONDS, surface_for
+
+BOUND_CONCURRENCY = 'concurrency'
+
+
+def _lookup(settings, api_method):
+    """Resolves a {method or glob: seconds} setting; the longest matching glob wins."""
+    if api_method in settings:
+        return float(settings[api_method])
+    matches = [pattern for pattern in settings if fnmatch.fnmatchcase(api_method, pattern)]
+    return float(settings[max(matches, key=len)]) if matches else 0.0
+
+
+def operation_polls(seconds):
+    """Number of operations.get calls until an operation taking `seconds` is seen done."""
+    interval = config.OPERATION_POLL_INITIAL_INTERVAL
+    waited, polls = 0.0, 1
+    while waited < seconds:
+        waited += interval
+        polls += 1
+        interval = min(interval * config.OPERATION_POLL_MULTIPLIER, config.OPERATION_POLL_MAX_INTERVAL)
+    return polls
+
+
+def observed_latencies(registry):
+    """Returns {api_method: p50 seconds} for every method `registry` (a Metrics) has seen."""
+    return {method: p50 for method, calls, _, _, p50, _, _ in registry.call_summary() if calls}
+
+
+@dataclass
+class Estimate:
+    """Expected API calls of a run, per method, and its expected duration."""
+    calls: dict = field(default_factory=dict)
+    wall_seconds: float = 0.0
+    # Per phase: (name, seconds, what bounds it: BOUND_CONCURRENCY or a rate-limit surface)
+    phases: list = field(default_factory=list)
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
+
+
+class Estimator:
+    """Accumulates the phases of a planned run; see the module docstring."""
+
+    def __init__(self, latencies=None, operation_seconds=None, limits=None):
+        self.latencies = dict(config.ESTIMATE_LATENCY_SECONDS)
+        self.latencies.update(latencies or {})
+        self.operation_seconds = config.ESTIMATE_OPERATION_SECONDS if operation_seconds is None else operation_seconds
+        self.limits = config.API_RATE_LIMITS_PER_MINUTE if limits is None else limits
+        self.estimate = Estimate()
+
+    def latency(self, api_method):
+        return _lookup(self.latencies, api_method)
+
+    def add_phase(self, name, calls, items=1, workers=1, critical_path=None):
+        """Adds a phase making `calls` ({api_method: count}) for each of `items`.
+
+        `critical_path` lists the methods one item waits on in sequence; by
+        default all of `calls`. A method with an operation duration also
+        waits for, and polls, its long-running operation.
+        """
+        if not items:
+            return
+        calls = {method: count for method, count in calls.items() if count}
+        critical_path = list(calls) if critical_path is None else critical_path
+        per_item = dict(calls)
+        path_seconds = 0.0
+        for method, count in calls.items():
+            duration = _lookup(self.operation_seconds, method)
+            if duration:
+                polls_method = f"{method.split('.', 1)[0]}.operations.get"
+                per_item[polls_method] = per_item.get(polls_method, 0) + count * operation_polls(duration)
+        for method in critical_path:
+            path_seconds += self.latency(method) * calls.get(method, 1) + _lookup(self.operation_seconds, method)
+
+        seconds, bound = math.ceil(items / max(1, workers)) * path_seconds, BOUND_CONCURRENCY
+        surfaces = {}
+        for method, count in per_item.items():
+            surface = surface_for(method, self.limits)
+            if surface in self.limits:
+                surfaces[surface] = surfaces.get(surface, 0) + count * items
+        for surface, count in surfaces.items():
+            rate = self.limits[surface]
+            quota_seconds = max(0.0, count - rate / 60 * BURST_SECONDS) * 60 / rate
+            if quota_seconds > seconds:
+                seconds, bound = quota_seconds, surface
+
+        for method, count in per_item.items():
+            self.estimate.calls[method] = self.estimate.calls.get(method, 0) + count * items
+        self.estimate.wall_seconds += seconds
+        self.estimate.phases.append((name, seconds, bound))
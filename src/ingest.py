@@ -0,0 +1,183 @@
+"""Streaming, validating readers for the attendees and teams CSV files.
+
+Files are read row by row and never loaded whole, so registration exports
+with 100k rows are handled in constant memory apart from the duplicate
+check, which keeps an 8-byte digest per distinct key instead of the key
+itself. Bad rows are collected into an IngestReport rather than raising
+mid-stream, so every problem in a file can be reported before provisioning
+starts.
+
+Attendees file: an `email` column. Teams file: `team_name` and
+`team_members` columns, with members separated by `|`.
+"""
+import csv
+import hashlib
+import re
+from dataclasses import dataclass, field
+
+ATTENDEE_COLUMNS = ('email',)
+TEAM_COLUMNS = ('team_name', 'team_members')
+MEMBER_SEPARATOR = '|'
+
+_EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+
+class CsvValidationError(Exception):
+    """Raised when a CSV file has invalid rows and provisioning must not start."""
+
+    def __init__(self, path, report):
+        super().__init__(f"{path} has {len(report.errors)} invalid rows.")
+        self.path = path
+        self.report = report
+
+
+@dataclass
+class RowError:
+    row_number: int
+    message: str
+
+
+@dataclass
+class IngestReport:
+    """What a pass over a CSV file found."""
+    rows: int = 0
+    valid: int = 0
+    duplicates: int = 0
+    errors: list = field(default_factory=list)
+
+    @property
+    def ok(self):
+        return not self.errors
+
+
+class SeenSet:
+    """Set membership over 64-bit digests, so memory does not grow with key length."""
+
+    def __init__(self):
+        self._digests = set()
+
+    def add(self, key):
+        """Adds `key` and returns True if it had been added before."""
+        digest = int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+        if digest in self._digests:
+            return True
+        self._digests.add(digest)
+        return False
+
+    def __len__(self):
+        return len(self._digests)
+
+
+def normalize_email(email):
+    """Strips and lowercases an email address; raises ValueError if it is not one."""
+    normalized = email.strip().lower()
+    if not _EMAIL_RE.match(normalized):
+        raise ValueError(f"invalid email address '{email.strip()}'")
+    return normalized
+
+
+def read_header(header, required_columns, report):
+    """Returns the normalized column names of a header row, or None (recorded in `report`) if columns are missing."""
+    columns = [column.strip().lower() for column in header or []]
+    missing = [column for column in required_columns if column not in columns]
+    if missing:
+        report.errors.append(RowError(1, f"missing required column(s): {', '.join(missing)}"))
+        return None
+    return columns
+
+
+def iter_values(reader, columns, report, first_row_number=2):
+    """Yields (row_number, {column: value}) for each non-blank row of a csv.reader past the header."""
+    for row_number, row in enumerate(reader, start=first_row_number):
+        if not any(value.strip() for value in row):
+            continue
+        report.rows += 1
+        if len(row) > len(columns) and any(value.strip() for value in row[len(columns):]):
+            report.errors.append(RowError(row_number, f"expected {len(columns)} columns, found {len(row)} "
+                                                      f"(separate team members with '{MEMBER_SEPARATOR}')"))
+            continue
+        yield row_number, dict(zip(columns, row))
+
+
+def _iter_rows(path, required_columns, report):
+    """Yields (row_number, {column: value}) for each non-blank data row."""
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        columns = read_header(next(reader, None), required_columns, report)
+        if columns is None:
+            return
+        yield from iter_values(reader, columns, report)
+
+
+def iter_attendees(path, report=None):
+    """Yields (row_number, email) for each valid, first-seen attendee.
+
+    Invalid and duplicate rows are skipped and recorded in `report`.
+    """
+    report = report if report is not None else IngestReport()
+    yield from attendees_from_values(_iter_rows(path, ATTENDEE_COLUMNS, report), report)
+
+
+def attendees_from_values(values_iter, report, seen=None):
+    """iter_attendees over (row_number, {column: value}) pairs, e.g. rows appended to a watched file.
+
+    Pass the same SeenSet across calls to skip duplicates between them.
+    """
+    seen = seen if seen is not None else SeenSet()
+    for row_number, values in values_iter:
+        try:
+            email = normalize_email(values.get('email', ''))
+        except ValueError as e:
+            report.errors.append(RowError(row_number, str(e)))
+            continue
+        if seen.add(email):
+            report.duplicates += 1
+            continue
+        report.valid += 1
+        yield row_number, email
+
+
+def iter_teams(path, report=None):
+    """Yields (row_number, team_name, members) for each valid, first-seen team.
+
+    Member lists are normalized and deduplicated. Invalid rows and repeated
+    team names are skipped and recorded in `report`.
+    """
+    report = report if report is not None else IngestReport()
+    seen = SeenSet()
+    for row_number, values in _iter_rows(path, TEAM_COLUMNS, report):
+        team_name = (values.get('team_name') or '').strip()
+        if not team_name:
+            report.errors.append(RowError(row_number, "empty team_name"))
+            continue
+        members = []
+        problems = []
+        for member in (values.get('team_members') or '').split(MEMBER_SEPARATOR):
+            if not member.strip():
+                continue
+            try:
+                email = normalize_email(member)
+            except ValueError as e:
+                problems.append(str(e))
+                continue
+            if email not in members:
+                members.append(email)
+        if problems:
+            report.errors.append(RowError(row_number, f"team '{team_name}': {'; '.join(problems)}"))
+            continue
+        if not members:
+            report.errors.append(RowError(row_number, f"team '{team_name}' has no members"))
+            continue
+        if seen.add(team_name.lower()):
+            report.duplicates += 1
+            continue
+        report.valid += 1
+        yield row_number, team_name, members
+
+
+def validate_file(path, reader):
+    """Runs a full streaming pass of `reader` (iter_attendees or iter_teams) and returns its report."""
+    report = IngestReport()
+    for _ in reader(path, report):
+        pass
+    return report
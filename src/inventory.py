@@ -0,0 +1,68 @@
+"""Pre-flight diff of CSV rows against the projects that already exist.
+
+Before anything is mutated, the target folder's projects are listed once
+into an index keyed by project ID. Every CSV row is then classified as
+`create` (no such project yet), `repair` (the project exists but the journal
+shows unfinished steps) or `skip` (nothing to do, or the ID cannot be used),
+so re-runs no longer discover existing projects through 409 responses.
+"""
+from dataclasses import dataclass, field
+
+from src.journal import STEPS
+
+ACTION_CREATE = 'create'
+ACTION_REPAIR = 'repair'
+ACTION_SKIP = 'skip'
+ACTIONS = (ACTION_CREATE, ACTION_REPAIR, ACTION_SKIP)
+
+
+@dataclass
+class ProjectRow:
+    """One CSV row resolved to the project it should produce."""
+    row_number: int
+    key: str
+    project_id: str
+    project_name: str
+    members: list
+    action: str = ACTION_CREATE
+    reason: str = ''
+
+
+@dataclass
+class ProvisioningPlan:
+    """Planned action for every CSV row, in file order."""
+    rows: list = field(default_factory=list)
+    # src.estimate.Estimate of the run, once computed
+    estimate: object = None
+
+    def count(self, action):
+        return sum(1 for row in self.rows if row.action == action)
+
+    def counts(self):
+        return {action: self.count(action) for action in ACTIONS}
+
+
+def plan_rows(rows, index, kind, journal=None):
+    """Classifies `rows` (ProjectRow objects) against an inventory `index`.
+
+    `index` maps project ID to the project resource returned by
+    projects.list. A row whose journal record carries a different project ID
+    (e.g. one retried with a suffix) is planned against that ID instead.
+    """
+    plan = ProvisioningPlan()
+    for row in rows:
+        entry = journal.entry(kind, row.key) if journal is not None else None
+        if entry is not None and entry.project_id:
+            row.project_id = entry.project_id
+        project = index.get(row.project_id)
+        if project is None:
+            row.action, row.reason = ACTION_CREATE, 'not found in target folder'
+        elif project.get('state', 'ACTIVE') != 'ACTIVE':
+            row.action, row.reason = ACTION_SKIP, f"project is {project['state']}"
+        elif entry is not None and entry.exists and not entry.is_complete():
+            unfinished = [step for step in STEPS if not entry.is_done(step)]
+            row.action, row.reason = ACTION_REPAIR, f"unfinished steps: {', '.join(unfinished)}"
+        else:
+            row.action, row.reason = ACTION_SKIP, 'already exists'
+        plan.rows.append(row)
+    return plan
@@ -0,0 +1,158 @@
+"""SQLite-backed journal of provisioning progress.
+
+Every CSV row gets one journal record keyed by (kind, row key), where kind is
+'attendee' or 'team' and the row key is the attendee email or team name. The
+record holds the project ID, the create operation name and one flag per
+provisioning step, committed as soon as the step finishes, so an interrupted
+run can be resumed and only redo the steps that never completed.
+"""
+import sqlite3
+import threading
+import time
+
+KIND_ATTENDEE = 'attendee'
+KIND_TEAM = 'team'
+
+STEP_CREATED = 'created'
+STEP_BILLING_LINKED = 'billing_linked'
+STEP_IAM_SET = 'iam_set'
+STEP_APIS_ENABLED = 'apis_enabled'
+STEPS = (STEP_CREATED, STEP_BILLING_LINKED, STEP_IAM_SET, STEP_APIS_ENABLED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    kind TEXT NOT NULL,
+    row_key TEXT NOT NULL,
+    project_id TEXT,
+    create_operation TEXT,
+    created INTEGER NOT NULL DEFAULT 0,
+    billing_linked INTEGER NOT NULL DEFAULT 0,
+    iam_set INTEGER NOT NULL DEFAULT 0,
+    apis_enabled INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    updated_at REAL,
+    PRIMARY KEY (kind, row_key)
+)
+"""
+
+
+def _check_step(step):
+    if step not in STEPS:
+        raise ValueError(f"Unknown provisioning step: {step}")
+
+
+class ProvisioningJournal:
+    """Durable per-row provisioning state, safe to share between threads."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            if path != ':memory:':
+                self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get(self, kind, row_key):
+        """Returns the record for a row as a dict, or None if it was never seen."""
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM rows WHERE kind = ? AND row_key = ?', (kind, row_key)).fetchone()
+        return dict(row) if row else None
+
+    def entry(self, kind, row_key):
+        """Returns a JournalEntry bound to one row."""
+        return JournalEntry(self, kind, row_key, self.get(kind, row_key))
+
+    def update(self, kind, row_key, **fields):
+        """Creates or updates a row's record with the given column values."""
+        fields['updated_at'] = time.time()
+        columns = ', '.join(fields)
+        placeholders = ', '.join('?' for _ in fields)
+        assignments = ', '.join(f'{column} = excluded.{column}' for column in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f'INSERT INTO rows (kind, row_key, {columns}) VALUES (?, ?, {placeholders}) '
+                f'ON CONFLICT (kind, row_key) DO UPDATE SET {assignments}',
+                (kind, row_key, *fields.values()))
+
+    def records(self, kind=None):
+        """Returns all records, optionally only those of one kind."""
+        with self._lock:
+            if kind is None:
+                rows = self._conn.execute('SELECT * FROM rows ORDER BY kind, row_key').fetchall()
+            else:
+                rows = self._conn.execute('SELECT * FROM rows WHERE kind = ? ORDER BY row_key', (kind,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def status(self, kind=None):
+        """Returns (total, complete, with_error) record counts."""
+        records = self.records(kind)
+        complete = sum(1 for record in records if all(record[step] for step in STEPS))
+        with_error = sum(1 for record in records if record['last_error'])
+        return len(records), complete, with_error
+
+    def reset(self, kind=None):
+        """Forgets all records, or only those of one kind."""
+        with self._lock, self._conn:
+            if kind is None:
+                self._conn.execute('DELETE FROM rows')
+            else:
+                self._conn.execute('DELETE FROM rows WHERE kind = ?', (kind,))
+
+
+class JournalEntry:
+    """Checkpoint handle for one CSV row, passed to create_project."""
+
+    def __init__(self, journal, kind, row_key, record=None):
+        self.journal = journal
+        self.kind = kind
+        self.row_key = row_key
+        self._record = record or {}
+
+    @property
+    def exists(self):
+        """True if the row has been recorded by an earlier run."""
+        return bool(self._record)
+
+    @property
+    def project_id(self):
+        return self._record.get('project_id')
+
+    @property
+    def create_operation(self):
+        return self._record.get('create_operation')
+
+    def is_done(self, step):
+        _check_step(step)
+        return bool(self._record.get(step))
+
+    def is_complete(self):
+        return all(self.is_done(step) for step in STEPS)
+
+    def _update(self, **fields):
+        self.journal.update(self.kind, self.row_key, **fields)
+        self._record.update(fields)
+
+    def record_create(self, project_id, operation_name):
+        """Records that project creation was requested, before waiting on it."""
+        self._update(project_id=project_id, create_operation=operation_name, last_error=None)
+
+    def record_adopted(self, project_id):
+        """Records that an existing project was adopted for this row instead of created."""
+        self._update(project_id=project_id, create_operation=None, last_error=None, **{STEP_CREATED: 1})
+
+    def clear_create(self):
+        """Forgets a failed create operation so the next run requests a new one."""
+        self._update(create_operation=None)
+
+    def mark_done(self, step):
+        _check_step(step)
+        self._update(**{step: 1, 'last_error': None})
+
+    def record_error(self, error):
+        self._update(last_error=str(error))
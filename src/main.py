@@ -1,14 +1,35 @@
 import argparse
-import csv
+import contextlib
+import contextvars
 import google.auth
+import math
 import time
-from googleapiclient.discovery import build
 from src import config
-import google.oauth2.id_token
-import google.auth.transport.requests
 import re
-import os
+import threading
 from googleapiclient.errors import HttpError
+from src.api import execute, metrics, rate_limiter, retry_policy
+from src.clients import ClientPool
+from src.allocator import allocate_project_ids
+from src.conflicts import ConflictResolver, DECISION_ADOPTED, DECISION_RENAMED, DECISION_SKIPPED, DECISION_GAVE_UP, STRATEGY_SUFFIX, suffixed_id
+from src.discovery import LazyClient, build_client
+from src.engine import ProvisioningEngine
+from src.estimate import Estimator, observed_latencies
+from src.operations import OperationTracker, OperationError, poll_operation, poll_operations
+from src.ingest import (
+    ATTENDEE_COLUMNS, IngestReport, attendees_from_values, iter_attendees, iter_teams, normalize_email,
+    CsvValidationError,
+)
+from src.inventory import ProjectRow, plan_rows, ACTION_CREATE, ACTION_REPAIR, ACTION_SKIP
+from src import budgets
+from src import orgpolicy
+from src.steps import Step, run_steps
+from src.teardown import TeardownPlan, TeardownReport
+from src.watch import CsvTail, WatchCursor
+from src.warmpool import ProjectPool, LABEL_POOL, POOL_PENDING, POOL_READY, POOL_ASSIGNED, pool_project_id
+from src.journal import (
+    KIND_ATTENDEE, KIND_TEAM, STEPS, STEP_CREATED, STEP_BILLING_LINKED, STEP_IAM_SET, STEP_APIS_ENABLED,
+)
 
 # ANSI escape codes for colors
 class Colors:
@@ -20,7 +41,21 @@ class Colors:
     MAGENTA = '\033[95m'
     CYAN = '\033[96m'
 
+# Set by quiet_output(); hides progress output, but not warnings and errors
+_quiet = contextvars.ContextVar('quiet', default=False)
+
+@contextlib.contextmanager
+def quiet_output():
+    """Hides success, info and debug messages printed by the enclosed code, e.g. a background refill."""
+    token = _quiet.set(True)
+    try:
+        yield
+    finally:
+        _quiet.reset(token)
+
 def print_success(message):
+    if _quiet.get():
+        return
     print(f"{Colors.GREEN}{message}{Colors.RESET}")
 
 def print_error(message):
@@ -30,11 +65,20 @@ def print_warning(message):
     print(f"{Colors.YELLOW}{message}{Colors.RESET}")
 
 def print_info(message):
+    if _quiet.get():
+        return
     print(f"{Colors.CYAN}{message}{Colors.RESET}")
 
 def print_debug(message):
+    if _quiet.get():
+        return
     print(f"{Colors.MAGENTA}{message}{Colors.RESET}")
 
+def _print_retry(api_method, attempt, delay, error):
+    print_warning(f"Transient error from {api_method} ({error}); retry {attempt} in {delay:.1f}s...")
+
+retry_policy.on_retry = _print_retry
+
 def sanitize_project_id_part(part, max_len = 30):
     """Sanitizes a string part for use in a GCP project ID.
     Converts to lowercase, replaces non-alphanumeric (except hyphen) with hyphen,
@@ -91,233 +135,672 @@ def sanitize_display_name(name, max_len = 30):
 
     return sanitized
 
+class UserEmail:
+    """The signed-in user's email, looked up with oauth2 userinfo on first str(), not at startup."""
+
+    def __init__(self, credentials):
+        self._credentials = credentials
+        self._email = None
+        self._lock = threading.Lock()
+
+    def _lookup(self):
+        credentials = self._credentials
+        try:
+            oauth2_service = build_client('oauth2', 'v2', credentials)
+            user_info = execute(oauth2_service.userinfo().get(), 'oauth2.userinfo.get')
+            if user_info and 'email' in user_info:
+                return user_info['email']
+        except Exception as e:
+            print_warning(f"Warning: Could not retrieve user email from OAuth2 service: {e}")
+            if hasattr(credentials, 'service_account_email') and credentials.service_account_email:
+                return credentials.service_account_email
+            elif hasattr(credentials, 'quota_project_id') and credentials.quota_project_id:
+                return f"User Account (Project: {credentials.quota_project_id})"
+        return "Unknown User"
+
+    def __str__(self):
+        with self._lock:
+            if self._email is None:
+                self._email = self._lookup()
+            return self._email
+
 def get_credentials():
-    """Gets user credentials from the environment and returns them."""
+    """Gets user credentials from the environment; returns (credentials, UserEmail or description).
+
+    No API call is made here: the user's email is only looked up when the
+    returned UserEmail is first printed.
+    """
+    if config.EMULATOR_URL:
+        import google.auth.credentials
+        return google.auth.credentials.AnonymousCredentials(), f"Emulator ({config.EMULATOR_URL})"
     credentials, project_id = google.auth.default(scopes=['https://www.googleapis.com/auth/userinfo.email', 'https://www.googleapis.com/auth/cloud-platform'])
-    user_email = "Unknown User"
+    return credentials, UserEmail(credentials)
 
-    try:
-        oauth2_service = build('oauth2', 'v2', credentials=credentials)
-        user_info = oauth2_service.userinfo().get().execute()
-        if user_info and 'email' in user_info:
-            user_email = user_info['email']
-    except Exception as e:
-        print_warning(f"Warning: Could not retrieve user email from OAuth2 service: {e}")
-        if hasattr(credentials, 'service_account_email') and credentials.service_account_email:
-            user_email = credentials.service_account_email
-        elif hasattr(credentials, 'quota_project_id') and credentials.quota_project_id:
-            user_email = f"User Account (Project: {credentials.quota_project_id})"
+def _client_options(service, emulator_url):
+    if not emulator_url:
+        return None
+    return {'api_endpoint': f"{emulator_url.rstrip('/')}/{service}/"}
 
-    return credentials, user_email
+def build_service_clients(credentials, emulator_url=None, http=None):
+    """Returns the Resource Manager, Service Usage and Billing clients.
 
-    return credentials, user_email
+    Each client is built from a cached discovery document on first use. With
+    `emulator_url` (default config.EMULATOR_URL) the clients target a local
+    src.emulator instance instead of googleapis.com. With `http`, an authorized
+    transport or a (crm, serviceusage, billing) tuple of them, the clients use
+    those connections and `credentials` is not used.
+    """
+    emulator_url = emulator_url or config.EMULATOR_URL
+    https = http if isinstance(http, tuple) else (http,) * 3
+    if http is not None:
+        credentials = None
 
-def wait_for_operation(crm_v3, operation_name):
-    """Waits for a long-running operation to complete."""
-    print_info(f"Waiting for operation {operation_name} to complete...")
-    while True:
-        operation = crm_v3.operations().get(name=operation_name).execute()
-        if operation.get('done'):
-            print_success(f"Operation {operation_name} completed.")
-            if 'error' in operation:
-                print_error(f"Operation failed with error: {operation['error']}")
-                raise Exception(f"Operation {operation_name} failed.")
-            return operation
-        time.sleep(5) # Poll every 5 seconds
+    def lazy(service, version, http):
+        return LazyClient(lambda: build_client(service, version, credentials, _client_options(service, emulator_url), http=http))
+    return lazy('cloudresourcemanager', 'v3', https[0]), lazy('serviceusage', 'v1', https[1]), lazy('cloudbilling', 'v1', https[2])
 
-def init_project_folders(parent_id, crm_v3, debug_mode=False):
-    """Initializes and verifies the project folder structure."""
-    print_info(f"Initializing project folders under parent ID: {parent_id}...")
+def build_client_pool(credentials, emulator_url=None):
+    """Returns a ClientPool of build_service_clients() sets.
+
+    Each set gets a keep-alive transport per client, so a project's steps can
+    call the three APIs concurrently (see src/steps.py).
+    """
+    return ClientPool(credentials, lambda *https: build_service_clients(None, emulator_url, http=https), transports=3)
+
+def wait_for_operation(crm_v3, operation_name, tracker=None):
+    """Waits for a long-running operation to complete.
 
-    full_parent_path = None
-    # Try as an organization
+    With a shared OperationTracker the operation is polled together with all
+    other pending ones; otherwise it is polled on this thread with backoff.
+    """
+    print_info(f"Waiting for operation {operation_name} to complete...")
+    try:
+        with metrics.stage('operation_wait'):
+            if tracker is not None:
+                operation = tracker.wait(operation_name)
+            else:
+                operation = poll_operation(crm_v3, operation_name)
+    except OperationError as e:
+        print_error(f"Operation failed with error: {e.error}")
+        raise
+    print_success(f"Operation {operation_name} completed.")
+    return operation
+
+def _resolve_parent(parent_id, crm_v3):
+    """Returns 'organizations/<id>' or 'folders/<id>', whichever `parent_id` is."""
     try:
         # Attempt to get the organization to verify it exists and we have access
-        crm_v3.organizations().get(name=f"organizations/{parent_id}").execute()
-        full_parent_path = f"organizations/{parent_id}"
+        execute(crm_v3.organizations().get(name=f"organizations/{parent_id}"), 'cloudresourcemanager.organizations.get')
         print_success(f"Parent ID {parent_id} identified as an Organization.")
+        return f"organizations/{parent_id}"
     except Exception as e_org:
         # If not an organization, try as a folder
         try:
-            crm_v3.folders().get(name=f"folders/{parent_id}").execute()
-            full_parent_path = f"folders/{parent_id}"
+            execute(crm_v3.folders().get(name=f"folders/{parent_id}"), 'cloudresourcemanager.folders.get')
             print_success(f"Parent ID {parent_id} identified as a Folder.")
+            return f"folders/{parent_id}"
         except Exception as e_folder:
             raise Exception(f"Parent ID {parent_id} is neither a valid Organization nor Folder ID. "
                             f"Organization check error: {e_org}. Folder check error: {e_folder}")
 
-    if not full_parent_path:
-        raise Exception(f"Could not determine type of parent ID: {parent_id}")
-
-    # Now use full_parent_path for all subsequent operations
-    # Main Hackathon Playground Users Folder
-    main_folder_name = config.MAIN_FOLDER_NAME
-    main_folder_id = None
-    # Check if main folder exists
-    folders = crm_v3.folders().list(parent=full_parent_path).execute().get('folders', [])
-    for folder in folders:
-        if folder.get('displayName') == main_folder_name:
-            main_folder_id = folder.get('name').split('/')[1]
-            print_info(f"Found existing main folder: {main_folder_name} (ID: {main_folder_id})")
-            break
-
-    if not main_folder_id:
-        print_info(f"Creating main folder: {main_folder_name}...")
-        body = {'displayName': main_folder_name, 'parent': full_parent_path}
-        if debug_mode:
-            print_debug(f"DEBUG: API Payload for creating main folder: {body}")
-        operation = crm_v3.folders().create(body=body).execute()
-        operation_name = operation.get('name')
-        wait_for_operation(crm_v3, operation_name)
-        main_folder_id = crm_v3.operations().get(name=operation_name).execute().get('response').get('name').split('/')[1]
-        print_success(f"Created main folder: {main_folder_name} (ID: {main_folder_id})")
-
-    # Sub-folder for General Attendees
-    general_folder_name = config.GENERAL_FOLDER_NAME
-    general_folder_id = None
-    folders = crm_v3.folders().list(parent=f"folders/{main_folder_id}").execute().get('folders', [])
-    for folder in folders:
-        if folder.get('displayName') == general_folder_name:
-            general_folder_id = folder.get('name').split('/')[1]
-            print_info(f"Found existing general attendees folder: {general_folder_name} (ID: {general_folder_id})")
-            break
-
-    if not general_folder_id:
-        print_info(f"Creating general attendees folder: {general_folder_name}...")
-        body = {'displayName': general_folder_name, 'parent': f"folders/{main_folder_id}"}
-        if debug_mode:
-            print_debug(f"DEBUG: API Payload for creating general attendees folder: {body}")
-        operation = crm_v3.folders().create(body=body).execute()
-        operation_name = operation.get('name')
-        wait_for_operation(crm_v3, operation_name)
-        general_folder_id = crm_v3.operations().get(name=operation_name).execute().get('response').get('name').split('/')[1]
-        print_success(f"Created general attendees folder: {general_folder_name} (ID: {general_folder_id})")
-
-    # Sub-folder for Hackathon Teams-1
-    team1_folder_name = config.TEAM1_FOLDER_NAME
-    team1_folder_id = None
-    folders = crm_v3.folders().list(parent=f"folders/{main_folder_id}").execute().get('folders', [])
-    for folder in folders:
-        if folder.get('displayName') == team1_folder_name:
-            team1_folder_id = folder.get('name').split('/')[1]
-            print_info(f"Found existing hackathon teams-1 folder: {team1_folder_name} (ID: {team1_folder_id})")
-            break
-
-    if not team1_folder_id:
-        print_info(f"Creating hackathon teams-1 folder: {team1_folder_name}...")
-        body = {'displayName': team1_folder_name, 'parent': f"folders/{main_folder_id}"}
-        if debug_mode:
-            print_debug(f"DEBUG: API Payload for creating hackathon teams-1 folder: {body}")
-        operation = crm_v3.folders().create(body=body).execute()
-        operation_name = operation.get('name')
-        wait_for_operation(crm_v3, operation_name)
-        team1_folder_id = crm_v3.operations().get(name=operation_name).execute().get('response').get('name').split('/')[1]
-        print_success(f"Created hackathon teams folder: {team1_folder_name} (ID: {team1_folder_id})")
-
-    # Sub-folder for Hackathon Teams-2
-    team2_folder_name = config.TEAM2_FOLDER_NAME
-    team2_folder_id = None
-    folders = crm_v3.folders().list(parent=f"folders/{main_folder_id}").execute().get('folders', [])
-    for folder in folders:
-        if folder.get('displayName') == team2_folder_name:
-            team2_folder_id = folder.get('name').split('/')[1]
-            print_info(f"Found existing hackathon teams-2 folder: {team2_folder_name} (ID: {team2_folder_id})")
-            break
-
-    if not team2_folder_id:
-        print_info(f"Creating hackathon teams-2 folder: {team2_folder_name}...")
-        body = {'displayName': team2_folder_name, 'parent': f"folders/{main_folder_id}"}
-        if debug_mode:
-            print_debug(f"DEBUG: API Payload for creating hackathon teams-2 folder: {body}")
-        operation = crm_v3.folders().create(body=body).execute()
-        operation_name = operation.get('name')
-        wait_for_operation(crm_v3, operation_name)
-        team2_folder_id = crm_v3.operations().get(name=operation_name).execute().get('response').get('name').split('/')[1]
-        print_success(f"Created hackathon teams folder: {team2_folder_name} (ID: {team2_folder_id})")
-
-    print(main_folder_id, general_folder_id, team1_folder_id, team2_folder_id)
+def wait_for_operations(crm_v3, operation_names):
+    """Waits for several long-running operations at once; returns {name: operation}."""
+    print_info(f"Waiting for {len(operation_names)} operation(s) to complete...")
+    try:
+        with metrics.stage('operation_wait'):
+            operations = poll_operations(crm_v3, operation_names)
+    except OperationError as e:
+        print_error(f"Operation {e.operation_name} failed with error: {e.error}")
+        raise
+    print_success(f"{len(operations)} operation(s) completed.")
+    return operations
+
+@metrics.stage('folder_init')
+def init_project_folders(parent_id, crm_v3, debug_mode=False, tree=None, dry_run=False):
+    """Initializes and verifies the project folder structure.
+
+    The tree is config.FOLDER_TREE unless `tree` is given. It is built one
+    level at a time: the children of each parent are listed once, then every
+    missing folder of the level is created and all their operations are
+    awaited together. Returns {tree key: folder ID}.
+
+    With `dry_run` only reads are made: the folders that would be created are
+    printed with an estimate of the API calls and wall time, and their IDs
+    are None in the result.
+    """
+    tree = tree or config.FOLDER_TREE
+    print_info(f"Initializing project folders under parent ID: {parent_id}...")
+    paths = {None: _resolve_parent(parent_id, crm_v3)}
+    folder_ids = {}
+    remaining = dict(tree)
+    estimator = Estimator(observed_latencies(metrics)) if dry_run else None
+    planned = set()  # paths of folders a dry run would create
+    while remaining:
+        level = {key: spec for key, spec in remaining.items() if spec[1] in paths}
+        if not level:
+            raise Exception(f"Folder tree entries with unknown parents: {', '.join(remaining)}")
+        for key in level:
+            del remaining[key]
+
+        existing = {}
+        parent_paths = [path for path in dict.fromkeys(paths[parent_key] for _, parent_key in level.values()) if path not in planned]
+        for parent_path in parent_paths:
+            for folder in iter_pages(crm_v3.folders().list, 'cloudresourcemanager.folders.list', 'folders', parent=parent_path):
+                existing[(parent_path, folder.get('displayName'))] = folder['name']
+
+        creating = {}
+        for key, (display_name, parent_key) in level.items():
+            folder_name = existing.get((paths[parent_key], display_name))
+            if folder_name:
+                paths[key] = folder_name
+                folder_ids[key] = folder_name.split('/')[1]
+                print_info(f"Found existing folder: {display_name} (ID: {folder_ids[key]})")
+                continue
+            if dry_run:
+                paths[key] = f"{paths[parent_key]}/{display_name}"
+                planned.add(paths[key])
+                folder_ids[key] = None
+                creating[key] = None
+                print_warning(f"Would create folder: {display_name} under {tree[parent_key][0] if parent_key else paths[None]}")
+                continue
+            print_info(f"Creating folder: {display_name}...")
+            body = {'displayName': display_name, 'parent': paths[parent_key]}
+            if debug_mode:
+                print_debug(f"DEBUG: API Payload for creating folder {display_name}: {body}")
+            operation = execute(crm_v3.folders().create(body=body), 'cloudresourcemanager.folders.create')
+            creating[operation['name']] = (key, operation)
+
+        if dry_run:
+            estimator.add_phase(f"folder level {len(estimator.estimate.phases) + 1}",
+                                {'cloudresourcemanager.folders.list': len(parent_paths), 'cloudresourcemanager.folders.create': len(creating)})
+            continue
+        pending = [name for name, (_, operation) in creating.items() if not operation.get('done')]
+        finished = wait_for_operations(crm_v3, pending) if pending else {}
+        for operation_name, (key, operation) in creating.items():
+            operation = finished.get(operation_name, operation)
+            if 'error' in operation:
+                raise OperationError(operation_name, operation['error'])
+            paths[key] = operation['response']['name']
+            folder_ids[key] = paths[key].split('/')[1]
+            print_success(f"Created folder: {tree[key][0]} (ID: {folder_ids[key]})")
+
+    if dry_run:
+        print_estimate(estimator.estimate)
+        return {key: folder_ids[key] for key in tree}
     print_success("Folder initialization complete.")
-    return main_folder_id, general_folder_id, team1_folder_id, team2_folder_id
+    return {key: folder_ids[key] for key in tree}
 
 def main():
     pass
 
-def provision_playground_projects(attendees_file, crm_v3, serviceusage_v1, cloudbilling_v1, general_folder_id, debug_mode=False):
-    with open(attendees_file, 'r') as f:
-        reader = csv.reader(f)
-        next(reader)  # Skip header
-        for row in reader:
-            email = row[0]
-            email_prefix = email.split('@')[0]
-            # a random string with 5 chars long
-            random_string = os.urandom(3).hex() # Generates 6 random hex characters
-            project_id_suffix = "" # f"-{random_string}"
-            project_id = sanitize_project_id_part(f"{config.PLAYGROUND_PROJECT_ID_PREFIX}{email_prefix}{config.PLAYGROUND_PROJECT_ID_SUFFIX}{project_id_suffix}")
-            project_name = sanitize_display_name(f"{config.PLAYGROUND_PROJECT_NAME_PREFIX}{email_prefix}{config.PLAYGROUND_PROJECT_NAME_SUFFIX}")
-            print_info(f'Creating playground project for {email} with id {project_id} name {project_name}...')
-            create_project(project_id, project_name, email, crm_v3, serviceusage_v1, cloudbilling_v1, general_folder_id)
-
-def generate_random_suffix():
-    return os.urandom(3).hex() # Generates 6 random hex characters
-
-def create_project(project_id, project_name, user_email, crm_v3, serviceusage_v1, cloudbilling_v1, parent_folder_id, debug_mode=False):
+def print_provisioning_summary(summary):
+    """Prints the aggregated result of a provisioning run."""
+    print_info(f"Provisioned {len(summary.results)} rows in {summary.elapsed:.1f}s: "
+               f"{summary.created} created, {summary.skipped} skipped, {summary.failed} failed.")
+    for result in summary.failures():
+        print_error(f"  Row {result.row_number} ({result.key}): {result.error}")
+    if summary.conflicts:
+        print_warning(f"{len(summary.conflicts)} project IDs were already taken:")
+        for decision in summary.conflicts:
+            renamed = f" -> {decision.final_project_id}" if decision.final_project_id not in (None, decision.project_id) else ''
+            reason = f" ({decision.reason})" if decision.reason else ''
+            print_warning(f"  {decision.project_id}: {decision.decision}{renamed}{reason}")
+
+def print_metrics_summary(registry=metrics):
+    """Prints per-API-call and per-stage metrics as tables, slowest first."""
+    calls = registry.call_summary()
+    if not calls:
+        print_info("No API calls recorded yet.")
+        return
+    print_info(f"{'API method':<46}{'calls':>7}{'errors':>8}{'retries':>9}{'p50 s':>8}{'p95 s':>8}{'total s':>9}")
+    for method, count, errors, retries, p50, p95, total in calls:
+        line = f"{method:<46}{count:>7}{errors:>8}{retries:>9}{p50:>8.2f}{p95:>8.2f}{total:>9.1f}"
+        if errors:
+            print_warning(line)
+        else:
+            print_info(line)
+    for (method, error), count in sorted(registry.error_counts().items()):
+        print_warning(f"  {method}: {count} x {error}")
+    stages = registry.stage_summary()
+    if stages:
+        print_info(f"{'Stage':<46}{'runs':>7}{'failed':>8}{'':>9}{'p50 s':>8}{'p95 s':>8}{'total s':>9}")
+        for stage, runs, failures, p50, p95, total in stages:
+            line = f"{stage:<46}{runs:>7}{failures:>8}{'':>9}{p50:>8.2f}{p95:>8.2f}{total:>9.1f}"
+            if failures:
+                print_warning(line)
+            else:
+                print_info(line)
+
+def _journaled(checkpoint, func, *args):
+    """Calls func, recording any exception as the row's last error in the journal."""
+    try:
+        return func(*args)
+    except Exception as e:
+        if checkpoint is not None:
+            checkpoint.record_error(e)
+        raise
+
+def read_attendee_rows(attendees_file, report=None):
+    """Yields a ProjectRow for every valid, first-seen attendee of the CSV file."""
+    return attendee_project_rows(iter_attendees(attendees_file, report))
+
+def attendee_project_rows(attendees):
+    """Yields a ProjectRow for every (row_number, email) in `attendees`."""
+    for row_number, email in attendees:
+        email_prefix = email.split('@')[0]
+        project_id_suffix = "" # f"-{generate_random_suffix()}"
+        project_id = sanitize_project_id_part(f"{config.PLAYGROUND_PROJECT_ID_PREFIX}{email_prefix}{config.PLAYGROUND_PROJECT_ID_SUFFIX}{project_id_suffix}")
+        project_name = sanitize_display_name(f"{config.PLAYGROUND_PROJECT_NAME_PREFIX}{email_prefix}{config.PLAYGROUND_PROJECT_NAME_SUFFIX}")
+        yield ProjectRow(row_number, email, project_id, project_name, [email])
+
+def read_team_rows(teams_file, report=None):
+    """Yields a ProjectRow for every valid, first-seen team of the CSV file."""
+    for row_number, team_name, team_members in iter_teams(teams_file, report):
+        project_id_suffix = "" # f"-{generate_random_suffix()}"
+        project_id = sanitize_project_id_part(f"{config.TEAM_PROJECT_ID_PREFIX}{team_name}{config.TEAM_PROJECT_ID_SUFFIX}{project_id_suffix}")
+        project_name = sanitize_display_name(f"{config.TEAM_PROJECT_NAME_PREFIX}{team_name}{config.TEAM_PROJECT_NAME_SUFFIX}")
+        yield ProjectRow(row_number, team_name, project_id, project_name, team_members)
+
+def read_csv_file(csv_file, read_rows, skip_invalid=False):
+    """Reads and validates a whole attendees/teams CSV in one pass before anything is provisioned.
+
+    `read_rows` is read_attendee_rows or read_team_rows. Prints every bad
+    row. Raises CsvValidationError if there are any, unless `skip_invalid` is
+    set, in which case those rows are left out. Returns the ProjectRows: the
+    whole batch is needed up front to allocate unique project IDs.
+    """
+    report = IngestReport()
+    rows = list(read_rows(csv_file, report))
+    print_info(f"Read {report.rows} rows from {csv_file}: {report.valid} valid, "
+               f"{report.duplicates} duplicates, {len(report.errors)} invalid.")
+    for error in report.errors:
+        print_error(f"  Row {error.row_number}: {error.message}")
+    if report.errors and not skip_invalid:
+        raise CsvValidationError(csv_file, report)
+    return rows
+
+def index_projects_in_folder(folder_id, crm_v3):
+    """Lists every project in a folder (deleted ones included) into a dict keyed by project ID."""
+    projects = iter_pages(crm_v3.projects().list, 'cloudresourcemanager.projects.list', 'projects', parent=f"folders/{folder_id}", showDeleted=True)
+    return {project['projectId']: project for project in projects}
+
+def print_provisioning_plan(plan, debug_mode=False):
+    """Prints the pre-flight plan: counts per action, plus every non-create row."""
+    counts = plan.counts()
+    print_info(f"Pre-flight plan: {counts[ACTION_CREATE]} to create, {counts[ACTION_REPAIR]} to repair, "
+               f"{counts[ACTION_SKIP]} to skip.")
+    for row in plan.rows:
+        if row.action != ACTION_CREATE or debug_mode:
+            print_info(f"  {row.action:<6} {row.project_id} ({row.key}): {row.reason}")
+
+def print_estimate(estimate):
+    """Prints the API calls and wall time a planned run is expected to take (see src/estimate.py)."""
+    minutes, seconds = divmod(round(estimate.wall_seconds), 60)
+    print_info(f"Estimate: {estimate.total_calls} API calls, about {minutes}m {seconds:02d}s.")
+    for name, phase_seconds, bound in estimate.phases:
+        print_info(f"  {name}: {phase_seconds:.1f}s, bound by {bound}")
+    for api_method, calls in sorted(estimate.calls.items(), key=lambda item: (-item[1], item[0])):
+        print_info(f"  {calls:>6}  {api_method}")
+
+# API calls made by each provisioning step, and the ones a project waits on in
+# sequence: IAM overlaps billing and API enablement (see _run_project_steps)
+_STEP_CALLS = {
+    STEP_CREATED: {'cloudresourcemanager.projects.create': 1},
+    STEP_BILLING_LINKED: {'cloudbilling.projects.updateBillingInfo': 1},
+    STEP_IAM_SET: {'cloudresourcemanager.projects.getIamPolicy': 1, 'cloudresourcemanager.projects.setIamPolicy': 1},
+    STEP_APIS_ENABLED: {'serviceusage.services.list': 1,
+                        'serviceusage.services.batchEnable': math.ceil(len(config.APIS_TO_ENABLE) / config.SERVICEUSAGE_BATCH_ENABLE_LIMIT)},
+}
+_OFF_CRITICAL_PATH = (STEP_IAM_SET,)
+
+def estimate_provisioning(plan, kind, index_size, workers, journal=None):
+    """Estimates the API calls and wall time of provisioning the rows of a ProvisioningPlan."""
+    estimator = Estimator(observed_latencies(metrics))
+    estimator.add_phase('pre-flight listing', {'cloudresourcemanager.projects.list': max(1, math.ceil(index_size / config.LIST_PAGE_SIZE))})
+    groups = {}
+    for row in plan.rows:
+        if row.action == ACTION_SKIP:
+            continue
+        entry = journal.entry(kind, row.key) if journal is not None and row.action == ACTION_REPAIR else None
+        steps = tuple(step for step in STEPS if not (entry and entry.is_done(step)) and not (row.action == ACTION_REPAIR and step == STEP_CREATED))
+        groups[steps] = groups.get(steps, 0) + 1
+    for steps, count in groups.items():
+        calls = {method: n for step in steps for method, n in _STEP_CALLS[step].items()}
+        path = [method for step in steps if step not in _OFF_CRITICAL_PATH for method in _STEP_CALLS[step]]
+        estimator.add_phase(f"{count} rows ({', '.join(steps)})", calls, count, workers, path)
+    return estimator.estimate
+
+def print_id_collisions(collisions):
+    for collision in collisions:
+        assigned = ', '.join(f"{key} -> {project_id}" for key, project_id in collision.assigned.items())
+        print_warning(f"Project ID '{collision.project_id}' is shared by several rows: {assigned}")
+
+def _provision_rows(kind, read_rows, csv_file, create_func, crm_v3, serviceusage_v1, cloudbilling_v1, folder_id,
+                    debug_mode, max_workers, client_factory, journal, preflight, skip_invalid, conflict_strategy,
+                    id_map, dry_run):
+    """Shared driver behind provision_playground_projects and provision_team_projects."""
+    with metrics.stage('csv_validation'):
+        rows = read_csv_file(csv_file, read_rows, skip_invalid)
+    if dry_run:
+        print_id_collisions(allocate_project_ids(rows, kind, id_map, save=False))
+        index = index_projects_in_folder(folder_id, crm_v3)
+        plan = plan_rows(rows, index, kind, journal)
+        workers = ProvisioningEngine(max_workers, client_factory).max_workers
+        plan.estimate = estimate_provisioning(plan, kind, len(index), workers, journal)
+        print_provisioning_plan(plan, debug_mode=True)
+        print_estimate(plan.estimate)
+        return plan
+    return _provision_batch(kind, rows, create_func, crm_v3, serviceusage_v1, cloudbilling_v1,
+                            folder_id, debug_mode, max_workers, client_factory, journal, preflight, conflict_strategy, id_map)
+
+def _provision_batch(kind, rows, create_func, crm_v3, serviceusage_v1, cloudbilling_v1, folder_id, debug_mode,
+                     max_workers, client_factory, journal, preflight, conflict_strategy, id_map):
+    """Allocates project IDs for `rows` (ProjectRows) and provisions them; returns the ProvisioningSummary."""
+    def worker(row, clients):
+        crm, serviceusage, cloudbilling = clients
+        checkpoint = journal.entry(kind, row.key) if journal is not None else None
+        if checkpoint is not None and checkpoint.project_id:
+            row.project_id = checkpoint.project_id
+            if checkpoint.is_complete():
+                print_info(f'Project {row.project_id} for {row.key} is already provisioned.')
+                return None
+        if row.action == ACTION_SKIP:
+            print_info(f'Skipping project {row.project_id} for {row.key}: {row.reason}.')
+            return None
+        if row.action == ACTION_REPAIR and checkpoint is not None and not checkpoint.is_done(STEP_CREATED):
+            checkpoint.mark_done(STEP_CREATED)
+        members = row.members[0] if kind == KIND_ATTENDEE else row.members
+        print_info(f'Creating {kind} project for {row.key} with id {row.project_id} name {row.project_name}...')
+        return _journaled(checkpoint, create_func, row.project_id, row.project_name, members, crm, serviceusage, cloudbilling,
+                          folder_id, debug_mode, tracker, checkpoint, conflicts)
+
+    conflicts = ConflictResolver(conflict_strategy)
+    engine = ProvisioningEngine(max_workers, client_factory, (crm_v3, serviceusage_v1, cloudbilling_v1))
+    # Concurrent runs share one poller for all project-creation operations
+    tracker_clients = client_factory() if engine.max_workers > 1 else None
+    tracker = OperationTracker(tracker_clients[0]) if tracker_clients else None
+    try:
+        print_id_collisions(allocate_project_ids(rows, kind, id_map))
+        if preflight:
+            with metrics.stage('preflight'):
+                index = index_projects_in_folder(folder_id, crm_v3)
+                plan = plan_rows(rows, index, kind, journal)
+            plan.estimate = estimate_provisioning(plan, kind, len(index), engine.max_workers, journal)
+            print_provisioning_plan(plan, debug_mode)
+            print_estimate(plan.estimate)
+            rows = plan.rows
+        summary = engine.run(((row.row_number, row.key, row) for row in rows), worker)
+    finally:
+        if tracker is not None:
+            tracker.close()
+            if hasattr(client_factory, 'release'):
+                client_factory.release(tracker_clients)
+    summary.conflicts = conflicts.decisions()
+    print_provisioning_summary(summary)
+    return summary
+
+def provision_playground_projects(attendees_file, crm_v3, serviceusage_v1, cloudbilling_v1, general_folder_id, debug_mode=False, max_workers=None, client_factory=None, journal=None, preflight=False, skip_invalid=False, conflict_strategy=None, id_map=None, dry_run=False):
+    """Provisions one playground project per attendee row.
+
+    Rows are provisioned concurrently when `client_factory` is given; it must
+    return a fresh (crm_v3, serviceusage_v1, cloudbilling_v1) tuple for each
+    worker thread. With a ProvisioningJournal, every finished step is recorded
+    and rows from an earlier, interrupted run only redo their unfinished steps.
+    With `preflight`, the folder's projects are listed once and a create /
+    repair / skip plan is printed before anything is mutated.
+    The CSV is validated first; invalid rows abort the run with
+    CsvValidationError unless `skip_invalid` is set. Project IDs are then
+    allocated for the whole file at once (see src/allocator.py), reusing
+    and extending the assignments in `id_map`, a ProjectIdMap.
+    With `dry_run` only reads are made: the pre-flight plan of every row and
+    an estimate of the run's API calls and wall time are printed, and the
+    ProvisioningPlan is returned instead.
+    Project IDs that are already taken are skipped, adopted or suffixed
+    without prompting, per `conflict_strategy` (default
+    config.PROJECT_CONFLICT_STRATEGY, see src/conflicts.py).
+    Returns a ProvisioningSummary; its `conflicts` lists those decisions.
+    """
+    return _provision_rows(KIND_ATTENDEE, read_attendee_rows, attendees_file, create_project, crm_v3, serviceusage_v1,
+                           cloudbilling_v1, general_folder_id, debug_mode, max_workers, client_factory, journal, preflight, skip_invalid,
+                           conflict_strategy, id_map, dry_run)
+
+def watch_playground_projects(attendees_file, crm_v3, serviceusage_v1, cloudbilling_v1, general_folder_id, debug_mode=False,
+                              max_workers=None, client_factory=None, journal=None, conflict_strategy=None, id_map=None,
+                              cursor=None, poll_interval=None, stop=None, on_batch=None):
+    """Provisions attendee rows as they are appended to a CSV file, until `stop` (a threading.Event) is set.
+
+    The file is polled every `poll_interval` seconds (default
+    config.WATCH_POLL_INTERVAL) and only the rows past `cursor`, a
+    WatchCursor, are read (see src/watch.py). Each batch of new rows is
+    provisioned like provision_playground_projects does, without the
+    pre-flight listing of the folder; then the cursor is saved and
+    `on_batch(summary)` is called, e.g. to create budgets. Invalid rows are
+    reported and left out. An attendee seen in an earlier batch is skipped
+    by the journal, or adopted by the conflict strategy.
+    Rows that failed (a quota error, an operation timeout, ...) are past the
+    cursor but kept in memory and sent again with the next poll, up to
+    config.WATCH_ROW_MAX_ATTEMPTS times in all; the journal keeps their
+    error for a later 'provision attendees' run.
+    """
+    tail = CsvTail(attendees_file, cursor if cursor is not None else WatchCursor(), ATTENDEE_COLUMNS)
+    poll_interval = config.WATCH_POLL_INTERVAL if poll_interval is None else poll_interval
+    stop = stop if stop is not None else threading.Event()
+    print_info(f"Watching {attendees_file} for attendees after row {tail.row_number}...")
+    retries = {}  # row key -> (ProjectRow, failed attempts)
+    while True:
+        report = IngestReport()
+        values = tail.poll(report)
+        if tail.rewritten:
+            print_warning(f"{attendees_file} was rewritten; reading it again from the start.")
+        new_rows = [row for row in attendee_project_rows(attendees_from_values(values, report)) if row.key not in retries]
+        for error in report.errors:
+            print_error(f"  Row {error.row_number}: {error.message}")
+        if new_rows:
+            print_info(f"{len(new_rows)} new attendees in {attendees_file} (rows {new_rows[0].row_number}-{new_rows[-1].row_number}).")
+        if retries:
+            print_info(f"Retrying {len(retries)} attendees that failed earlier.")
+        rows = [row for row, _ in retries.values()] + new_rows
+        if rows:
+            summary = _provision_batch(KIND_ATTENDEE, rows, create_project, crm_v3, serviceusage_v1, cloudbilling_v1,
+                                       general_folder_id, debug_mode, max_workers, client_factory, journal, False,
+                                       conflict_strategy, id_map)
+            by_key = {row.key: row for row in rows}
+            attempts = {key: failed for key, (_, failed) in retries.items()}
+            retries = {}
+            for result in summary.failures():
+                failed = attempts.get(result.key, 0) + 1
+                if failed < config.WATCH_ROW_MAX_ATTEMPTS:
+                    retries[result.key] = (by_key[result.key], failed)
+                else:
+                    print_error(f"Giving up on row {result.row_number} ({result.key}) after {failed} attempts; "
+                                f"re-run 'provision attendees' to retry it.")
+        tail.commit()
+        if rows and on_batch is not None:
+            on_batch(summary)
+        if stop.wait(poll_interval):
+            return
+
+def _create_and_wait(project_id, body, crm_v3, tracker=None, checkpoint=None):
+    """Requests project creation and waits for it, resuming a journaled operation if there is one."""
+    operation_name = checkpoint.create_operation if checkpoint is not None else None
+    if operation_name:
+        print_info(f"Resuming project creation for {project_id}. Operation: {operation_name}")
+    else:
+        operation = execute(crm_v3.projects().create(body=body), 'cloudresourcemanager.projects.create')
+        operation_name = operation['name']
+        print_info(f"Project creation initiated for {project_id}. Operation: {operation_name}")
+        if checkpoint is not None:
+            checkpoint.record_create(project_id, operation_name)
+    try:
+        wait_for_operation(crm_v3, operation_name, tracker)
+    except OperationError:
+        if checkpoint is not None:
+            checkpoint.clear_create()
+        raise
+
+def _run_step(checkpoint, step, func, *args):
+    """Runs one provisioning step unless the journal shows it already completed."""
+    if checkpoint is not None and checkpoint.is_done(step):
+        return
+    with metrics.stage(step):
+        func(*args)
+    if checkpoint is not None:
+        checkpoint.mark_done(step)
+
+def _run_project_steps(checkpoint, project_id, serviceusage_v1, cloudbilling_v1, debug_mode, set_iam):
+    """Runs the steps after creation: billing and IAM overlap, and APIs are enabled once billing is linked."""
+    run_steps([
+        Step(STEP_BILLING_LINKED, lambda: _run_step(checkpoint, STEP_BILLING_LINKED, link_billing_account, project_id, cloudbilling_v1, debug_mode)),
+        Step(STEP_IAM_SET, lambda: _run_step(checkpoint, STEP_IAM_SET, set_iam)),
+        Step(STEP_APIS_ENABLED, lambda: _run_step(checkpoint, STEP_APIS_ENABLED, enable_apis, project_id, serviceusage_v1, debug_mode),
+             requires=(STEP_BILLING_LINKED,)),
+    ])
+
+def _find_project(project_id, crm_v3):
+    """Returns the project resource, or None if it does not exist or is not visible to us."""
+    try:
+        return execute(crm_v3.projects().get(name=f"projects/{project_id}"), 'cloudresourcemanager.projects.get')
+    except HttpError as e:
+        if e.resp.status in (403, 404):
+            return None
+        raise
+
+def _create_step(project_id, body, crm_v3, tracker=None, checkpoint=None, conflicts=None):
+    """Runs the create step, settling a project ID that is already taken as `conflicts` decides.
+
+    Returns the ID of the project to carry on with (the requested one, an
+    adopted one or a suffixed one), or None when the row is skipped. Never
+    asks for input; the decision is recorded in the ConflictResolver.
+    """
+    conflicts = conflicts or ConflictResolver()
+    requested = project_id
+    for attempt in range(conflicts.max_attempts + 1):
+        try:
+            _run_step(checkpoint, STEP_CREATED, _create_and_wait, project_id, dict(body, project_id=project_id), crm_v3, tracker, checkpoint)
+        except HttpError as e:
+            if e.resp.status != 409: # Conflict - the project ID already exists
+                raise
+        else:
+            if project_id != requested:
+                conflicts.record(requested, DECISION_RENAMED, project_id)
+            return project_id
+
+        print_warning(f"Project ID '{project_id}' already exists.")
+        reason = 'project ID already exists'
+        if conflicts.may_adopt:
+            problem = conflicts.ownership_problem(_find_project(project_id, crm_v3), body['parent'])
+            if problem is None:
+                print_info(f"Adopting existing project '{project_id}'.")
+                if checkpoint is not None:
+                    checkpoint.record_adopted(project_id)
+                conflicts.record(requested, DECISION_ADOPTED, project_id)
+                return project_id
+            reason = f"not adopted: {problem}"
+        if not conflicts.may_rename:
+            print_info(f"Skipping project creation for '{project_id}' ({reason}).")
+            conflicts.record(requested, DECISION_SKIPPED, reason=reason)
+            return None
+        if attempt < conflicts.max_attempts:
+            project_id = suffixed_id(requested, conflicts.suffix())
+            print_info(f"Retrying project creation with new ID: '{project_id}'")
+
+    reason = f"still taken after {conflicts.max_attempts} suffixed IDs"
+    conflicts.record(requested, DECISION_GAVE_UP, reason=reason)
+    raise Exception(f"Project ID '{requested}' {reason}.")
+
+def create_project(project_id, project_name, user_email, crm_v3, serviceusage_v1, cloudbilling_v1, parent_folder_id, debug_mode=False, tracker=None, checkpoint=None, conflicts=None):
     parent_folder = f"folders/{parent_folder_id}"
     body = {
         'project_id': project_id,
         'display_name': project_name,
-        'parent': parent_folder
+        'parent': parent_folder,
+        'labels': dict(config.PROJECT_LABELS),
     }
     if debug_mode:
         print_debug(f"DEBUG: API Payload for creating project {project_id}: {body}")
 
     try:
-        operation = crm_v3.projects().create(body=body).execute()
-        print_info(f"Project creation initiated for {project_id}. Operation: {operation['name']}")
-        wait_for_operation(crm_v3, operation['name'])
-        link_billing_account(project_id, cloudbilling_v1, debug_mode)
-        set_iam_policy(project_id, user_email, crm_v3, debug_mode)
-        enable_apis(project_id, serviceusage_v1, debug_mode)
+        project_id = _create_step(project_id, body, crm_v3, tracker, checkpoint, conflicts)
+        if project_id is None:
+            return None
+        _run_project_steps(checkpoint, project_id, serviceusage_v1, cloudbilling_v1, debug_mode,
+                           lambda: set_iam_policy(project_id, user_email, crm_v3, debug_mode))
+        return project_id
     except HttpError as e:
-        if e.resp.status == 409: # Conflict - usually means project ID already exists
-            print_warning(f"Project ID '{project_id}' already exists.")
-            while True:
-                choice = input("Do you want to (s)kip this project or (r)etry with a random suffix? (s/r): ").lower()
-                if choice == 's':
-                    print_info(f"Skipping project creation for '{project_id}'.")
-                    return
-                elif choice == 'r':
-                    new_project_id = f"{project_id}-{generate_random_suffix()}"
-                    print_info(f"Retrying project creation with new ID: '{new_project_id}'")
-                    create_project(new_project_id, project_name, user_email, crm_v3, serviceusage_v1, cloudbilling_v1, parent_folder_id, debug_mode)
-                    return
-                else:
-                    print_error("Invalid choice. Please enter 's' or 'r'.")
-        else:
-            print_error(f"An unexpected error occurred during project creation for {project_id}: {e}")
-            raise # Re-raise other HttpErrors
-
-def set_iam_policy(project_id, user_email, crm_v3, debug_mode=False):
-    admins = config.ADMIN_EMAILS
-    resource_name = f"projects/{project_id}"
-    policy = crm_v3.projects().getIamPolicy(resource=resource_name, body={}).execute()
+        print_error(f"An unexpected error occurred during project creation for {project_id}: {e}")
+        raise
 
-    # Add admins as owners
-    for admin in admins:
-        policy['bindings'].append({
-            'role': 'roles/owner',
-            'members': [f'user:{admin}']
-        })
+def merge_policy_members(policy, role_members):
+    """Merges members into an IAM policy, keeping a single unconditional binding per role.
 
-    # Add user as editor
-    policy['bindings'].append({
-        'role': 'roles/editor',
-        'members': [f'user:{user_email}']
-    })
+    `role_members` maps a role to the members it must include. Duplicate
+    unconditional bindings for the same role (left behind by older runs) are
+    folded into one. Returns True if the policy was changed.
+    """
+    bindings = policy.setdefault('bindings', [])
+    changed = False
+    by_role = {}
+    merged = []
+    for binding in bindings:
+        role = binding.get('role')
+        if 'condition' in binding or role not in role_members:
+            merged.append(binding)
+        elif role in by_role:
+            for member in binding.get('members', []):
+                if member not in by_role[role]['members']:
+                    by_role[role]['members'].append(member)
+            changed = True
+        else:
+            by_role[role] = binding
+            binding.setdefault('members', [])
+            merged.append(binding)
+    for role, members in role_members.items():
+        binding = by_role.get(role)
+        if binding is None:
+            binding = {'role': role, 'members': []}
+            by_role[role] = binding
+            merged.append(binding)
+        for member in members:
+            if member not in binding['members']:
+                binding['members'].append(member)
+                changed = True
+    policy['bindings'] = merged
+    return changed
+
+def apply_iam_members(project_id, role_members, crm_v3, debug_mode=False):
+    """Makes sure each role in `role_members` is granted to its members on a project.
+
+    Reads the policy once and only writes it back when something is missing.
+    The write carries the policy etag; if another writer changed the policy
+    in between, the policy is re-read and the merge retried, up to
+    config.IAM_POLICY_MAX_ATTEMPTS times. Returns True if the policy was written.
+    """
+    resource_name = f"projects/{project_id}"
+    for attempt in range(1, config.IAM_POLICY_MAX_ATTEMPTS + 1):
+        policy = execute(crm_v3.projects().getIamPolicy(resource=resource_name, body={'options': {'requestedPolicyVersion': 3}}),
+                         'cloudresourcemanager.projects.getIamPolicy')
+        if not merge_policy_members(policy, role_members):
+            print_info(f'IAM policy for project {project_id} is already up to date.')
+            return False
+        if debug_mode:
+            print_debug(f"DEBUG: API Payload for setting IAM policy for {project_id}: {{'policy': {policy}}}")
+        try:
+            execute(crm_v3.projects().setIamPolicy(resource=resource_name, body={'policy': policy}), 'cloudresourcemanager.projects.setIamPolicy')
+        except HttpError as e:
+            if e.resp.status == 409 and attempt < config.IAM_POLICY_MAX_ATTEMPTS:
+                print_warning(f"IAM policy for project {project_id} was modified concurrently, retrying ({attempt}/{config.IAM_POLICY_MAX_ATTEMPTS})...")
+                continue
+            raise
+        print_success(f'IAM policy updated for project {project_id}')
+        return True
 
-    if debug_mode:
-        print_debug(f"DEBUG: API Payload for setting IAM policy for {project_id}: {{'policy': policy}}")
-    crm_v3.projects().setIamPolicy(resource=resource_name, body={'policy': policy}).execute()
-    print_success(f'IAM policy updated for project {project_id}')
+def set_iam_policy(project_id, user_email, crm_v3, debug_mode=False):
+    """Grants the admins Owner and the attendee Editor on a playground project."""
+    role_members = {
+        'roles/owner': [f'user:{admin}' for admin in config.ADMIN_EMAILS],
+        'roles/editor': [f'user:{user_email}'],
+    }
+    return apply_iam_members(project_id, role_members, crm_v3, debug_mode)
 
 def link_billing_account(project_id, cloudbilling_v1, debug_mode=False):
     billing_account = config.BILLING_ACCOUNT_ID
@@ -327,175 +810,659 @@ def link_billing_account(project_id, cloudbilling_v1, debug_mode=False):
     if debug_mode:
         print_debug(f"DEBUG: API Payload for linking billing account for {project_id}: {body}")
     
-    cloudbilling_v1.projects().updateBillingInfo(name=project_name, body=body).execute()
+    execute(cloudbilling_v1.projects().updateBillingInfo(name=project_name, body=body), 'cloudbilling.projects.updateBillingInfo')
     print_success(f'Billing account {billing_account} linked to project {project_id}')
 
 
+def list_enabled_services(project_id, serviceusage_v1):
+    """Returns the set of service names (e.g. 'run.googleapis.com') enabled on a project."""
+    services = iter_pages(serviceusage_v1.services().list, 'serviceusage.services.list', 'services', parent=f'projects/{project_id}', filter='state:ENABLED')
+    return {service['config']['name'] for service in services}
+
 def enable_apis(project_id, serviceusage_v1, debug_mode=False):
-    apis_to_enable = config.APIS_TO_ENABLE
-    for api in apis_to_enable:
-        print_info(f'Enabling {api} for project {project_id}...')
+    """Enables config.APIS_TO_ENABLE that are not already enabled on the project.
+
+    Missing services are enabled with services.batchEnable, at most
+    config.SERVICEUSAGE_BATCH_ENABLE_LIMIT per call, and each operation is
+    waited on. Returns the list of services that were enabled.
+    """
+    enabled = list_enabled_services(project_id, serviceusage_v1)
+    missing = [api for api in config.APIS_TO_ENABLE if api not in enabled]
+    if not missing:
+        print_info(f'All required APIs are already enabled for project {project_id}.')
+        return []
+
+    batch_size = config.SERVICEUSAGE_BATCH_ENABLE_LIMIT
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        body = {'serviceIds': batch}
+        print_info(f'Enabling {", ".join(batch)} for project {project_id}...')
         if debug_mode:
-            print_debug(f"DEBUG: API Payload for enabling API {api} for project {project_id}: {{'name': f'projects/{project_id}/services/{api}'}}")
-        serviceusage_v1.services().enable(name=f'projects/{project_id}/services/{api}').execute()
-
-
-
-def provision_team_projects(teams_file, crm_v3, serviceusage_v1, cloudbilling_v1, team_folder_id, debug_mode=False):
-    with open(teams_file, 'r') as f:
-        reader = csv.reader(f)
-        next(reader)  # Skip header
-        for row in reader:
-            team_name, team_members_str = row
-            team_members = team_members_str.split('|')
-            # a random string with 5 chars long
-            random_string = os.urandom(3).hex() # Generates 6 random hex characters
-            project_id_suffix = "" # f"-{random_string}"
-            project_id = sanitize_project_id_part(f"{config.TEAM_PROJECT_ID_PREFIX}{team_name}{config.TEAM_PROJECT_ID_SUFFIX}{project_id_suffix}")
-            project_name = sanitize_display_name(f"{config.TEAM_PROJECT_NAME_PREFIX}{team_name}{config.TEAM_PROJECT_NAME_SUFFIX}")
-            print_info(f'Creating team project for {team_name} with id {project_id} name {project_name} ...')
-            create_team_project(project_id, project_name, team_members, crm_v3, serviceusage_v1, cloudbilling_v1, team_folder_id)
-
-def create_team_project(project_id, project_name, team_members, crm_v3, serviceusage_v1, cloudbilling_v1, parent_folder_id, debug_mode=False):
+            print_debug(f"DEBUG: API Payload for batch enabling APIs for project {project_id}: {body}")
+        operation = execute(serviceusage_v1.services().batchEnable(parent=f'projects/{project_id}', body=body), 'serviceusage.services.batchEnable')
+        if not operation.get('done'):
+            poll_operation(serviceusage_v1, operation['name'], api_method='serviceusage.operations.get')
+        elif 'error' in operation:
+            raise OperationError(operation['name'], operation['error'])
+    print_success(f'Enabled {len(missing)} APIs for project {project_id}')
+    return missing
+
+
+
+def provision_team_projects(teams_file, crm_v3, serviceusage_v1, cloudbilling_v1, team_folder_id, debug_mode=False, max_workers=None, client_factory=None, journal=None, preflight=False, skip_invalid=False, conflict_strategy=None, id_map=None, dry_run=False):
+    """Provisions one project per team row. See provision_playground_projects."""
+    return _provision_rows(KIND_TEAM, read_team_rows, teams_file, create_team_project, crm_v3, serviceusage_v1,
+                           cloudbilling_v1, team_folder_id, debug_mode, max_workers, client_factory, journal, preflight, skip_invalid,
+                           conflict_strategy, id_map, dry_run)
+
+def create_team_project(project_id, project_name, team_members, crm_v3, serviceusage_v1, cloudbilling_v1, parent_folder_id, debug_mode=False, tracker=None, checkpoint=None, conflicts=None):
     parent_folder = f"folders/{parent_folder_id}"
     body = {
         'project_id': project_id,
         'display_name': project_name,
-        'parent': parent_folder
+        'parent': parent_folder,
+        'labels': dict(config.PROJECT_LABELS),
     }
     if debug_mode:
         print_debug(f"DEBUG: API Payload for creating team project {project_id}: {body}")
     try:
-        operation = crm_v3.projects().create(body=body).execute()
-        print_info(f"Project creation initiated for {project_id}. Operation: {operation['name']}")
-        wait_for_operation(crm_v3, operation['name'])
-        link_billing_account(project_id, cloudbilling_v1, debug_mode)
-        set_team_iam_policy(project_id, team_members, crm_v3, debug_mode)
-        enable_apis(project_id, serviceusage_v1, debug_mode)
+        project_id = _create_step(project_id, body, crm_v3, tracker, checkpoint, conflicts)
+        if project_id is None:
+            return None
+        _run_project_steps(checkpoint, project_id, serviceusage_v1, cloudbilling_v1, debug_mode,
+                           lambda: set_team_iam_policy(project_id, team_members, crm_v3, debug_mode))
+        return project_id
     except HttpError as e:
-        if e.resp.status == 409: # Conflict - usually means project ID already exists
-            print_warning(f"Project ID '{project_id}' already exists.")
-            while True:
-                choice = input("Do you want to (s)kip this project or (r)etry with a random suffix? (s/r): ").lower()
-                if choice == 's':
-                    print_info(f"Skipping project creation for '{project_id}'.")
-                    return
-                elif choice == 'r':
-                    new_project_id = f"{project_id}-{generate_random_suffix()}"
-                    print_info(f"Retrying project creation with new ID: '{new_project_id}'")
-                    create_team_project(new_project_id, project_name, team_members, crm_v3, serviceusage_v1, cloudbilling_v1, parent_folder_id, debug_mode)
-                    return
-                else:
-                    print_error("Invalid choice. Please enter 's' or 'r'.")
-        else:
-            print_error(f"An unexpected error occurred during project creation for {project_id}: {e}")
-            raise # Re-raise other HttpErrors
+        print_error(f"An unexpected error occurred during project creation for {project_id}: {e}")
+        raise
 
 def set_team_iam_policy(project_id, team_members, crm_v3, debug_mode=False):
-    admins = config.ADMIN_EMAILS
-    resource_name = f"projects/{project_id}"
-    policy = crm_v3.projects().getIamPolicy(resource=resource_name, body={}).execute()
-
-    # Add admins as owners
-    for admin in admins:
-        policy['bindings'].append({
-            'role': 'roles/owner',
-            'members': [f'user:{admin}']
-        })
+    """Grants the admins Owner and every team member Editor on a team project."""
+    role_members = {
+        'roles/owner': [f'user:{admin}' for admin in config.ADMIN_EMAILS],
+        'roles/editor': [f'user:{member}' for member in team_members],
+    }
+    return apply_iam_members(project_id, role_members, crm_v3, debug_mode)
 
-    # Add team members as editors
-    policy['bindings'].append({
-        'role': 'roles/editor',
-        'members': [f'user:{member}' for member in team_members]
-    })
 
+def _label_pool_project(project_id, pool_state, crm_v3, display_name=None, debug_mode=False):
+    """Sets a pool project's LABEL_POOL label (and display name, if given) and waits for the update."""
+    body = {'labels': dict(config.PROJECT_LABELS, **{LABEL_POOL: pool_state})}
+    update_mask = 'labels'
+    if display_name is not None:
+        body['displayName'] = display_name
+        update_mask = 'displayName,labels'
     if debug_mode:
-        print_debug(f"DEBUG: API Payload for setting team IAM policy for {project_id}: {{'policy': policy}}")
-    crm_v3.projects().setIamPolicy(resource=resource_name, body={'policy': policy}).execute()
-    print_success(f'IAM policy updated for project {project_id}')
+        print_debug(f"DEBUG: API Payload for updating project {project_id}: {body}")
+    operation = execute(crm_v3.projects().patch(name=f"projects/{project_id}", updateMask=update_mask, body=body),
+                        'cloudresourcemanager.projects.patch')
+    if not operation.get('done'):
+        wait_for_operation(crm_v3, operation['name'])
+    elif 'error' in operation:
+        raise OperationError(operation['name'], operation['error'])
+
+def load_project_pool(folder_id, crm_v3, pool=None):
+    """Fills `pool` (a ProjectPool) with the ready pool projects already in a folder.
+
+    Returns (pool, IDs of pool projects whose setup never finished); pass
+    the latter to fill_project_pool as `pending` to finish them. Listing
+    errors are raised: a pool loaded from a partial listing would look
+    short and be refilled with duplicate projects.
+    """
+    pool = pool if pool is not None else ProjectPool()
+    pending = []
+    for project in list_projects_in_folder(folder_id, crm_v3, state='ACTIVE', raise_errors=True):
+        pool_state = project.get('labels', {}).get(LABEL_POOL)
+        if pool_state == POOL_READY:
+            pool.add(project['projectId'])
+        elif pool_state == POOL_PENDING:
+            pending.append(project['projectId'])
+    return pool, pending
+
+def _create_pool_project(project_id, existing, crm_v3, serviceusage_v1, cloudbilling_v1, parent_folder_id, debug_mode=False):
+    """Creates (unless `existing`) and fully sets up one generic pool project; returns its ID."""
+    if not existing:
+        body = {
+            'project_id': project_id,
+            'display_name': config.PROJECT_POOL_DISPLAY_NAME,
+            'parent': f"folders/{parent_folder_id}",
+            'labels': dict(config.PROJECT_LABELS, **{LABEL_POOL: POOL_PENDING}),
+        }
+        if debug_mode:
+            print_debug(f"DEBUG: API Payload for creating pool project {project_id}: {body}")
+        project_id = _create_step(project_id, body, crm_v3, conflicts=ConflictResolver(STRATEGY_SUFFIX))
+    admins = {'roles/owner': [f'user:{admin}' for admin in config.ADMIN_EMAILS]}
+    _run_project_steps(None, project_id, serviceusage_v1, cloudbilling_v1, debug_mode,
+                       lambda: apply_iam_members(project_id, admins, crm_v3, debug_mode))
+    _label_pool_project(project_id, POOL_READY, crm_v3, debug_mode=debug_mode)
+    return project_id
+
+@metrics.stage('pool_fill')
+def fill_project_pool(pool, folder_id, crm_v3, serviceusage_v1, cloudbilling_v1, debug_mode=False, max_workers=None,
+                      client_factory=None, count=None, pending=()):
+    """Provisions pool projects until `pool` holds `pool.size` (or `count` more) ready ones.
+
+    Projects in `pending` (see load_project_pool) are finished first, then
+    new ones are created in `folder_id` with billing linked,
+    config.APIS_TO_ENABLE enabled and the admins as owners. Each project is
+    added to the pool as soon as it is ready. Returns a ProvisioningSummary.
+    """
+    count = pool.start_fill(count)
+    pending = list(pending)[:count]
+    project_ids = [(project_id, True) for project_id in pending]
+    project_ids += [(pool_project_id(), False) for _ in range(count - len(pending))]
+    finished = []
+
+    def worker(payload, clients):
+        crm, serviceusage, cloudbilling = clients
+        try:
+            project_id = _create_pool_project(*payload, crm, serviceusage, cloudbilling, folder_id, debug_mode)
+            pool.add(project_id)
+            print_success(f'Pool project {project_id} is ready ({pool.level()} in the pool).')
+            return project_id
+        finally:
+            pool.end_fill(1)
+            finished.append(payload)
+
+    engine = ProvisioningEngine(max_workers, client_factory, (crm_v3, serviceusage_v1, cloudbilling_v1))
+    try:
+        summary = engine.run(((number, payload[0], payload) for number, payload in enumerate(project_ids, 1)), worker)
+    finally:
+        pool.end_fill(count - len(finished))
+    print_provisioning_summary(summary)
+    return summary
+
+def assign_pool_project(pool, email, crm_v3, debug_mode=False, journal=None, id_map=None):
+    """Checks an attendee in: hands them the next ready project of `pool`.
+
+    Grants the attendee Editor, and renames and relabels the project
+    LABEL_POOL=POOL_ASSIGNED so it is no longer loaded as ready. The
+    project keeps its pool ID. With a ProvisioningJournal the row is
+    recorded as fully provisioned, so 'provision attendees' skips it, and a
+    check-in that failed half-way reuses the same project when retried;
+    `id_map` (a ProjectIdMap) gets the attendee's project ID too.
+    Returns the project ID, or None if the pool is empty.
+    """
+    email = normalize_email(email)
+    checkpoint = journal.entry(KIND_ATTENDEE, email) if journal is not None else None
+    if checkpoint is not None and checkpoint.is_complete():
+        print_info(f'{email} already has project {checkpoint.project_id}.')
+        return checkpoint.project_id
+    project_id = checkpoint.project_id if checkpoint is not None else None
+    if project_id is not None and not project_id.startswith(config.PROJECT_POOL_ID_PREFIX):
+        print_warning(f'{email} already has project {project_id} from a provisioning run; not checking in from the pool.')
+        return project_id
+    if project_id is None:
+        project_id = pool.take()
+        if project_id is None:
+            print_error(f'The project pool is empty; {email} cannot be checked in yet.')
+            return None
+        email_prefix = email.split('@')[0]
+        display_name = sanitize_display_name(f"{config.PLAYGROUND_PROJECT_NAME_PREFIX}{email_prefix}{config.PLAYGROUND_PROJECT_NAME_SUFFIX}")
+        try:
+            _label_pool_project(project_id, POOL_ASSIGNED, crm_v3, display_name, debug_mode)
+        except Exception:
+            pool.put_back(project_id)
+            raise
+        if checkpoint is not None:
+            checkpoint.record_adopted(project_id)
+        if id_map is not None:
+            id_map.assign(KIND_ATTENDEE, email, project_id)
+            id_map.save()
+    _journaled(checkpoint, set_iam_policy, project_id, email, crm_v3, debug_mode)
+    if checkpoint is not None:
+        for step in STEPS:
+            checkpoint.mark_done(step)
+    print_success(f'{email} checked in with project {project_id}.')
+    return project_id
 
 
 
 def check_folder(folder_id, crm_v3):
     """Checks if a folder exists and is accessible."""
     try:
-        crm_v3.folders().get(name=f"folders/{folder_id}").execute()
+        execute(crm_v3.folders().get(name=f"folders/{folder_id}"), 'cloudresourcemanager.folders.get')
         return True
     except Exception as e:
         print_error(f"Error accessing folder {folder_id}: {e}")
         return False
 
-def list_folders(folder_id, crm_v3):
-    """Lists all available folders under MAIN_HACKATHON_FOLDER_ID."""
+def iter_pages(method, api_method, items_key, page_size=None, **params):
+    """Yields the items of a paginated list/search call, one page at a time.
+
+    `method` is a list method such as `crm_v3.projects().list` and
+    `api_method` its name for rate limiting; the next page is only requested
+    once the caller has consumed the current one.
+    """
+    page_token = None
+    while True:
+        response = execute(method(pageSize=page_size or config.LIST_PAGE_SIZE, pageToken=page_token, **params), api_method)
+        yield from response.get(items_key, [])
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return
+
+def _matches_filters(resource, state, display_name_prefix):
+    if state and resource.get('state') != state:
+        return False
+    if display_name_prefix and not resource.get('displayName', '').lower().startswith(display_name_prefix.lower()):
+        return False
+    return True
+
+def list_folders(folder_id, crm_v3, page_size=None, state=None, display_name_prefix=None):
+    """Yields the folders directly under a folder, following every page.
+
+    With `state` (e.g. 'ACTIVE') or `display_name_prefix`, folders.search is
+    used so the filtering happens server-side.
+    """
     try:
-        # This is a simplified list command. In a real-world scenario with many folders,
-        # you would need to handle pagination.
-        folders = crm_v3.folders().list(parent=f"folders/{folder_id}").execute().get('folders', [])
-        return folders
+        if state or display_name_prefix:
+            terms = [f"parent=folders/{folder_id}"]
+            if state:
+                terms.append(f"state={state}")
+            if display_name_prefix:
+                terms.append(f'displayName="{display_name_prefix}*"')
+            folders = iter_pages(crm_v3.folders().search, 'cloudresourcemanager.folders.search', 'folders', page_size, query=' AND '.join(terms))
+        else:
+            folders = iter_pages(crm_v3.folders().list, 'cloudresourcemanager.folders.list', 'folders', page_size, parent=f"folders/{folder_id}")
+        for folder in folders:
+            if _matches_filters(folder, state, display_name_prefix):
+                yield folder
     except Exception as e:
         print_error(f"Error listing folders: {e}")
-        return []
 
-def list_projects_in_folder(folder_id, crm_v3):
-    """Lists all projects within a specific folder."""
+def list_projects_in_folder(folder_id, crm_v3, page_size=None, state=None, display_name_prefix=None, raise_errors=False):
+    """Yields the projects within a specific folder, following every page.
+
+    With `state` (e.g. 'ACTIVE') or `display_name_prefix`, projects.search is
+    used so the filtering happens server-side. An API error is printed and
+    ends the listing early, unless `raise_errors` is set; callers that act
+    on a complete listing must set it.
+    """
     try:
-        projects = crm_v3.projects().list(parent=f"folders/{folder_id}").execute().get('projects', [])
-        return projects
+        if state or display_name_prefix:
+            terms = [f"parent:folders/{folder_id}"]
+            if state:
+                terms.append(f"state:{state}")
+            if display_name_prefix:
+                terms.append(f"displayName:{display_name_prefix}*")
+            projects = iter_pages(crm_v3.projects().search, 'cloudresourcemanager.projects.search', 'projects', page_size, query=' AND '.join(terms))
+        else:
+            projects = iter_pages(crm_v3.projects().list, 'cloudresourcemanager.projects.list', 'projects', page_size, parent=f"folders/{folder_id}")
+        for project in projects:
+            if _matches_filters(project, state, display_name_prefix):
+                yield project
     except Exception as e:
+        if raise_errors:
+            raise
         print_error(f"Error listing projects in folder {folder_id}: {e}")
-        return []
-
-def apply_organization_policies(folder_id, crm_v3, debug_mode=False):
-    """Applies the organization policies defined in config.py to a specific folder."""
-    print_info(f"Applying organization policies to folder: {folder_id}...")
-    parent_folder = f"folders/{folder_id}"
-
-    for constraint, policy_config in config.ORGANIZATION_POLICY.items():
-        policy_name = f"{parent_folder}/policies/{constraint.replace('/', '%2F')}"
-        print_info(f"Applying policy for constraint: {policy_name}")
-
-        policy = {
-            'name': policy_name,
-            'spec': policy_config
-        }
 
+def _single_client_pool(service, version, credentials, emulator_url=None):
+    emulator_url = emulator_url or config.EMULATOR_URL
+    return ClientPool(credentials, lambda http: (
+        LazyClient(lambda: build_client(service, version, client_options=_client_options(service, emulator_url), http=http)),))
+
+def build_orgpolicy_pool(credentials, emulator_url=None):
+    """Returns a ClientPool of (orgpolicy_v2,) clients; pass a pool's SharedCredentials to share its token."""
+    return _single_client_pool('orgpolicy', 'v2', credentials, emulator_url)
+
+def build_budget_pool(credentials, emulator_url=None):
+    """Returns a ClientPool of (billingbudgets_v1,) clients; pass a pool's SharedCredentials to share its token."""
+    return _single_client_pool('billingbudgets', 'v1', credentials, emulator_url)
+
+def list_folder_policies(folder_id, orgpolicy_v2):
+    """Returns {constraint ID: spec} for the policies set directly on a folder, in one paginated read."""
+    policies = iter_pages(orgpolicy_v2.folders().policies().list, 'orgpolicy.folders.policies.list', 'policies',
+                          parent=f"folders/{folder_id}")
+    return {policy['name'].rsplit('/policies/', 1)[1]: policy.get('spec', {}) for policy in policies}
+
+def _write_policy(change, orgpolicy_v2, debug_mode=False):
+    """Creates, updates or deletes one folder policy as described by a PolicyChange."""
+    policies = orgpolicy_v2.folders().policies()
+    body = {'name': change.name, 'spec': change.desired}
+    if debug_mode and change.action != orgpolicy.ACTION_DELETE:
+        print_debug(f"DEBUG: API Payload for {change.action} of org policy {change.name}: {body}")
+    if change.action == orgpolicy.ACTION_CREATE:
+        execute(policies.create(parent=f"folders/{change.folder_id}", body=body), 'orgpolicy.folders.policies.create')
+    elif change.action == orgpolicy.ACTION_UPDATE:
+        execute(policies.patch(name=change.name, body=body), 'orgpolicy.folders.policies.patch')
+    elif change.action == orgpolicy.ACTION_DELETE:
+        execute(policies.delete(name=change.name), 'orgpolicy.folders.policies.delete')
+
+def sync_organization_policies(folder_ids, desired, orgpolicy_v2, debug_mode=False, max_workers=None, client_factory=None,
+                               dry_run=False):
+    """Brings the policies on every folder in `folder_ids` to `desired`; returns the PolicyChanges.
+
+    Each folder's policies are read once, then only the constraints that differ
+    are written. Both the reads and the writes run concurrently when
+    `client_factory` (e.g. build_orgpolicy_pool) is given. With `dry_run` the
+    diff is computed but nothing is written. A failed write is recorded in its
+    change's `error`; the other writes still go ahead.
+    """
+    if isinstance(folder_ids, str):
+        folder_ids = [folder_ids]
+    engine = ProvisioningEngine(max_workers, client_factory, (orgpolicy_v2,))
+    current = {}
+
+    def read(folder_id, clients):
+        current[folder_id] = list_folder_policies(folder_id, clients[0])
+        return folder_id
+
+    summary = engine.run(((number, folder_id, folder_id) for number, folder_id in enumerate(folder_ids)), read)
+    for result in summary.failures():
+        raise Exception(f"Could not read the org policies of folder {result.key}: {result.error}")
+
+    changes = [change for folder_id in folder_ids for change in orgpolicy.diff_policies(folder_id, current[folder_id], desired)]
+    pending = [change for change in changes if change.action != orgpolicy.ACTION_UNCHANGED]
+    if dry_run or not pending:
+        return changes
+
+    def write(change, clients):
+        _write_policy(change, clients[0], debug_mode)
+        return change.name
+
+    summary = engine.run(((number, change.name, change) for number, change in enumerate(pending)), write)
+    for result, change in zip(summary.results, pending):
+        change.error = result.error
+    return changes
+
+def print_policy_changes(changes, dry_run=False):
+    """Prints the per-constraint diff of sync_organization_policies, one folder at a time."""
+    for folder_id in dict.fromkeys(change.folder_id for change in changes):
+        print_info(f"Folder {folder_id}:")
+        for change in changes:
+            if change.folder_id != folder_id:
+                continue
+            line = f"  {change.action:<10}{change.constraint}"
+            if change.error:
+                print_error(f"{line}: {change.error}")
+            elif change.action == orgpolicy.ACTION_UNCHANGED:
+                print_info(line)
+            elif dry_run:
+                print_warning(line)
+            else:
+                print_success(line)
+    drifted = [change for change in changes if change.action != orgpolicy.ACTION_UNCHANGED]
+    failed = [change for change in drifted if change.error]
+    verb = "would change" if dry_run else "changed"
+    print_info(f"{len(changes)} constraints on {len(set(c.folder_id for c in changes))} folders: "
+               f"{len(drifted) - len(failed)} {verb}, {len(failed)} failed, {len(changes) - len(drifted)} unchanged.")
+
+_POLICY_WRITE_METHODS = {
+    orgpolicy.ACTION_CREATE: 'orgpolicy.folders.policies.create',
+    orgpolicy.ACTION_UPDATE: 'orgpolicy.folders.policies.patch',
+    orgpolicy.ACTION_DELETE: 'orgpolicy.folders.policies.delete',
+}
+
+def estimate_policy_sync(changes, workers):
+    """Estimates the API calls and wall time of applying the PolicyChanges of a dry run."""
+    estimator = Estimator(observed_latencies(metrics))
+    estimator.add_phase('policy reads', {'orgpolicy.folders.policies.list': 1}, len({c.folder_id for c in changes}), workers)
+    for action, api_method in _POLICY_WRITE_METHODS.items():
+        count = sum(1 for change in changes if change.action == action)
+        estimator.add_phase(f"policy {action}s", {api_method: 1}, count, workers)
+    return estimator.estimate
+
+@metrics.stage('org_policies_apply')
+def apply_organization_policies(folder_ids, orgpolicy_v2, debug_mode=False, max_workers=None, client_factory=None, dry_run=False):
+    """Applies the organization policies defined in config.py to one or more folders.
+
+    Only constraints whose policy differs from config.ORGANIZATION_POLICY are
+    written (see sync_organization_policies). A `dry_run` also prints an
+    estimate of the API calls and wall time. Returns the PolicyChanges.
+    """
+    print_info(f"Applying organization policies to folder(s): {', '.join([folder_ids] if isinstance(folder_ids, str) else folder_ids)}...")
+    changes = sync_organization_policies(folder_ids, config.ORGANIZATION_POLICY, orgpolicy_v2, debug_mode, max_workers,
+                                         client_factory, dry_run)
+    print_policy_changes(changes, dry_run)
+    if dry_run:
+        print_estimate(estimate_policy_sync(changes, ProvisioningEngine(max_workers, client_factory).max_workers))
+    return changes
+
+@metrics.stage('org_policies_revert')
+def revert_organization_policies(folder_ids, orgpolicy_v2, debug_mode=False, max_workers=None, client_factory=None, dry_run=False):
+    """Reverts the organization policies on one or more folders to their default state.
+
+    The folder's own policy for each constraint in config.ORGANIZATION_POLICY
+    is deleted, so the folder inherits from its parent again. Returns the
+    PolicyChanges.
+    """
+    print_info(f"Reverting organization policies on folder(s): {', '.join([folder_ids] if isinstance(folder_ids, str) else folder_ids)}...")
+    desired = {constraint: None for constraint in config.ORGANIZATION_POLICY}
+    changes = sync_organization_policies(folder_ids, desired, orgpolicy_v2, debug_mode, max_workers, client_factory, dry_run)
+    print_policy_changes(changes, dry_run)
+    if dry_run:
+        print_estimate(estimate_policy_sync(changes, ProvisioningEngine(max_workers, client_factory).max_workers))
+    return changes
+
+def list_budgets(billingbudgets_v1, billing_account=None):
+    """Yields every budget of `billing_account` (default config.BILLING_ACCOUNT_ID), following every page."""
+    yield from iter_pages(billingbudgets_v1.billingAccounts().budgets().list, 'billingbudgets.billingAccounts.budgets.list',
+                          'budgets', parent=billing_account or config.BILLING_ACCOUNT_ID)
+
+def _write_budget(change, billingbudgets_v1, billing_account, debug_mode=False):
+    """Creates or updates the budget described by a BudgetChange."""
+    resource = billingbudgets_v1.billingAccounts().budgets()
+    if debug_mode:
+        print_debug(f"DEBUG: API Payload for {change.action} of the budget of {change.project_id}: {change.body}")
+    if change.action == budgets.ACTION_CREATE:
+        budget = execute(resource.create(parent=billing_account, body=change.body), 'billingbudgets.billingAccounts.budgets.create')
+        change.budget_name = budget['name']
+    elif change.action == budgets.ACTION_UPDATE:
+        execute(resource.patch(name=change.budget_name, updateMask=budgets.UPDATE_MASK, body=change.body),
+                'billingbudgets.billingAccounts.budgets.patch')
+
+@metrics.stage('budgets')
+def provision_budgets(projects, amount_usd, billingbudgets_v1, debug_mode=False, max_workers=None, client_factory=None,
+                      dry_run=False, billing_account=None):
+    """Makes sure every project resource in `projects` has a monthly `amount_usd` budget.
+
+    The billing account's budgets are listed once. Only missing budgets are
+    created, and only budgets with a different amount or different alert
+    thresholds are updated. The writes run concurrently when `client_factory`
+    (e.g. build_budget_pool) is given. With `dry_run` nothing is written.
+    Returns the BudgetChanges; a failed write is recorded in its `error`.
+    """
+    billing_account = billing_account or config.BILLING_ACCOUNT_ID
+    index = budgets.index_budgets(list_budgets(billingbudgets_v1, billing_account))
+    changes = budgets.plan_budgets(projects, index, amount_usd)
+    pending = [change for change in changes if change.action != budgets.ACTION_UNCHANGED]
+    if dry_run or not pending:
+        return changes
+
+    def write(change, clients):
+        _write_budget(change, clients[0], billing_account, debug_mode)
+        return change.project_id
+
+    engine = ProvisioningEngine(max_workers, client_factory, (billingbudgets_v1,))
+    summary = engine.run(((number, change.project_id, change) for number, change in enumerate(pending)), write)
+    for result, change in zip(summary.results, pending):
+        change.error = result.error
+    return changes
+
+def provision_folder_budgets(folder_id, amount_usd, crm_v3, billingbudgets_v1, debug_mode=False, max_workers=None,
+                             client_factory=None, dry_run=False):
+    """Runs provision_budgets for every active project in a folder, listed once; prints and returns the changes."""
+    print_info(f"Checking ${amount_usd}/month budgets for the projects in folder {folder_id}...")
+    # A partial listing would silently leave projects without a budget
+    projects = list(list_projects_in_folder(folder_id, crm_v3, state='ACTIVE', raise_errors=True))
+    changes = provision_budgets(projects, amount_usd, billingbudgets_v1, debug_mode, max_workers, client_factory, dry_run)
+    print_budget_changes(changes, debug_mode, dry_run)
+    return changes
+
+def provision_project_budgets(project_ids, amount_usd, crm_v3, billingbudgets_v1, debug_mode=False, max_workers=None,
+                              client_factory=None):
+    """Runs provision_budgets for the given projects only, e.g. a watch batch; prints and returns the changes.
+
+    Each project is read once for its number; the folder is not listed.
+    """
+    projects = []
+    for project_id in project_ids:
+        project = _find_project(project_id, crm_v3)
+        if project is None:
+            print_error(f"  Project {project_id} not found; no budget created.")
+        else:
+            projects.append(project)
+    if not projects:
+        return []
+    changes = provision_budgets(projects, amount_usd, billingbudgets_v1, debug_mode, max_workers, client_factory)
+    print_budget_changes(changes, debug_mode)
+    return changes
+
+def print_budget_changes(changes, debug_mode=False, dry_run=False):
+    for change in changes:
+        if change.error:
+            print_error(f"  {change.action:<10}{change.project_id}: {change.error}")
+        elif change.action != budgets.ACTION_UNCHANGED or debug_mode:
+            print_info(f"  {change.action:<10}{change.project_id}")
+    counts = {action: sum(1 for c in changes if c.action == action and not c.error)
+              for action in (budgets.ACTION_CREATE, budgets.ACTION_UPDATE, budgets.ACTION_UNCHANGED)}
+    failed = sum(1 for change in changes if change.error)
+    verb = "to create" if dry_run else "created"
+    print_info(f"Budgets for {len(changes)} projects: {counts[budgets.ACTION_CREATE]} {verb}, "
+               f"{counts[budgets.ACTION_UPDATE]} {'to update' if dry_run else 'updated'}, "
+               f"{counts[budgets.ACTION_UNCHANGED]} unchanged, {failed} failed.")
+
+def plan_teardown(folder_id, crm_v3, include_root=True):
+    """Walks the folder tree under `folder_id` and returns a TeardownPlan.
+
+    The subfolders and projects of every folder are listed once. Only ACTIVE
+    resources are planned, so re-running after a partial teardown picks up
+    whatever is left. With `include_root` False the folder itself is kept.
+    """
+    root = execute(crm_v3.folders().get(name=f"folders/{folder_id}"), 'cloudresourcemanager.folders.get')
+    plan = TeardownPlan(folder_id, include_root)
+    level = [dict(root, depth=0)]
+    while level:
+        plan.folders.extend(level)
+        next_level = []
+        for folder in level:
+            for project in iter_pages(crm_v3.projects().list, 'cloudresourcemanager.projects.list', 'projects', parent=folder['name']):
+                if project.get('state', 'ACTIVE') == 'ACTIVE':
+                    plan.projects.append(project)
+            for child in iter_pages(crm_v3.folders().list, 'cloudresourcemanager.folders.list', 'folders', parent=folder['name']):
+                if child.get('state', 'ACTIVE') == 'ACTIVE':
+                    next_level.append(dict(child, depth=folder['depth'] + 1))
+        level = next_level
+    return plan
+
+def print_teardown_plan(plan, debug_mode=False):
+    """Prints the folders (as a tree) and projects a teardown would delete."""
+    project_counts = {}
+    for project in plan.projects:
+        project_counts[project['parent']] = project_counts.get(project['parent'], 0) + 1
+    print_info(f"Teardown plan for folder {plan.folder_id}: {len(plan.projects)} projects, "
+               f"{len(plan.folders_to_delete())} folders.")
+    children = {}
+    for folder in plan.folders:
+        children.setdefault(folder.get('parent'), []).append(folder)
+
+    def print_folder(folder):
+        kept = '' if plan.include_root or folder['name'] != plan.root_name else ' [kept]'
+        print_info(f"  {'  ' * folder['depth']}{folder.get('displayName', '')} ({folder['name']}): "
+                   f"{project_counts.get(folder['name'], 0)} projects{kept}")
         if debug_mode:
-            print_debug(f"DEBUG: API Payload for setting org policy for {constraint}: {policy}")
+            for project in plan.projects:
+                if project['parent'] == folder['name']:
+                    print_debug(f"  {'  ' * (folder['depth'] + 1)}- {project['projectId']}")
+        for child in children.get(folder['name'], []):
+            print_folder(child)
+    print_folder(plan.folders[0])
+
+def print_teardown_report(report):
+    """Prints the outcome of teardown_folder."""
+    print_info(f"Teardown finished in {report.elapsed:.1f}s: {len(report.deleted_projects)} projects and "
+               f"{len(report.deleted_folders)} folders deleted, {len(report.failures)} failed, {len(report.skipped)} skipped.")
+    for resource, error in report.failures:
+        print_error(f"  {resource}: {error}")
+    for resource, reason in report.skipped:
+        print_warning(f"  {resource}: {reason}")
+    if report.deleted_projects or report.deleted_folders:
+        print_info("Deleted projects and folders stay in DELETE_REQUESTED for 30 days before they are purged.")
+
+def _delete_resource(crm_v3, request, api_method, get_request, tracker=None):
+    """Requests a project or folder deletion and waits for its operation.
+
+    Deletes are retried, so an attempt whose response was lost after the
+    server acted on it makes the retry fail with 404 or FAILED_PRECONDITION.
+    Such an error counts as success if `get_request` then finds the resource
+    gone or in DELETE_REQUESTED.
+    """
+    try:
+        operation = execute(request, api_method)
+    except HttpError as e:
+        if e.resp.status not in (400, 403, 404) or not _is_deleted(get_request, api_method.replace('.delete', '.get')):
+            raise
+        return
+    if not operation.get('done'):
+        operation = wait_for_operation(crm_v3, operation['name'], tracker)
+    if 'error' in operation:
+        raise OperationError(operation['name'], operation['error'])
+
+def _is_deleted(get_request, api_method):
+    """True if the resource is in DELETE_REQUESTED or not found. A 403 could be a real permission error, so it is not."""
+    try:
+        return execute(get_request, api_method).get('state') == 'DELETE_REQUESTED'
+    except HttpError as e:
+        if e.resp.status not in (403, 404):
+            raise
+        return e.resp.status == 404
 
-        try:
-            request = crm_v3.folders().orgPolicies().patch(name=policy_name, body=policy)
-            request.execute()
-            print_success(f"Successfully applied policy for constraint: {constraint}")
-        except Exception as e:
-            print_error(f"Error applying policy for constraint {constraint}: {e}")
-
-def revert_organization_policies(folder_id, crm_v3, debug_mode=False):
-    """Reverts the organization policies on a specific folder to their default state."""
-    print_info(f"Reverting organization policies on folder: {folder_id}...")
-    parent_folder = f"folders/{folder_id}"
-
-    for constraint in config.ORGANIZATION_POLICY.keys():
-        policy_name = f"{parent_folder}/policies/{constraint.replace('/', '%2F')}"
-        print_info(f"Reverting policy for constraint: {policy_name}")
-
-        # To revert, we set a policy that allows all and is not enforced.
-        policy = {
-            'name': policy_name,
-            'spec': {
-                'rules': [{'allowAll': True}],
-                'inheritFromParent': True, # Reset to inherit from parent
-            }
-        }
+def teardown_folder(plan, crm_v3, max_workers=None, client_factory=None):
+    """Deletes everything in a TeardownPlan and returns a TeardownReport.
 
-        if debug_mode:
-            print_debug(f"DEBUG: API Payload for reverting org policy for {constraint}: {policy}")
+    Projects are deleted concurrently (like provisioning, through the rate
+    limiter), then folders one level at a time, deepest first. A folder whose
+    subtree still holds a project or folder that failed to delete is skipped.
+    """
+    report = TeardownReport()
+    start = time.monotonic()
+    blocked = set()
+    engine = ProvisioningEngine(max_workers, client_factory, (crm_v3,))
+    tracker_clients = client_factory() if engine.max_workers > 1 else None
+    tracker = OperationTracker(tracker_clients[0]) if tracker_clients else None
+
+    def delete_project(project, clients):
+        _delete_resource(clients[0], clients[0].projects().delete(name=project['name']),
+                         'cloudresourcemanager.projects.delete', clients[0].projects().get(name=project['name']), tracker)
+        return project['projectId']
+
+    def delete_folder(folder, clients):
+        _delete_resource(clients[0], clients[0].folders().delete(name=folder['name']),
+                         'cloudresourcemanager.folders.delete', clients[0].folders().get(name=folder['name']), tracker)
+        return folder['name']
 
-        try:
-            request = crm_v3.folders().orgPolicies().patch(name=policy_name, body=policy)
-            request.execute()
-            print_success(f"Successfully reverted policy for constraint: {constraint}")
-        except Exception as e:
-            print_error(f"Error reverting policy for constraint {constraint}: {e}")
+    try:
+        with metrics.stage('teardown_projects'):
+            parents = {project['projectId']: project['parent'] for project in plan.projects}
+            summary = engine.run(((number, project['projectId'], project) for number, project in enumerate(plan.projects)), delete_project)
+            for result in summary.results:
+                if result.error is not None:
+                    report.failures.append((result.key, result.error))
+                    blocked.update(plan.ancestors(parents[result.key]))
+                else:
+                    report.deleted_projects.append(result.project_id)
+
+        with metrics.stage('teardown_folders'):
+            for level in plan.folder_levels():
+                for folder in level:
+                    if folder['name'] in blocked:
+                        report.skipped.append((folder['name'], 'not empty after failed deletions'))
+                level = [folder for folder in level if folder['name'] not in blocked]
+                summary = engine.run(((number, folder['name'], folder) for number, folder in enumerate(level)), delete_folder)
+                for result, folder in zip(summary.results, level):
+                    if result.error is not None:
+                        report.failures.append((result.key, result.error))
+                        blocked.update(plan.ancestors(folder.get('parent')))
+                    else:
+                        report.deleted_folders.append(result.project_id)
+    finally:
+        if tracker is not None:
+            tracker.close()
+            if hasattr(client_factory, 'release'):
+                client_factory.release(tracker_clients)
+    report.elapsed = time.monotonic() - start
+    return report
 
 
 if __name__ == '__main__':
@@ -0,0 +1,185 @@
+"""Per-API-call and per-stage metrics, exported in OpenMetrics text format.
+
+api.execute records every attempt of every API call: its latency, its error
+class when it fails ('http_429', 'TimeoutError', ...) and whether it was a
+retry. Provisioning stages (project creation, billing, IAM, API enablement,
+operation waits, ...) are timed with `metrics.stage(name)`. During a live
+event this shows which call or stage is the bottleneck; the CLI prints a
+summary table after every run and writes config.METRICS_PATH for scraping.
+"""
+import collections
+import contextlib
+import os
+import threading
+import time
+
+from googleapiclient.errors import HttpError
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+METRIC_PREFIX = 'playground'
+
+
+def error_class(error):
+    """Names the class of a failed call: 'http_<status>' or the exception type."""
+    if isinstance(error, HttpError):
+        return f"http_{error.resp.status}"
+    return type(error).__name__
+
+
+class Histogram:
+    """Counts observations into fixed buckets; not thread-safe on its own."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, fraction):
+        """Estimates a quantile as the upper bound of the bucket it falls in (capped at the max seen)."""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.buckets[index], self.max) if index < len(self.buckets) else self.max
+        return self.max
+
+    def cumulative(self):
+        """Yields (upper bound, observations at or below it), ending with '+Inf'."""
+        seen = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            seen += count
+            yield bound, seen
+
+
+class CallStats:
+    def __init__(self):
+        self.latency = Histogram()
+        self.errors = collections.Counter()
+        self.retries = 0
+
+
+class StageStats:
+    def __init__(self):
+        self.duration = Histogram()
+        self.failures = 0
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels.items()) + '}'
+
+
+class MetricsRegistry:
+    """Thread-safe store of call and stage metrics."""
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._calls = collections.defaultdict(CallStats)
+            self._stages = collections.defaultdict(StageStats)
+
+    def record_call(self, api_method, seconds, error=None):
+        """Records one attempt of `api_method`; `error` is the exception it raised, if any."""
+        with self._lock:
+            stats = self._calls[api_method]
+            stats.latency.observe(seconds)
+            if error is not None:
+                stats.errors[error_class(error)] += 1
+
+    def record_retry(self, api_method):
+        with self._lock:
+            self._calls[api_method].retries += 1
+
+    def record_stage(self, stage, seconds, failed=False):
+        with self._lock:
+            stats = self._stages[stage]
+            stats.duration.observe(seconds)
+            if failed:
+                stats.failures += 1
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Times the enclosed block as one run of stage `name`."""
+        start = self._clock()
+        try:
+            yield
+        except BaseException:
+            self.record_stage(name, self._clock() - start, failed=True)
+            raise
+        self.record_stage(name, self._clock() - start)
+
+    def call_summary(self):
+        """Returns [(api_method, calls, errors, retries, p50, p95, total seconds)], busiest first."""
+        with self._lock:
+            rows = [(method, s.latency.count, sum(s.errors.values()), s.retries,
+                     s.latency.quantile(0.5), s.latency.quantile(0.95), s.latency.sum)
+                    for method, s in self._calls.items()]
+        return sorted(rows, key=lambda row: row[6], reverse=True)
+
+    def stage_summary(self):
+        """Returns [(stage, runs, failures, p50, p95, total seconds)], slowest first."""
+        with self._lock:
+            rows = [(stage, s.duration.count, s.failures, s.duration.quantile(0.5), s.duration.quantile(0.95), s.duration.sum)
+                    for stage, s in self._stages.items()]
+        return sorted(rows, key=lambda row: row[5], reverse=True)
+
+    def error_counts(self):
+        """Returns {(api_method, error class): count}."""
+        with self._lock:
+            return {(method, error): count for method, s in self._calls.items() for error, count in s.errors.items()}
+
+    def to_openmetrics(self):
+        """Renders every metric in the OpenMetrics text exposition format."""
+        calls = f"{METRIC_PREFIX}_api_calls"
+        errors = f"{METRIC_PREFIX}_api_errors"
+        retries = f"{METRIC_PREFIX}_api_retries"
+        latency = f"{METRIC_PREFIX}_api_call_duration_seconds"
+        stages = f"{METRIC_PREFIX}_stage_duration_seconds"
+        failures = f"{METRIC_PREFIX}_stage_failures"
+        lines = []
+        with self._lock:
+            call_items = sorted(self._calls.items())
+            stage_items = sorted(self._stages.items())
+            lines += [f"# TYPE {calls} counter", f"# HELP {calls} API call attempts, including retries."]
+            lines += [f"{calls}_total{_labels(method=m)} {s.latency.count}" for m, s in call_items]
+            lines += [f"# TYPE {errors} counter", f"# HELP {errors} Failed API call attempts by error class."]
+            lines += [f"{errors}_total{_labels(method=m, error=e)} {n}" for m, s in call_items for e, n in sorted(s.errors.items())]
+            lines += [f"# TYPE {retries} counter", f"# HELP {retries} API call attempts that were retries."]
+            lines += [f"{retries}_total{_labels(method=m)} {s.retries}" for m, s in call_items]
+            lines += [f"# TYPE {latency} histogram", f"# UNIT {latency} seconds", f"# HELP {latency} API call latency."]
+            for method, s in call_items:
+                lines += [f"{latency}_bucket{_labels(method=method, le=bound)} {n}" for bound, n in s.latency.cumulative()]
+                lines += [f"{latency}_count{_labels(method=method)} {s.latency.count}",
+                          f"{latency}_sum{_labels(method=method)} {s.latency.sum:.6f}"]
+            lines += [f"# TYPE {stages} histogram", f"# UNIT {stages} seconds", f"# HELP {stages} Provisioning stage duration."]
+            for stage, s in stage_items:
+                lines += [f"{stages}_bucket{_labels(stage=stage, le=bound)} {n}" for bound, n in s.duration.cumulative()]
+                lines += [f"{stages}_count{_labels(stage=stage)} {s.duration.count}",
+                          f"{stages}_sum{_labels(stage=stage)} {s.duration.sum:.6f}"]
+            lines += [f"# TYPE {failures} counter", f"# HELP {failures} Provisioning stage runs that raised."]
+            lines += [f"{failures}_total{_labels(stage=stage)} {s.failures}" for stage, s in stage_items]
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def write_openmetrics(self, path):
+        """Writes to_openmetrics() to `path`, replacing it atomically."""
+        temporary = f"{path}.tmp"
+        with open(temporary, 'w') as f:
+            f.write(self.to_openmetrics())
+        os.replace(temporary, path)
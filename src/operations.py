@@ -0,0 +1,215 @@
+"""Polling of Google Cloud long-running operations.
+
+Project and folder creation (Resource Manager) and service enablement
+(Service Usage) return long-running operations. `OperationTracker` polls any
+number of them from a single background thread with adaptive backoff: each
+operation is first checked after a sub-second delay and then less and less
+often, up to a cap. Callers get a `concurrent.futures.Future` per operation.
+
+An operation that is not done after config.OPERATION_POLL_TIMEOUT seconds
+fails with OperationError, so a stuck operation cannot hold a worker forever.
+"""
+import threading
+import time
+from concurrent.futures import Future
+
+from src import config
+from src.api import execute
+
+CRM_OPERATIONS_GET = 'cloudresourcemanager.operations.get'
+
+
+class OperationError(Exception):
+    """Raised when a long-running operation finishes with an error."""
+
+    def __init__(self, operation_name, error):
+        super().__init__(f"Operation {operation_name} failed: {error}")
+        self.operation_name = operation_name
+        self.error = error
+
+
+def _timeout_error(operation_name, timeout):
+    return OperationError(operation_name, {'code': 4, 'message': f"not done after {timeout:g}s (DEADLINE_EXCEEDED)"})
+
+
+class _PendingOperation:
+    def __init__(self, name, interval, timeout):
+        self.name = name
+        self.future = Future()
+        self.interval = interval
+        self.next_poll = time.monotonic() + interval
+        self.deadline = time.monotonic() + timeout
+
+
+def _next_interval(interval, multiplier, max_interval):
+    return min(interval * multiplier, max_interval)
+
+
+def _resolve(future, operation_name, operation):
+    """Completes `future` from a finished operation."""
+    if 'error' in operation:
+        future.set_exception(OperationError(operation_name, operation['error']))
+    else:
+        future.set_result(operation)
+
+
+def poll_operation(client, operation_name, initial_interval=None, max_interval=None, multiplier=None,
+                   api_method=CRM_OPERATIONS_GET, timeout=None):
+    """Polls a single operation on the calling thread until it is done.
+
+    `client` is any API client exposing `operations().get(name=...)` and
+    `api_method` the name of that call. Returns the finished operation or
+    raises OperationError, also when it is not done after `timeout` seconds
+    (default config.OPERATION_POLL_TIMEOUT).
+    """
+    return poll_operations(client, [operation_name], initial_interval, max_interval, multiplier, api_method,
+                           timeout)[operation_name]
+
+
+def poll_operations(client, operation_names, initial_interval=None, max_interval=None, multiplier=None,
+                    api_method=CRM_OPERATIONS_GET, timeout=None):
+    """Polls several operations on the calling thread until all of them are done.
+
+    Each round checks every pending operation once and then backs off as
+    poll_operation does, so N operations started together finish in about
+    the time of the slowest. Returns {operation name: finished operation};
+    raises OperationError as soon as one of them has failed or `timeout`
+    seconds have passed with some still pending.
+    """
+    interval = initial_interval or config.OPERATION_POLL_INITIAL_INTERVAL
+    max_interval = max_interval or config.OPERATION_POLL_MAX_INTERVAL
+    multiplier = multiplier or config.OPERATION_POLL_MULTIPLIER
+    timeout = config.OPERATION_POLL_TIMEOUT if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+    pending = list(dict.fromkeys(operation_names))
+    finished = {}
+    while True:
+        for operation_name in list(pending):
+            operation = execute(client.operations().get(name=operation_name), api_method)
+            if operation.get('done'):
+                if 'error' in operation:
+                    raise OperationError(operation_name, operation['error'])
+                finished[operation_name] = operation
+                pending.remove(operation_name)
+        if not pending:
+            return finished
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise _timeout_error(pending[0], timeout)
+        time.sleep(min(interval, remaining))
+        interval = _next_interval(interval, multiplier, max_interval)
+
+
+class OperationTracker:
+    """Polls many pending operations together from one background thread.
+
+    `client` is only ever used from the tracker's own thread, so it must not
+    be shared with other threads (httplib2 is not thread-safe).
+    """
+
+    def __init__(self, client, initial_interval=None, max_interval=None, multiplier=None,
+                 api_method=CRM_OPERATIONS_GET, timeout=None):
+        self.client = client
+        self.api_method = api_method
+        self.initial_interval = initial_interval or config.OPERATION_POLL_INITIAL_INTERVAL
+        self.max_interval = max_interval or config.OPERATION_POLL_MAX_INTERVAL
+        self.multiplier = multiplier or config.OPERATION_POLL_MULTIPLIER
+        self.timeout = config.OPERATION_POLL_TIMEOUT if timeout is None else timeout
+        self.poll_count = 0
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def track(self, operation_name, callback=None):
+        """Starts tracking an operation and returns its Future.
+
+        `callback`, if given, is called with the Future once it completes.
+        Tracking the same operation twice returns the same Future.
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("OperationTracker is closed.")
+            entry = self._pending.get(operation_name)
+            if entry is None:
+                entry = _PendingOperation(operation_name, self.initial_interval, self.timeout)
+                self._pending[operation_name] = entry
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='operation-tracker', daemon=True)
+                    self._thread.start()
+                self._cond.notify()
+        if callback is not None:
+            entry.future.add_done_callback(callback)
+        return entry.future
+
+    def wait(self, operation_name, timeout=None):
+        """Blocks until the operation is done and returns it."""
+        return self.track(operation_name).result(timeout)
+
+    def pending_count(self):
+        with self._cond:
+            return len(self._pending)
+
+    def close(self):
+        """Stops the poller; operations still pending fail with RuntimeError."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+            remaining = list(self._pending.values())
+            self._pending.clear()
+        if self._thread is not None:
+            self._thread.join()
+        for entry in remaining:
+            if not entry.future.done():
+                entry.future.set_exception(RuntimeError(f"Stopped tracking operation {entry.name}."))
+
+    def _due_operations(self):
+        with self._cond:
+            while not self._closed:
+                if not self._pending:
+                    self._cond.wait()
+                    continue
+                now = time.monotonic()
+                due = [entry for entry in self._pending.values() if entry.next_poll <= now]
+                if due:
+                    return due
+                self._cond.wait(min(entry.next_poll for entry in self._pending.values()) - now)
+            return None
+
+    def _run(self):
+        while True:
+            due = self._due_operations()
+            if due is None:
+                return
+            for entry in due:
+                self._poll(entry)
+
+    def _poll(self, entry):
+        try:
+            self.poll_count += 1
+            operation = execute(self.client.operations().get(name=entry.name), self.api_method)
+        except Exception as e:
+            self._finish(entry)
+            entry.future.set_exception(e)
+            return
+        if operation.get('done'):
+            self._finish(entry)
+            _resolve(entry.future, entry.name, operation)
+            return
+        now = time.monotonic()
+        if now >= entry.deadline:
+            self._finish(entry)
+            entry.future.set_exception(_timeout_error(entry.name, self.timeout))
+            return
+        entry.interval = _next_interval(entry.interval, self.multiplier, self.max_interval)
+        entry.next_poll = min(now + entry.interval, entry.deadline)
+
+    def _finish(self, entry):
+        with self._cond:
+            self._pending.pop(entry.name, None)
@@ -0,0 +1,76 @@
+"""Per-constraint diff between the org policies set on a folder and the desired ones.
+
+Applying config.ORGANIZATION_POLICY used to patch every constraint on every
+run. Now each folder's policies are read with one policies.list call (Org
+Policy API v2), compared with the desired specs, and only constraints that
+drifted are written. Reverting deletes the folder's own policies, so the
+folder inherits from its parent again.
+
+Specs are compared after normalization: server-managed fields (etag,
+updateTime) and default values (False, empty lists), which the API leaves
+out of its responses, are dropped.
+"""
+from dataclasses import dataclass
+
+ACTION_CREATE = 'create'
+ACTION_UPDATE = 'update'
+ACTION_DELETE = 'delete'
+ACTION_UNCHANGED = 'unchanged'
+
+SERVER_FIELDS = frozenset(['etag', 'updateTime'])
+
+
+def constraint_id(constraint):
+    """'constraints/gcp.resourceLocations' -> 'gcp.resourceLocations', as used in v2 policy names."""
+    return constraint[len('constraints/'):] if constraint.startswith('constraints/') else constraint
+
+
+def policy_name(folder_id, constraint):
+    return f"folders/{folder_id}/policies/{constraint_id(constraint)}"
+
+
+def normalize_spec(value):
+    """Returns `value` without server-managed fields and default (falsy) values."""
+    if isinstance(value, dict):
+        normalized = {key: normalize_spec(item) for key, item in value.items() if key not in SERVER_FIELDS}
+        return {key: item for key, item in normalized.items() if item not in (None, False, '', [], {})}
+    if isinstance(value, list):
+        return [normalize_spec(item) for item in value]
+    return value
+
+
+@dataclass
+class PolicyChange:
+    """What a run does, or did, to one constraint on one folder."""
+    folder_id: str
+    constraint: str
+    action: str
+    desired: dict = None
+    error: str = None
+
+    @property
+    def name(self):
+        return policy_name(self.folder_id, self.constraint)
+
+
+def diff_policies(folder_id, current, desired):
+    """Compares a folder's policies with the desired ones.
+
+    `current` maps constraint IDs to the specs set on the folder; `desired`
+    maps constraints (with or without the 'constraints/' prefix) to specs, or
+    to None where the folder should inherit from its parent. Returns one
+    PolicyChange per desired constraint, in `desired` order.
+    """
+    changes = []
+    for constraint, spec in desired.items():
+        existing = current.get(constraint_id(constraint))
+        if spec is None:
+            action = ACTION_UNCHANGED if existing is None else ACTION_DELETE
+        elif existing is None:
+            action = ACTION_CREATE
+        elif normalize_spec(existing) == normalize_spec(spec):
+            action = ACTION_UNCHANGED
+        else:
+            action = ACTION_UPDATE
+        changes.append(PolicyChange(folder_id, constraint, action, spec))
+    return changes
@@ -0,0 +1,108 @@
+"""Per-API token-bucket rate limiting.
+
+Project creation, billing updates and service enablement each have their own
+per-minute quota. Every API call is charged to a *surface*: the method itself
+when config.API_RATE_LIMITS_PER_MINUTE names it (e.g.
+'cloudresourcemanager.projects.create'), otherwise '<service>.read' or
+'<service>.write'. Each surface has a token bucket refilled at its configured
+rate.
+
+Rates adapt to what the server says: a 429 halves the surface's rate, and
+every successful call wins a small part of it back, up to the configured
+rate, so a run settles at the highest rate the quota actually allows.
+"""
+import threading
+import time
+
+READ_VERBS = frozenset(['get', 'list', 'search', 'getIamPolicy', 'getBillingInfo', 'getEffectivePolicy'])
+
+# On a 429 the rate is multiplied by THROTTLE_FACTOR, but never drops below
+# MIN_RATE_FRACTION of the configured rate.
+THROTTLE_FACTOR = 0.5
+MIN_RATE_FRACTION = 0.1
+# Each success raises the rate by this fraction of the configured rate.
+RECOVERY_FRACTION = 0.02
+# Bucket capacity, in seconds' worth of tokens at the configured rate.
+BURST_SECONDS = 10
+
+
+def surface_for(api_method, limits):
+    """Maps a method such as 'serviceusage.services.list' to its rate-limit surface."""
+    if api_method in limits:
+        return api_method
+    service = api_method.split('.', 1)[0]
+    verb = api_method.rsplit('.', 1)[-1]
+    return f"{service}.{'read' if verb in READ_VERBS else 'write'}"
+
+
+class TokenBucket:
+    """A thread-safe token bucket whose refill rate adapts to 429 responses."""
+
+    def __init__(self, rate_per_minute, clock=time.monotonic, sleep=time.sleep):
+        self.configured_rate = float(rate_per_minute)
+        self.rate = self.configured_rate
+        self.capacity = max(1.0, self.configured_rate / 60 * BURST_SECONDS)
+        self.throttled = 0
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate / 60)
+        self._updated = now
+
+    def acquire(self):
+        """Takes one token, blocking until one is available."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) * 60 / self.rate
+            self._sleep(wait)
+
+    def record_throttled(self):
+        with self._lock:
+            self.throttled += 1
+            self.rate = max(self.configured_rate * MIN_RATE_FRACTION, self.rate * THROTTLE_FACTOR)
+            self._tokens = min(self._tokens, 0)
+
+    def record_success(self):
+        with self._lock:
+            if self.rate < self.configured_rate:
+                self.rate = min(self.configured_rate, self.rate + self.configured_rate * RECOVERY_FRACTION)
+
+
+class RateLimiter:
+    """One TokenBucket per surface; calls to unconfigured surfaces are not limited."""
+
+    def __init__(self, limits):
+        self.limits = dict(limits)
+        self._buckets = {surface: TokenBucket(rate) for surface, rate in self.limits.items()}
+
+    def bucket(self, api_method):
+        return self._buckets.get(surface_for(api_method, self.limits))
+
+    def acquire(self, api_method):
+        bucket = self.bucket(api_method)
+        if bucket is not None:
+            bucket.acquire()
+
+    def record_throttled(self, api_method):
+        bucket = self.bucket(api_method)
+        if bucket is not None:
+            bucket.record_throttled()
+
+    def record_success(self, api_method):
+        bucket = self.bucket(api_method)
+        if bucket is not None:
+            bucket.record_success()
+
+    def rates(self):
+        """Returns {surface: (current rate, configured rate, 429s seen)}, rates per minute."""
+        return {surface: (bucket.rate, bucket.configured_rate, bucket.throttled)
+                for surface, bucket in sorted(self._buckets.items())}
@@ -0,0 +1,128 @@
+"""Retry policy for transient Google API failures.
+
+A failed call is retried with jittered exponential backoff when the failure
+is transient (429, 500, 502, 503, 504, or a socket timeout / connection
+error) and it is safe to repeat the call:
+
+* Reads and idempotent writes (updateBillingInfo, setIamPolicy with an
+  etag, orgPolicies.patch, batchEnable) are retried on any transient error.
+* Creates are not idempotent: a timeout or 5xx may hide a request that
+  actually went through, so they are only retried on 429, which the server
+  guarantees it rejected.
+
+A `Retry-After` header overrides the computed backoff. Each call gets a
+deadline across all its attempts, and retries across all calls draw on a
+shared RetryBudget, so a real outage fails fast instead of multiplying load.
+"""
+import email.utils
+import random
+import threading
+import time
+
+from googleapiclient.errors import HttpError
+
+RETRYABLE_STATUSES = frozenset([429, 500, 502, 503, 504])
+NON_IDEMPOTENT_METHODS = frozenset([
+    'cloudresourcemanager.projects.create',
+    'cloudresourcemanager.folders.create',
+    'orgpolicy.folders.policies.create',
+    'billingbudgets.billingAccounts.budgets.create',
+])
+
+
+class RetryBudget:
+    """Caps retries at a fraction of calls, plus a reserve for quiet periods.
+
+    Each call deposits `ratio` tokens and each retry withdraws one.
+    """
+
+    def __init__(self, ratio=0.2, reserve=10):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.capacity = reserve * 10
+        self._balance = float(reserve)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._balance = min(self.capacity, self._balance + self.ratio)
+
+    def withdraw(self):
+        """Takes one retry from the budget; returns False if it is exhausted."""
+        with self._lock:
+            if self._balance < 1:
+                return False
+            self._balance -= 1
+            return True
+
+
+def retry_after_seconds(error):
+    """Returns the delay requested by an HttpError's Retry-After header, or None."""
+    headers = getattr(error, 'resp', None) or {}
+    value = headers.get('retry-after') if hasattr(headers, 'get') else None
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error, api_method):
+    """Decides whether a failed call to `api_method` may be retried."""
+    if isinstance(error, HttpError):
+        status = error.resp.status
+        if status == 429:
+            return True
+        return status in RETRYABLE_STATUSES and api_method not in NON_IDEMPOTENT_METHODS
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return api_method not in NON_IDEMPOTENT_METHODS
+    return False
+
+
+class RetryPolicy:
+    """Runs calls with jittered exponential backoff, a deadline and a shared budget."""
+
+    def __init__(self, max_attempts=6, initial_backoff=1.0, max_backoff=32.0, multiplier=2.0, deadline=120.0,
+                 budget=None, clock=time.monotonic, sleep=time.sleep, rand=random.random):
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.multiplier = multiplier
+        self.deadline = deadline
+        self.budget = budget if budget is not None else RetryBudget()
+        # Called as on_retry(api_method, attempt, delay, error) before each retry
+        self.on_retry = None
+        self._clock = clock
+        self._sleep = sleep
+        self._rand = rand
+
+    def backoff(self, attempt):
+        """Full-jitter delay before retry number `attempt` (1-based)."""
+        ceiling = min(self.max_backoff, self.initial_backoff * self.multiplier ** (attempt - 1))
+        return ceiling * self._rand()
+
+    def call(self, func, api_method):
+        """Calls func() until it succeeds, fails permanently, or runs out of attempts, time or budget."""
+        start = self._clock()
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return func()
+            except Exception as e:
+                if not is_retryable(e, api_method) or attempt >= self.max_attempts:
+                    raise
+                delay = retry_after_seconds(e)
+                if delay is None:
+                    delay = self.backoff(attempt)
+                if self._clock() - start + delay > self.deadline or not self.budget.withdraw():
+                    raise
+                if self.on_retry is not None:
+                    self.on_retry(api_method, attempt, delay, e)
+                self._sleep(delay)
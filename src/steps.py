@@ -0,0 +1,97 @@
+"""Per-project provisioning steps, run as a small dependency graph.
+
+After a project is created, billing, IAM and API enablement used to run one
+after another, although only enablement depends on another step (billable
+APIs need the billing link). Each project's steps are now declared with
+their dependencies and run by run_steps: every step starts as soon as the
+steps it requires have succeeded, so independent steps overlap and a
+project takes as long as its critical path. When a step fails, the steps
+that depend on it, directly or not, are cancelled; the others still run.
+
+Steps run on threads of their own, so steps that may overlap must not share
+an httplib2 connection (see src/clients.py).
+"""
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+STEP_OK = 'ok'
+STEP_FAILED = 'failed'
+STEP_CANCELLED = 'cancelled'
+
+
+@dataclass
+class Step:
+    """One unit of work: `func()` runs once every step named in `requires` has succeeded."""
+    name: str
+    func: object
+    requires: tuple = ()
+
+
+def _check_graph(steps):
+    names = [step.name for step in steps]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate step names: {names}")
+    known = set(names)
+    for step in steps:
+        unknown = set(step.requires) - known
+        if unknown:
+            raise ValueError(f"Step '{step.name}' requires unknown steps: {', '.join(sorted(unknown))}")
+    # Kahn's algorithm; anything left over is part of a cycle
+    remaining = {step.name: set(step.requires) for step in steps}
+    while True:
+        ready = [name for name, requires in remaining.items() if not requires]
+        if not ready:
+            break
+        for name in ready:
+            del remaining[name]
+        for requires in remaining.values():
+            requires.difference_update(ready)
+    if remaining:
+        raise ValueError(f"Steps form a cycle: {', '.join(sorted(remaining))}")
+
+
+def run_steps(steps, max_parallel=None):
+    """Runs `steps` (Step objects) in dependency order, overlapping independent ones.
+
+    Returns {step name: STEP_OK} when every step succeeded. Otherwise waits
+    for the steps still running, cancels the dependents of the failed ones
+    and re-raises the error of the first failed step, in `steps` order.
+    """
+    _check_graph(steps)
+    outcomes = {}
+    errors = {}
+    pending = list(steps)
+
+    def start_ready(executor, running):
+        for step in list(pending):
+            states = [outcomes.get(name) for name in step.requires]
+            if any(state in (STEP_FAILED, STEP_CANCELLED) for state in states):
+                outcomes[step.name] = STEP_CANCELLED
+                pending.remove(step)
+            elif all(state == STEP_OK for state in states):
+                running[executor.submit(contextvars.copy_context().run, step.func)] = step
+                pending.remove(step)
+
+    with ThreadPoolExecutor(max_workers=max_parallel or len(steps) or 1, thread_name_prefix='step') as executor:
+        running = {}
+        while True:
+            # Cancelling a step can make its own dependents cancellable, so repeat until stable
+            before = None
+            while before != len(pending):
+                before = len(pending)
+                start_ready(executor, running)
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step = running.pop(future)
+                error = future.exception()
+                outcomes[step.name] = STEP_OK if error is None else STEP_FAILED
+                if error is not None:
+                    errors[step.name] = error
+
+    for step in steps:
+        if step.name in errors:
+            raise errors[step.name]
+    return outcomes
@@ -0,0 +1,50 @@
+"""Plan and report of a post-event teardown of a folder tree.
+
+The tree under a folder is walked once, level by level. Its projects are then
+deleted concurrently, and its folders bottom-up, one level at a time, so that
+every folder is empty by the time it is deleted. A folder whose subtree still
+holds something that could not be deleted is skipped instead of failing with
+"folder is not empty".
+"""
+from dataclasses import dataclass, field
+
+
+@dataclass
+class TeardownPlan:
+    """Everything found under `folder_id`, in walk (top-down) order."""
+    folder_id: str
+    include_root: bool = True
+    # Folder resources, each with an added 'depth' (the root is 0)
+    folders: list = field(default_factory=list)
+    projects: list = field(default_factory=list)
+
+    @property
+    def root_name(self):
+        return f"folders/{self.folder_id}"
+
+    def folders_to_delete(self):
+        return [folder for folder in self.folders if self.include_root or folder['name'] != self.root_name]
+
+    def folder_levels(self):
+        """Returns the folders to delete grouped by depth, deepest level first."""
+        levels = {}
+        for folder in self.folders_to_delete():
+            levels.setdefault(folder['depth'], []).append(folder)
+        return [levels[depth] for depth in sorted(levels, reverse=True)]
+
+    def ancestors(self, parent):
+        """Yields `parent` and every folder above it, up to the root."""
+        parents = {folder['name']: folder.get('parent') for folder in self.folders}
+        while parent in parents:
+            yield parent
+            parent = parents[parent]
+
+
+@dataclass
+class TeardownReport:
+    """Outcome of a teardown; `failures` and `skipped` hold (resource, reason)."""
+    deleted_projects: list = field(default_factory=list)
+    deleted_folders: list = field(default_factory=list)
+    failures: list = field(default_factory=list)
+    skipped: list = field(default_factory=list)
+    elapsed: float = 0.0
@@ -0,0 +1,130 @@
+"""Pool of pre-provisioned playground projects for walk-in attendees.
+
+Creating a project, linking billing and enabling APIs takes minutes, too long
+for someone waiting at the registration desk. Generic projects are therefore
+provisioned ahead of time in the attendee folder: created with the label
+LABEL_POOL=POOL_PENDING, relabelled POOL_READY once billing, APIs and the
+admins' IAM are in place (see main.fill_project_pool). Checking an attendee
+in takes one from the pool in O(1), grants them Editor and renames and
+relabels the project (see main.assign_pool_project). Project IDs cannot change, so a pooled project
+keeps its generic 'config.PROJECT_POOL_ID_PREFIX<suffix>' ID.
+
+A PoolRefiller thread tops the pool back up to config.PROJECT_POOL_SIZE in
+the background, after every check-in and every
+config.PROJECT_POOL_REFILL_INTERVAL seconds.
+"""
+import collections
+import threading
+
+from src import config
+from src.conflicts import random_suffix
+
+LABEL_POOL = 'playground-pool'
+POOL_PENDING = 'pending'
+POOL_READY = 'ready'
+POOL_ASSIGNED = 'assigned'
+
+
+def pool_project_id(suffix=random_suffix):
+    return f"{config.PROJECT_POOL_ID_PREFIX}{suffix()}"
+
+
+class ProjectPool:
+    """Ready project IDs, handed out first in, first out. Thread-safe."""
+
+    def __init__(self, size=None, low_watermark=None):
+        self.size = config.PROJECT_POOL_SIZE if size is None else size
+        self.low_watermark = config.PROJECT_POOL_LOW_WATERMARK if low_watermark is None else low_watermark
+        self._ready = collections.deque()
+        self._filling = 0
+        self._lock = threading.Lock()
+
+    def add(self, project_id):
+        with self._lock:
+            self._ready.append(project_id)
+
+    def put_back(self, project_id):
+        """Returns a project that could not be assigned to the front of the pool."""
+        with self._lock:
+            self._ready.appendleft(project_id)
+
+    def take(self):
+        """Returns the next ready project ID, or None if the pool is empty."""
+        with self._lock:
+            return self._ready.popleft() if self._ready else None
+
+    def level(self):
+        with self._lock:
+            return len(self._ready)
+
+    def filling(self):
+        with self._lock:
+            return self._filling
+
+    def is_low(self):
+        return self.level() < self.low_watermark
+
+    def deficit(self):
+        """Projects missing to reach `size`, not counting those being created."""
+        with self._lock:
+            return max(0, self.size - len(self._ready) - self._filling)
+
+    def start_fill(self, count=None):
+        """Reserves up to `count` (default: the deficit) projects to create; returns how many."""
+        with self._lock:
+            missing = max(0, self.size - len(self._ready) - self._filling)
+            count = missing if count is None else max(0, count)
+            self._filling += count
+            return count
+
+    def end_fill(self, count):
+        with self._lock:
+            self._filling -= count
+
+
+class PoolRefiller:
+    """Background thread that calls `fill()` whenever `pool` is below its size.
+
+    It checks after every wake() and every `interval` seconds. An exception
+    from `fill` is kept in `last_error` and the next check tries again.
+    """
+
+    def __init__(self, pool, fill, interval=None):
+        self.pool = pool
+        self.fill = fill
+        self.interval = config.PROJECT_POOL_REFILL_INTERVAL if interval is None else interval
+        self.last_error = None
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='pool-refill', daemon=True)
+            self._thread.start()
+            self.wake()
+        return self
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stopped.is_set():
+                return
+            if self.pool.deficit() == 0:
+                continue
+            try:
+                self.fill()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
@@ -0,0 +1,131 @@
+"""Tailing a growing CSV file, with a durable cursor of the rows already read.
+
+Registration exports keep growing during an event. A CsvTail reads only
+the bytes appended since its cursor, up to the last complete line, so a row
+that is still being written is left for the next poll. Polling costs one
+stat() while the file is unchanged.
+
+Cursors are kept in a JSON file (config.WATCH_CURSOR_PATH), keyed by the
+CSV file's absolute path: {'offset': bytes read, 'row_number': last row
+read, 'columns': header, 'fingerprint': sha1 of the bytes just before
+offset}. The cursor only moves on commit(), after the rows have been
+provisioned, so rows read before a crash are read again; the provisioning
+journal makes that harmless. A file that shrank, or whose bytes before
+the offset changed, was rewritten rather than appended to, and is read
+again from the start.
+"""
+import csv
+import hashlib
+import io
+import json
+import os
+
+from src.ingest import CsvValidationError, IngestReport, iter_values, read_header
+
+CURSOR_FORMAT = 1
+FINGERPRINT_BYTES = 256
+
+
+class WatchCursor:
+    """Read positions of watched files, persisted as JSON. A None path keeps them in memory only."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._files = {}
+        if path is not None:
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except FileNotFoundError:
+                data = {}
+            if data and data.get('format') != CURSOR_FORMAT:
+                raise ValueError(f"Unsupported watch cursor format in {path}")
+            self._files = data.get('files', {})
+
+    def get(self, csv_path):
+        return self._files.get(os.path.abspath(csv_path))
+
+    def set(self, csv_path, position):
+        self._files[os.path.abspath(csv_path)] = position
+
+    def save(self):
+        if self.path is None:
+            return
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump({'format': CURSOR_FORMAT, 'files': self._files}, f, indent=2, sort_keys=True)
+        os.replace(temporary, self.path)
+
+
+def _fingerprint(f, offset):
+    start = max(0, offset - FINGERPRINT_BYTES)
+    f.seek(start)
+    return hashlib.sha1(f.read(offset - start)).hexdigest()
+
+
+class CsvTail:
+    """Reads the rows appended to a CSV file since the position recorded in a WatchCursor."""
+
+    def __init__(self, path, cursor, required_columns):
+        self.path = path
+        self.cursor = cursor
+        self.required_columns = required_columns
+        self._position = dict(cursor.get(path) or {'offset': 0, 'row_number': 1, 'columns': None, 'fingerprint': None})
+        self._staged = None
+        # Set by poll() when the file was found rewritten and read again from the start
+        self.rewritten = False
+
+    @property
+    def row_number(self):
+        """Number of the last row read and committed; the header is row 1."""
+        return self._position['row_number']
+
+    def _start_over(self):
+        self._position = {'offset': 0, 'row_number': 1, 'columns': None, 'fingerprint': None}
+        self.rewritten = True
+
+    def poll(self, report=None):
+        """Returns [(row_number, {column: value})] for the complete rows appended since the last commit().
+
+        Invalid rows are left out and recorded in `report`. Raises
+        CsvValidationError if the header lacks a required column.
+        """
+        report = report if report is not None else IngestReport()
+        self.rewritten = False
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return []
+        if size == self._position['offset']:
+            return []
+        with open(self.path, 'rb') as f:
+            offset = self._position['offset']
+            if offset and (size < offset or _fingerprint(f, offset) != self._position['fingerprint']):
+                self._start_over()
+                offset = 0
+            f.seek(offset)
+            data = f.read(size - offset)
+            end = data.rfind(b'\n') + 1
+            if not end:
+                return []
+            fingerprint = _fingerprint(f, offset + end)
+
+        records = list(csv.reader(io.StringIO(data[:end].decode('utf-8-sig' if offset == 0 else 'utf-8'), newline='')))
+        columns = self._position['columns']
+        first_row_number = self._position['row_number'] + 1
+        if columns is None:
+            columns = read_header(records[0] if records else None, self.required_columns, report)
+            if columns is None:
+                raise CsvValidationError(self.path, report)
+            records, first_row_number = records[1:], 2
+        self._staged = {'offset': offset + end, 'row_number': first_row_number + len(records) - 1,
+                        'columns': columns, 'fingerprint': fingerprint}
+        return list(iter_values(records, columns, report, first_row_number))
+
+    def commit(self):
+        """Moves the cursor past the rows returned by the last poll() and saves it."""
+        if self._staged is None:
+            return
+        self._position, self._staged = self._staged, None
+        self.cursor.set(self.path, self._position)
+        self.cursor.save()
@@ -0,0 +1,52 @@
+import unittest
+import tempfile
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from src.allocator import ProjectIdMap, allocate_project_ids, disambiguator
+from src.inventory import ProjectRow
+from main import read_attendee_rows
+
+
+def make_rows(*keys_and_ids):
+    return [ProjectRow(number, key, project_id, key, [key]) for number, (key, project_id) in enumerate(keys_and_ids)]
+
+
+class TestAllocateProjectIds(unittest.TestCase):
+
+    def test_colliding_rows_get_order_independent_disambiguators(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write("email\njohn.smith@example.com\njohn_smith@example.com\njane@example.com\n")
+        self.addCleanup(os.remove, f.name)
+        rows = list(read_attendee_rows(f.name))
+        self.assertEqual(rows[0].project_id, rows[1].project_id)
+
+        collisions = allocate_project_ids(rows, 'attendee')
+        self.assertEqual([c.project_id for c in collisions], ['idv-john-smith'])
+        self.assertEqual(rows[0].project_id, f"idv-john-smith-{disambiguator('john.smith@example.com')}")
+        self.assertEqual(rows[2].project_id, 'idv-jane')
+        reordered = list(reversed(list(read_attendee_rows(f.name))))
+        allocate_project_ids(reordered, 'attendee')
+        self.assertEqual({row.key: row.project_id for row in reordered}, {row.key: row.project_id for row in rows})
+
+    def test_mapping_file_is_reused_on_rerun(self):
+        path = os.path.join(tempfile.mkdtemp(), 'ids.json')
+        first = make_rows(('a' * 40, 'team-' + 'a' * 25))
+        allocate_project_ids(first, 'team', ProjectIdMap(path))
+        self.assertEqual(first[0].project_id, 'team-' + 'a' * 25)
+
+        # A later CSV adds a row whose ID collides with the one already handed out
+        second = make_rows(('a' * 40, 'team-' + 'a' * 25), ('a' * 41, 'team-' + 'a' * 25))
+        collisions = allocate_project_ids(second, 'team', ProjectIdMap(path))
+        self.assertEqual(second[0].project_id, 'team-' + 'a' * 25)
+        self.assertEqual(len(second[1].project_id), 30)
+        self.assertNotEqual(second[1].project_id, second[0].project_id)
+        self.assertEqual(list(collisions[0].assigned), ['a' * 41])
+        self.assertEqual(ProjectIdMap(path).get('team', 'a' * 41), second[1].project_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
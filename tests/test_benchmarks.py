@@ -0,0 +1,39 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.bench_provisioning import compare, percentile
+
+
+def results(time_scale=0.01, **metrics):
+    benchmark = {'wall_seconds': 10.0, 'p50_seconds': 0.5, 'p95_seconds': 0.8,
+                 'api_calls_per_project': 17.0, 'peak_memory_mb': 70.0, 'failed': 0}
+    benchmark.update(metrics)
+    return {'time_scale': time_scale, 'benchmarks': {'attendees-100': benchmark}}
+
+
+class TestBenchmarkComparison(unittest.TestCase):
+
+    def test_percentile_uses_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.50), 50)
+        self.assertEqual(percentile(values, 0.95), 95)
+        self.assertEqual(percentile([], 0.95), 0.0)
+
+    def test_growth_within_threshold_passes(self):
+        self.assertEqual(compare(results(wall_seconds=12.0), results()), [])
+
+    def test_regressions_are_reported(self):
+        regressions = compare(results(wall_seconds=13.0, api_calls_per_project=20.0, failed=2), results())
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(any('wall_seconds' in r for r in regressions))
+        self.assertTrue(any('api_calls_per_project' in r for r in regressions))
+
+    def test_different_time_scales_are_not_compared(self):
+        self.assertEqual(len(compare(results(time_scale=0.1), results())), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
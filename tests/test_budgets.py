@@ -0,0 +1,72 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import google.auth.credentials
+from googleapiclient.errors import HttpError
+from src.budgets import ACTION_CREATE, ACTION_UNCHANGED, ACTION_UPDATE, budget_body, index_budgets, plan_budgets
+from src.emulator import Emulator, EmulatorSettings, Fault, DEFAULT_ORGANIZATION_ID
+from main import build_budget_pool, build_client_pool, init_project_folders, provision_folder_budgets, wait_for_operations
+
+
+class TestPlanBudgets(unittest.TestCase):
+
+    def test_budgets_are_matched_by_project(self):
+        projects = [{'projectId': f"hack-{n}", 'name': f"projects/10{n}"} for n in range(3)]
+        existing = [
+            dict(budget_body('hack-0', 'projects/100', 5, [0.5, 1.0]), name='billingAccounts/A/budgets/a'),
+            dict(budget_body('hack-1', 'projects/101', 20, [0.5, 1.0]), name='billingAccounts/A/budgets/b'),
+            # Budgets covering several projects are not per-project budgets
+            dict(budget_body('shared', 'projects/102', 5), name='billingAccounts/A/budgets/c',
+                 budgetFilter={'projects': ['projects/102', 'projects/999']}),
+        ]
+        changes = plan_budgets(projects, index_budgets(existing), 5, [1.0, 0.5])
+        self.assertEqual([(c.action, c.budget_name) for c in changes],
+                         [(ACTION_UNCHANGED, 'billingAccounts/A/budgets/a'), (ACTION_UPDATE, 'billingAccounts/A/budgets/b'),
+                          (ACTION_CREATE, None)])
+
+
+class TestProvisionBudgets(unittest.TestCase):
+
+    def setUp(self):
+        self.emulator = Emulator(EmulatorSettings(operation_duration=0.01)).start()
+        self.addCleanup(self.emulator.stop)
+        clients = build_client_pool(google.auth.credentials.AnonymousCredentials(), emulator_url=self.emulator.url)
+        self.crm_v3 = clients.acquire()[0]
+        self.pool = build_budget_pool(clients.credentials, emulator_url=self.emulator.url)
+        self.addCleanup(self.pool.close)
+        self.billingbudgets_v1, = self.pool.acquire()
+        self.folder_id = init_project_folders(DEFAULT_ORGANIZATION_ID, self.crm_v3)['general']
+        operations = [self.crm_v3.projects().create(body={'projectId': f"hack-budget-{number:02d}", 'parent': f"folders/{self.folder_id}"}).execute()
+                      for number in range(6)]
+        wait_for_operations(self.crm_v3, [operation['name'] for operation in operations])
+
+    def provision(self, amount):
+        return provision_folder_budgets(self.folder_id, amount, self.crm_v3, self.billingbudgets_v1, max_workers=3,
+                                        client_factory=self.pool)
+
+    def test_only_missing_or_mismatched_budgets_are_written(self):
+        self.assertEqual({c.action for c in self.provision(5)}, {ACTION_CREATE})
+        self.assertEqual(len(self.emulator.state.budgets), 6)
+        self.assertEqual({c.action for c in self.provision(5)}, {ACTION_UNCHANGED})
+        self.assertEqual({c.action for c in self.provision(100)}, {ACTION_UPDATE})
+        calls = self.emulator.call_counts()
+        self.assertEqual(calls['billingbudgets.billingAccounts.budgets.list'], 3)
+        self.assertEqual(calls['billingbudgets.billingAccounts.budgets.create'], 6)
+        self.assertEqual(calls['billingbudgets.billingAccounts.budgets.patch'], 6)
+        units = {b['amount']['specifiedAmount']['units'] for b in self.emulator.state.budgets.values()}
+        self.assertEqual(units, {'100'})
+
+    def test_listing_errors_are_raised(self):
+        faults = self.emulator.state.settings.faults
+        faults += [Fault('cloudresourcemanager.projects.list', 403), Fault('cloudresourcemanager.projects.search', 403)]
+        with self.assertRaises(HttpError):
+            self.provision(5)
+        self.assertEqual(self.emulator.state.budgets, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import google.auth.credentials
+from src.clients import ClientPool, SharedCredentials
+from src.emulator import Emulator, EmulatorSettings, DEFAULT_ORGANIZATION_ID
+from src.engine import ProvisioningEngine
+from main import build_client_pool
+
+
+class FakeCredentials:
+    """Credentials whose token expires on demand and whose refresh is slow."""
+
+    def __init__(self):
+        self.token = None
+        self.refreshes = 0
+
+    @property
+    def valid(self):
+        return self.token is not None
+
+    def refresh(self, request):
+        time.sleep(0.05)
+        self.refreshes += 1
+        self.token = f"token-{self.refreshes}"
+
+    def before_request(self, request, method, url, headers):
+        if not self.valid:
+            self.refresh(request)
+        self.apply(headers)
+
+    def apply(self, headers, token=None):
+        headers['authorization'] = f"Bearer {token or self.token}"
+
+
+class TestSharedCredentials(unittest.TestCase):
+
+    def test_concurrent_threads_refresh_once(self):
+        inner = FakeCredentials()
+        credentials = SharedCredentials(inner)
+        headers = [{} for _ in range(8)]
+        threads = [threading.Thread(target=credentials.before_request, args=(None, 'GET', 'url', h)) for h in headers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(inner.refreshes, 1)
+        self.assertEqual({h['authorization'] for h in headers}, {'Bearer token-1'})
+
+    def test_rejected_token_is_refreshed_once(self):
+        inner = FakeCredentials()
+        credentials = SharedCredentials(inner)
+        credentials.refresh(None)
+        # Two workers got a 401 for token-1; only the first one renews it
+        threads = [threading.Thread(target=credentials.refresh, args=(None,)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(credentials.token, 'token-2')
+        self.assertEqual(credentials.refresh_count, 2)
+
+
+class TestClientPool(unittest.TestCase):
+
+    def test_released_clients_are_reused(self):
+        pool = ClientPool(FakeCredentials(), lambda http: (object(), http))
+        with pool.lease() as first:
+            second = pool.acquire()
+        self.assertIsNot(first[1], second[1])
+        self.assertIs(pool.acquire(), first)
+        self.assertEqual(pool.size(), (2, 0))
+
+    def test_engine_returns_worker_clients_to_the_pool(self):
+        emulator = Emulator(EmulatorSettings()).start()
+        self.addCleanup(emulator.stop)
+        pool = build_client_pool(google.auth.credentials.AnonymousCredentials(), emulator_url=emulator.url)
+        self.addCleanup(pool.close)
+
+        def worker(payload, clients):
+            response = clients[0].folders().list(parent=f"organizations/{payload}").execute()
+            return str(len(response.get('folders', [])) + 1)
+
+        engine = ProvisioningEngine(max_workers=3, client_factory=pool)
+        for _ in range(2):
+            summary = engine.run(((i, str(i), DEFAULT_ORGANIZATION_ID) for i in range(12)), worker)
+            self.assertEqual(summary.created, 12)
+        built, idle = pool.size()
+        self.assertLessEqual(built, 3)
+        self.assertEqual(built, idle)
+
+
+if __name__ == '__main__':
+    unittest.main()
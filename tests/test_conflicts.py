@@ -0,0 +1,91 @@
+import unittest
+from unittest.mock import patch
+import tempfile
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import google.auth.credentials
+from src import config
+from src.conflicts import (ConflictResolver, DECISION_ADOPTED, DECISION_GAVE_UP, DECISION_RENAMED, DECISION_SKIPPED,
+                           STRATEGY_SUFFIX, suffixed_id)
+from src.emulator import Emulator, EmulatorSettings, DEFAULT_ORGANIZATION_ID
+from main import build_client_pool, create_project, init_project_folders, provision_playground_projects, wait_for_operations
+
+
+class TestSuffixedId(unittest.TestCase):
+
+    def test_long_ids_are_shortened_to_fit(self):
+        self.assertEqual(suffixed_id('idv-alice', 'a1b2c3'), 'idv-alice-a1b2c3')
+        shortened = suffixed_id('idv-' + 'x' * 22 + '-yz', 'a1b2c3')
+        self.assertEqual(len(shortened), 30)
+        self.assertEqual(shortened, 'idv-' + 'x' * 19 + '-a1b2c3')
+
+
+class TestProjectIdConflicts(unittest.TestCase):
+
+    def setUp(self):
+        for name, value in [('OPERATION_POLL_INITIAL_INTERVAL', 0.01), ('OPERATION_POLL_MAX_INTERVAL', 0.05)]:
+            patcher = patch.object(config, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.emulator = Emulator(EmulatorSettings(operation_duration=0.01)).start()
+        self.addCleanup(self.emulator.stop)
+        self.pool = build_client_pool(google.auth.credentials.AnonymousCredentials(), emulator_url=self.emulator.url)
+        self.addCleanup(self.pool.close)
+        self.crm_v3, self.serviceusage_v1, self.cloudbilling_v1 = self.pool.acquire()
+        self.folder_id = init_project_folders(DEFAULT_ORGANIZATION_ID, self.crm_v3)['general']
+        # 'idv-bob' is taken outside of our organization
+        self.emulator.state.reserved_project_ids.add('idv-bob')
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write("email\nalice@example.com\nbob@example.com\n")
+        self.addCleanup(os.remove, f.name)
+        self.csv_file = f.name
+
+    def provision(self, strategy):
+        return provision_playground_projects(self.csv_file, self.crm_v3, self.serviceusage_v1, self.cloudbilling_v1, self.folder_id,
+                                             max_workers=2, client_factory=self.pool, conflict_strategy=strategy)
+
+    def test_skip(self):
+        summary = self.provision('skip')
+        self.assertEqual((summary.created, summary.skipped, summary.failed), (1, 1, 0))
+        self.assertEqual([(d.project_id, d.decision) for d in summary.conflicts], [('idv-bob', DECISION_SKIPPED)])
+
+    def test_suffix(self):
+        summary = self.provision('suffix')
+        self.assertEqual(summary.created, 2)
+        decision, = summary.conflicts
+        self.assertEqual(decision.decision, DECISION_RENAMED)
+        self.assertRegex(decision.final_project_id, r'^idv-bob-[0-9a-f]{6}$')
+        self.assertIn(decision.final_project_id, self.emulator.state.projects)
+        self.assertTrue(self.emulator.state.billing[decision.final_project_id]['billingEnabled'])
+
+    def test_only_our_projects_are_adopted(self):
+        parent = f"folders/{self.folder_id}"
+        operations = [
+            self.crm_v3.projects().create(body={'projectId': 'idv-alice', 'parent': parent, 'labels': config.PROJECT_LABELS}).execute(),
+            self.crm_v3.projects().create(body={'projectId': 'idv-carol', 'parent': parent}).execute(),
+        ]
+        wait_for_operations(self.crm_v3, [operation['name'] for operation in operations])
+        with open(self.csv_file, 'a') as f:
+            f.write("carol@example.com\n")
+        summary = self.provision('adopt')
+        decisions = {d.project_id: d.decision for d in summary.conflicts}
+        self.assertEqual(decisions, {'idv-alice': DECISION_ADOPTED, 'idv-bob': DECISION_SKIPPED, 'idv-carol': DECISION_SKIPPED})
+        self.assertTrue(self.emulator.state.billing['idv-alice']['billingEnabled'])
+        self.assertNotIn('idv-carol', self.emulator.state.billing)
+
+    def test_gives_up_after_max_attempts(self):
+        self.emulator.state.reserved_project_ids.add('idv-bob-taken')
+        conflicts = ConflictResolver(STRATEGY_SUFFIX, max_attempts=2, suffix=lambda: 'taken')
+        with self.assertRaises(Exception):
+            create_project('idv-bob', 'bob', 'bob@example.com', self.crm_v3, self.serviceusage_v1, self.cloudbilling_v1,
+                           self.folder_id, conflicts=conflicts)
+        self.assertEqual([d.decision for d in conflicts.decisions()], [DECISION_GAVE_UP])
+        self.assertEqual(self.emulator.call_counts()['cloudresourcemanager.projects.create'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from unittest.mock import patch
+import json
+import shutil
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import google.auth.credentials
+from src import discovery
+from src.discovery import DiscoveryCache, DiscoveryError, LazyClient, build_client
+
+
+class TestDiscoveryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_bundled_document_is_stored_and_indexed(self):
+        document = DiscoveryCache(self.directory).document('cloudbilling', 'v1')
+        entry = DiscoveryCache(self.directory).entries()['cloudbilling.v1']
+        self.assertEqual(entry['source'], 'bundled')
+        self.assertEqual(entry['revision'], json.loads(document).get('revision'))
+        with patch.object(discovery, '_bundled_document') as bundled, patch.object(discovery, '_fetch_document') as fetch:
+            self.assertEqual(DiscoveryCache(self.directory).document('cloudbilling', 'v1'), document)
+        bundled.assert_not_called()
+        fetch.assert_not_called()
+
+    def test_tampered_file_is_discarded(self):
+        original = DiscoveryCache(self.directory).document('serviceusage', 'v1')
+        with open(os.path.join(self.directory, 'serviceusage.v1.json'), 'w') as f:
+            f.write('{"tampered": true}')
+        self.assertEqual(DiscoveryCache(self.directory).document('serviceusage', 'v1'), original)
+
+    def test_missing_document_without_network_raises(self):
+        with patch.object(discovery, '_bundled_document', return_value=None), \
+                patch.object(discovery, '_fetch_document', side_effect=OSError('offline')):
+            with self.assertRaises(DiscoveryError):
+                DiscoveryCache(self.directory).document('example', 'v1')
+
+
+class TestLazyClient(unittest.TestCase):
+
+    def test_client_is_built_once_on_first_use(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        cache = DiscoveryCache(directory)
+        credentials = google.auth.credentials.AnonymousCredentials()
+        built = []
+
+        def factory():
+            built.append(True)
+            return build_client('cloudresourcemanager', 'v3', credentials, cache=cache)
+
+        client = LazyClient(factory)
+        self.assertEqual(built, [])
+        client.folders()
+        client.projects()
+        self.assertEqual(built, [True])
+
+
+if __name__ == '__main__':
+    unittest.main()
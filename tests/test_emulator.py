@@ -0,0 +1,86 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import google.auth.credentials
+from googleapiclient.errors import HttpError
+from src.emulator import Emulator, EmulatorSettings, Fault, DEFAULT_ORGANIZATION_ID
+from main import build_service_clients, create_project, list_projects_in_folder, list_enabled_services
+
+
+class TestEmulator(unittest.TestCase):
+
+    def start(self, **settings):
+        emulator = Emulator(EmulatorSettings(**settings)).start()
+        self.addCleanup(emulator.stop)
+        clients = build_service_clients(google.auth.credentials.AnonymousCredentials(), emulator_url=emulator.url)
+        return emulator, clients
+
+    def create_folder(self, crm_v3, display_name='Attendees'):
+        body = {'displayName': display_name, 'parent': f"organizations/{DEFAULT_ORGANIZATION_ID}"}
+        operation = crm_v3.folders().create(body=body).execute()
+        return crm_v3.operations().get(name=operation['name']).execute()['response']['name'].split('/')[1]
+
+    def test_create_project_end_to_end(self):
+        emulator, (crm_v3, serviceusage_v1, cloudbilling_v1) = self.start()
+        folder_id = self.create_folder(crm_v3)
+        self.assertEqual(create_project('hack-test-01', 'Hack Test', 'a@example.com',
+                                        crm_v3, serviceusage_v1, cloudbilling_v1, folder_id), 'hack-test-01')
+        self.assertEqual([p['projectId'] for p in list_projects_in_folder(folder_id, crm_v3)], ['hack-test-01'])
+        self.assertIn('storage.googleapis.com', list_enabled_services('hack-test-01', serviceusage_v1))
+        self.assertTrue(emulator.state.billing['hack-test-01']['billingEnabled'])
+        self.assertEqual(emulator.call_counts()['cloudresourcemanager.projects.create'], 1)
+
+    def test_operations_take_their_configured_duration(self):
+        emulator, (crm_v3, _, _) = self.start(operation_duration={'cloudresourcemanager.folders.create': 60})
+        operation = crm_v3.folders().create(body={'displayName': 'Slow', 'parent': f"organizations/{DEFAULT_ORGANIZATION_ID}"}).execute()
+        self.assertFalse(crm_v3.operations().get(name=operation['name']).execute()['done'])
+
+    def test_duplicate_project_id_conflicts(self):
+        emulator, (crm_v3, _, _) = self.start()
+        body = {'projectId': 'hack-test-02', 'parent': f"folders/{self.create_folder(crm_v3)}"}
+        crm_v3.projects().create(body=body).execute()
+        with self.assertRaises(HttpError) as raised:
+            crm_v3.projects().create(body=body).execute()
+        self.assertEqual(raised.exception.resp.status, 409)
+
+    def test_stale_iam_etag_is_rejected(self):
+        emulator, (crm_v3, _, _) = self.start()
+        crm_v3.projects().create(body={'projectId': 'hack-test-03', 'parent': f"folders/{self.create_folder(crm_v3)}"}).execute()
+        policy = crm_v3.projects().getIamPolicy(resource='projects/hack-test-03', body={}).execute()
+        crm_v3.projects().setIamPolicy(resource='projects/hack-test-03', body={'policy': policy}).execute()
+        with self.assertRaises(HttpError) as raised:
+            crm_v3.projects().setIamPolicy(resource='projects/hack-test-03', body={'policy': policy}).execute()
+        self.assertEqual(raised.exception.resp.status, 409)
+
+    def test_quota_answers_429_with_retry_after(self):
+        emulator, (crm_v3, _, _) = self.start(quotas={'cloudresourcemanager.read': 2})
+        name = f"organizations/{DEFAULT_ORGANIZATION_ID}"
+        crm_v3.organizations().get(name=name).execute()
+        crm_v3.organizations().get(name=name).execute()
+        with self.assertRaises(HttpError) as raised:
+            crm_v3.organizations().get(name=name).execute()
+        self.assertEqual(raised.exception.resp.status, 429)
+        self.assertIn('retry-after', raised.exception.resp)
+
+    def test_injected_faults_are_bounded(self):
+        emulator, (crm_v3, _, _) = self.start(faults=[Fault('cloudresourcemanager.organizations.*', status=503, times=1)])
+        name = f"organizations/{DEFAULT_ORGANIZATION_ID}"
+        with self.assertRaises(HttpError) as raised:
+            crm_v3.organizations().get(name=name).execute()
+        self.assertEqual(raised.exception.resp.status, 503)
+        self.assertEqual(crm_v3.organizations().get(name=name).execute()['name'], name)
+
+    def test_enablement_requires_billing(self):
+        emulator, (crm_v3, serviceusage_v1, _) = self.start()
+        crm_v3.projects().create(body={'projectId': 'hack-test-04', 'parent': f"folders/{self.create_folder(crm_v3)}"}).execute()
+        with self.assertRaises(HttpError) as raised:
+            serviceusage_v1.services().batchEnable(parent='projects/hack-test-04', body={'serviceIds': ['run.googleapis.com']}).execute()
+        self.assertEqual(raised.exception.resp.status, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import threading
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.engine import ProvisioningEngine, STATUS_CREATED, STATUS_SKIPPED, STATUS_FAILED
+
+
+def make_tasks(count):
+    return [(row_number, f"key{row_number}", row_number) for row_number in range(count)]
+
+
+class TestProvisioningEngine(unittest.TestCase):
+
+    def test_sequential_without_client_factory(self):
+        shared = object()
+        seen = []
+
+        def worker(payload, clients):
+            seen.append(clients)
+            return f"project-{payload}"
+
+        engine = ProvisioningEngine(max_workers=8, shared_clients=shared)
+        self.assertEqual(engine.max_workers, 1)
+        summary = engine.run(make_tasks(3), worker)
+        self.assertEqual(summary.created, 3)
+        self.assertTrue(all(clients is shared for clients in seen))
+
+    def test_sequential_run_releases_leased_clients(self):
+        class Factory:
+            def __init__(self):
+                self.acquired = self.released = 0
+
+            def __call__(self):
+                self.acquired += 1
+                return object()
+
+            def release(self, clients):
+                self.released += 1
+
+        factory = Factory()
+        engine = ProvisioningEngine(max_workers=1, client_factory=factory)
+        for _ in range(3):
+            self.assertEqual(engine.run(make_tasks(2), lambda payload, clients: f"project-{payload}").created, 2)
+        self.assertEqual((factory.acquired, factory.released), (3, 3))
+
+    def test_statuses_are_aggregated(self):
+        def worker(payload, clients):
+            if payload == 1:
+                return None
+            if payload == 2:
+                raise RuntimeError("boom")
+            return f"project-{payload}"
+
+        summary = ProvisioningEngine(max_workers=1).run(make_tasks(3), worker)
+        self.assertEqual([result.status for result in summary.results], [STATUS_CREATED, STATUS_SKIPPED, STATUS_FAILED])
+        self.assertEqual(summary.failures()[0].error, "boom")
+
+    def test_concurrent_run_uses_one_client_set_per_thread(self):
+        lock = threading.Lock()
+        built = []
+        active = [0]
+        peak = [0]
+
+        def client_factory():
+            clients = object()
+            with lock:
+                built.append(threading.get_ident())
+            return clients
+
+        def worker(payload, clients):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.01)
+            with lock:
+                active[0] -= 1
+            return f"project-{payload}"
+
+        engine = ProvisioningEngine(max_workers=4, client_factory=client_factory)
+        summary = engine.run(make_tasks(20), worker)
+        self.assertEqual(summary.created, 20)
+        self.assertEqual([result.row_number for result in summary.results], list(range(20)))
+        self.assertLessEqual(peak[0], 4)
+        self.assertGreater(peak[0], 1)
+        self.assertEqual(len(built), len(set(built)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from unittest.mock import patch
+import builtins
+import tempfile
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import google.auth.credentials
+from src import config
+from src.emulator import Emulator, EmulatorSettings, DEFAULT_ORGANIZATION_ID
+from src.estimate import BOUND_CONCURRENCY, Estimator, operation_polls
+from src.inventory import ACTION_CREATE
+from main import build_client_pool, init_project_folders, provision_playground_projects
+
+
+class TestEstimator(unittest.TestCase):
+
+    def test_wall_time_is_the_longer_of_concurrency_and_quota(self):
+        estimator = Estimator(latencies={'*': 1.0}, operation_seconds={}, limits={'api.things.create': 60})
+        # 40 items, 4 at a time, 2 seconds each: 20 seconds; the quota lets 10 through at once, then 1 per second
+        estimator.add_phase('few', {'api.things.create': 1, 'api.things.get': 1}, items=40, workers=4)
+        estimator.add_phase('many', {'api.things.create': 1, 'api.things.get': 1}, items=400, workers=400)
+        self.assertEqual(estimator.estimate.phases, [('few', 30.0, 'api.things.create'), ('many', 390.0, 'api.things.create')])
+        estimator = Estimator(latencies={'*': 1.0}, operation_seconds={'api.things.create': 10}, limits={})
+        estimator.add_phase('ops', {'api.things.create': 1}, items=8, workers=4)
+        self.assertEqual(estimator.estimate.phases, [('ops', 22.0, BOUND_CONCURRENCY)])
+        self.assertEqual(estimator.estimate.calls, {'api.things.create': 8, 'api.operations.get': 8 * operation_polls(10)})
+
+
+class TestDryRun(unittest.TestCase):
+
+    def setUp(self):
+        self.emulator = Emulator(EmulatorSettings(operation_duration=0.01)).start()
+        self.addCleanup(self.emulator.stop)
+        self.pool = build_client_pool(google.auth.credentials.AnonymousCredentials(), emulator_url=self.emulator.url)
+        self.addCleanup(self.pool.close)
+        self.crm_v3, self.serviceusage_v1, self.cloudbilling_v1 = self.pool.acquire()
+
+    def mutations(self):
+        return {method: count for method, count in self.emulator.call_counts().items()
+                if not method.endswith(('.get', '.list', '.search', '.getIamPolicy'))}
+
+    def test_init_and_provision_only_read(self):
+        folder_ids = init_project_folders(DEFAULT_ORGANIZATION_ID, self.crm_v3, dry_run=True)
+        self.assertEqual(set(folder_ids.values()), {None})
+        self.assertEqual(self.mutations(), {})
+
+        folder_id = init_project_folders(DEFAULT_ORGANIZATION_ID, self.crm_v3)['general']
+        before = self.mutations()
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write("email\n" + "".join(f"user{number}@example.com\n" for number in range(20)))
+        self.addCleanup(os.remove, f.name)
+        plan = provision_playground_projects(f.name, self.crm_v3, self.serviceusage_v1, self.cloudbilling_v1, folder_id,
+                                             max_workers=4, client_factory=self.pool, dry_run=True)
+        self.assertEqual(self.mutations(), before)
+        self.assertEqual(plan.counts()[ACTION_CREATE], 20)
+        self.assertEqual(plan.estimate.calls['cloudresourcemanager.projects.create'], 20)
+        self.assertEqual(plan.estimate.calls['cloudbilling.projects.updateBillingInfo'], 20)
+        self.assertGreater(plan.estimate.wall_seconds, 5 * config.ESTIMATE_OPERATION_SECONDS['cloudresourcemanager.projects.create'])
+
+    def test_csv_is_read_in_one_pass(self):
+        folder_id = init_project_folders(DEFAULT_ORGANIZATION_ID, self.crm_v3)['general']
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write("email\nalice@example.com\nnot-an-email\nbob@example.com\n")
+        self.addCleanup(os.remove, f.name)
+        with patch.object(builtins, 'open', wraps=builtins.open) as opened:
+            plan = provision_playground_projects(f.name, self.crm_v3, self.serviceusage_v1, self.cloudbilling_v1, folder_id,
+                                                 skip_invalid=True, dry_run=True)
+        self.assertEqual([call.args[0] for call in opened.call_args_list].count(f.name), 1)
+        self.assertEqual([row.key for row in plan.rows], ['alice@example.com', 'bob@example.com'])
+
+
+if __name__ == '__main__':
+    unittest.main()
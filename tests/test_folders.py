@@ -0,0 +1,49 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import google.auth.credentials
+from src.emulator import Emulator, EmulatorSettings, DEFAULT_ORGANIZATION_ID
+from main import build_service_clients, init_project_folders
+
+
+class TestInitProjectFolders(unittest.TestCase):
+
+    def setUp(self):
+        self.emulator = Emulator(EmulatorSettings(operation_duration=0.01)).start()
+        self.addCleanup(self.emulator.stop)
+        self.crm_v3 = build_service_clients(google.auth.credentials.AnonymousCredentials(), emulator_url=self.emulator.url)[0]
+
+    def test_fresh_tree_lists_each_parent_once(self):
+        folder_ids = init_project_folders(DEFAULT_ORGANIZATION_ID, self.crm_v3)
+        self.assertEqual(list(folder_ids), ['main', 'general', 'team1', 'team2'])
+        parents = {folder['parent'] for folder in self.emulator.state.folders.values()}
+        self.assertEqual(parents, {f"organizations/{DEFAULT_ORGANIZATION_ID}", f"folders/{folder_ids['main']}"})
+        calls = self.emulator.call_counts()
+        self.assertEqual(calls['cloudresourcemanager.folders.list'], 2)
+        self.assertEqual(calls['cloudresourcemanager.folders.create'], 4)
+
+    def test_rerun_creates_only_missing_batches(self):
+        first = init_project_folders(DEFAULT_ORGANIZATION_ID, self.crm_v3)
+        tree = {
+            'main': ("Hackathon Playground", None),
+            'general': ("Individual Attendees", 'main'),
+            'team1': ("Hackathon Batch1", 'main'),
+            'team2': ("Hackathon Batch2", 'main'),
+            'team3': ("Hackathon Batch3", 'main'),
+        }
+        second = init_project_folders(DEFAULT_ORGANIZATION_ID, self.crm_v3, tree=tree)
+        self.assertEqual({key: second[key] for key in first}, first)
+        self.assertIn('team3', second)
+        self.assertEqual(self.emulator.call_counts()['cloudresourcemanager.folders.create'], 5)
+
+    def test_unknown_parent_is_rejected(self):
+        with self.assertRaises(Exception):
+            init_project_folders(DEFAULT_ORGANIZATION_ID, self.crm_v3, tree={'orphan': ("Orphan", 'missing')})
+
+
+if __name__ == '__main__':
+    unittest.main()
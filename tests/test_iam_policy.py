@@ -0,0 +1,73 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from googleapiclient.errors import HttpError
+from main import merge_policy_members, apply_iam_members
+
+
+def http_error(status):
+    resp = MagicMock()
+    resp.status = status
+    return HttpError(resp, b'{}')
+
+
+class TestMergePolicyMembers(unittest.TestCase):
+
+    def test_members_are_merged_into_one_binding_per_role(self):
+        policy = {'bindings': [
+            {'role': 'roles/owner', 'members': ['user:a@example.com']},
+            {'role': 'roles/owner', 'members': ['user:b@example.com']},
+            {'role': 'roles/viewer', 'members': ['user:c@example.com']},
+        ]}
+        changed = merge_policy_members(policy, {
+            'roles/owner': ['user:a@example.com', 'user:b@example.com'],
+            'roles/editor': ['user:d@example.com'],
+        })
+        self.assertTrue(changed)
+        self.assertEqual(policy['bindings'], [
+            {'role': 'roles/owner', 'members': ['user:a@example.com', 'user:b@example.com']},
+            {'role': 'roles/viewer', 'members': ['user:c@example.com']},
+            {'role': 'roles/editor', 'members': ['user:d@example.com']},
+        ])
+
+    def test_unchanged_policy_is_reported(self):
+        policy = {'bindings': [{'role': 'roles/editor', 'members': ['user:a@example.com']}]}
+        self.assertFalse(merge_policy_members(policy, {'roles/editor': ['user:a@example.com']}))
+
+    def test_conditional_bindings_are_left_alone(self):
+        conditional = {'role': 'roles/editor', 'members': ['user:a@example.com'], 'condition': {'expression': 'true'}}
+        policy = {'bindings': [dict(conditional)]}
+        self.assertTrue(merge_policy_members(policy, {'roles/editor': ['user:a@example.com']}))
+        self.assertEqual(policy['bindings'][0], conditional)
+        self.assertEqual(len(policy['bindings']), 2)
+
+
+class TestApplyIamMembers(unittest.TestCase):
+
+    def test_write_is_skipped_when_nothing_changes(self):
+        crm_v3 = MagicMock()
+        crm_v3.projects().getIamPolicy.return_value.execute.return_value = {
+            'etag': 'BwX', 'bindings': [{'role': 'roles/editor', 'members': ['user:a@example.com']}]}
+        self.assertFalse(apply_iam_members('p', {'roles/editor': ['user:a@example.com']}, crm_v3))
+        crm_v3.projects().setIamPolicy.assert_not_called()
+
+    def test_etag_conflict_rereads_and_retries(self):
+        crm_v3 = MagicMock()
+        crm_v3.projects().getIamPolicy.return_value.execute.side_effect = [
+            {'etag': 'v1', 'bindings': []},
+            {'etag': 'v2', 'bindings': [{'role': 'roles/viewer', 'members': ['user:x@example.com']}]},
+        ]
+        crm_v3.projects().setIamPolicy.return_value.execute.side_effect = [http_error(409), {}]
+        self.assertTrue(apply_iam_members('p', {'roles/editor': ['user:a@example.com']}, crm_v3))
+        written = crm_v3.projects().setIamPolicy.call_args.kwargs['body']['policy']
+        self.assertEqual(written['etag'], 'v2')
+        self.assertEqual(len(written['bindings']), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import tempfile
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.ingest import IngestReport, iter_attendees, iter_teams, validate_file
+
+
+class TestIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_csv(self, content):
+        path = os.path.join(self.tmpdir.name, 'input.csv')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_attendees_are_normalized_and_deduplicated(self):
+        path = self.write_csv("\ufeffEmail\n A@Example.com \n\nnot-an-email\na@example.com\nb@example.com\n")
+        report = IngestReport()
+        rows = list(iter_attendees(path, report))
+        self.assertEqual(rows, [(2, 'a@example.com'), (6, 'b@example.com')])
+        self.assertEqual((report.rows, report.valid, report.duplicates), (4, 2, 1))
+        self.assertEqual([error.row_number for error in report.errors], [4])
+
+    def test_team_rows_are_validated(self):
+        path = self.write_csv(
+            "team_name,team_members\n"
+            "alpha,m1@example.com|M1@example.com|m2@example.com\n"
+            "beta,m3@example.com,m4@example.com\n"
+            "gamma,bad-member\n"
+            ",m5@example.com\n"
+            "delta,\n"
+            "Alpha,m6@example.com\n")
+        report = IngestReport()
+        rows = list(iter_teams(path, report))
+        self.assertEqual(rows, [(2, 'alpha', ['m1@example.com', 'm2@example.com'])])
+        self.assertEqual([error.row_number for error in report.errors], [3, 4, 5, 6])
+        self.assertEqual(report.duplicates, 1)
+
+    def test_missing_column_is_reported(self):
+        report = validate_file(self.write_csv("name\nalpha\n"), iter_teams)
+        self.assertFalse(report.ok)
+        self.assertIn('team_members', report.errors[0].message)
+
+    def test_large_file_streams(self):
+        path = self.write_csv("email\n" + "".join(f"user{i}@example.com\n" for i in range(100000)))
+        report = validate_file(path, iter_attendees)
+        self.assertEqual((report.valid, report.duplicates), (100000, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.inventory import ProjectRow, plan_rows, ACTION_CREATE, ACTION_REPAIR, ACTION_SKIP
+from src.journal import ProvisioningJournal, KIND_ATTENDEE, STEPS, STEP_CREATED
+
+
+def make_row(row_number, key):
+    return ProjectRow(row_number, key, f"idv-{key}", f"idv attendee {key}", [f"{key}@example.com"])
+
+
+class TestPlanRows(unittest.TestCase):
+
+    def test_rows_are_classified_against_index(self):
+        journal = ProvisioningJournal(':memory:')
+        journal.entry(KIND_ATTENDEE, 'done').mark_done(STEP_CREATED)
+        for step in STEPS:
+            journal.entry(KIND_ATTENDEE, 'complete').mark_done(step)
+        index = {
+            'idv-done': {'projectId': 'idv-done', 'state': 'ACTIVE'},
+            'idv-complete': {'projectId': 'idv-complete', 'state': 'ACTIVE'},
+            'idv-deleted': {'projectId': 'idv-deleted', 'state': 'DELETE_REQUESTED'},
+        }
+        rows = [make_row(2, 'new'), make_row(3, 'done'), make_row(4, 'complete'), make_row(5, 'deleted')]
+        plan = plan_rows(rows, index, KIND_ATTENDEE, journal)
+        self.assertEqual([row.action for row in plan.rows], [ACTION_CREATE, ACTION_REPAIR, ACTION_SKIP, ACTION_SKIP])
+        self.assertIn('DELETE_REQUESTED', plan.rows[3].reason)
+        self.assertEqual(plan.counts(), {ACTION_CREATE: 1, ACTION_REPAIR: 1, ACTION_SKIP: 2})
+
+    def test_existing_project_without_journal_is_skipped(self):
+        plan = plan_rows([make_row(2, 'a')], {'idv-a': {'projectId': 'idv-a'}}, KIND_ATTENDEE)
+        self.assertEqual(plan.rows[0].action, ACTION_SKIP)
+
+    def test_journaled_project_id_takes_precedence(self):
+        journal = ProvisioningJournal(':memory:')
+        journal.entry(KIND_ATTENDEE, 'a').record_create('idv-a-1f2e3d', 'operations/cp.1')
+        plan = plan_rows([make_row(2, 'a')], {'idv-a-1f2e3d': {'projectId': 'idv-a-1f2e3d'}}, KIND_ATTENDEE, journal)
+        self.assertEqual(plan.rows[0].project_id, 'idv-a-1f2e3d')
+        self.assertEqual(plan.rows[0].action, ACTION_REPAIR)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import tempfile
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.journal import (
+    ProvisioningJournal, KIND_ATTENDEE, KIND_TEAM, STEPS,
+    STEP_CREATED, STEP_BILLING_LINKED,
+)
+
+
+class TestProvisioningJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'journal.db')
+        self.journal = ProvisioningJournal(self.path)
+
+    def tearDown(self):
+        self.journal.close()
+        self.tmpdir.cleanup()
+
+    def test_steps_survive_reopen(self):
+        entry = self.journal.entry(KIND_ATTENDEE, 'a@example.com')
+        entry.record_create('idv-a', 'operations/cp.1')
+        entry.mark_done(STEP_CREATED)
+        entry.mark_done(STEP_BILLING_LINKED)
+        self.journal.close()
+
+        self.journal = ProvisioningJournal(self.path)
+        entry = self.journal.entry(KIND_ATTENDEE, 'a@example.com')
+        self.assertEqual(entry.project_id, 'idv-a')
+        self.assertEqual(entry.create_operation, 'operations/cp.1')
+        self.assertTrue(entry.is_done(STEP_BILLING_LINKED))
+        self.assertFalse(entry.is_complete())
+
+    def test_status_and_reset_by_kind(self):
+        done = self.journal.entry(KIND_TEAM, 'alpha')
+        for step in STEPS:
+            done.mark_done(step)
+        self.journal.entry(KIND_TEAM, 'beta').record_error('boom')
+        self.journal.entry(KIND_ATTENDEE, 'a@example.com').mark_done(STEP_CREATED)
+
+        self.assertEqual(self.journal.status(KIND_TEAM), (2, 1, 1))
+        self.journal.reset(KIND_TEAM)
+        self.assertEqual(self.journal.status(KIND_TEAM), (0, 0, 0))
+        self.assertEqual(self.journal.status(KIND_ATTENDEE), (1, 0, 0))
+
+    def test_unknown_step_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.journal.entry(KIND_TEAM, 'alpha').mark_done('budget; DROP TABLE rows')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from main import iter_pages, list_folders, list_projects_in_folder
+
+
+def paged_method(pages, items_key):
+    """A fake list method returning `pages` in order, chained by nextPageToken."""
+    calls = []
+
+    def method(**kwargs):
+        calls.append(kwargs)
+        index = int(kwargs.get('pageToken') or 0)
+        response = {items_key: pages[index]}
+        if index + 1 < len(pages):
+            response['nextPageToken'] = str(index + 1)
+        request = MagicMock()
+        request.execute.return_value = response
+        return request
+
+    method.calls = calls
+    return method
+
+
+class TestListing(unittest.TestCase):
+
+    def test_iter_pages_is_lazy_and_follows_tokens(self):
+        method = paged_method([[1, 2], [3], [4]], 'items')
+        items = iter_pages(method, 'test.items.list', 'items', page_size=2, parent='folders/1')
+        self.assertEqual(next(items), 1)
+        self.assertEqual(len(method.calls), 1)
+        self.assertEqual(list(items), [2, 3, 4])
+        self.assertEqual([call['pageToken'] for call in method.calls], [None, '1', '2'])
+        self.assertTrue(all(call['pageSize'] == 2 for call in method.calls))
+
+    def test_list_projects_reads_every_page(self):
+        crm_v3 = MagicMock()
+        crm_v3.projects().list = paged_method([[{'projectId': 'a'}], [{'projectId': 'b'}]], 'projects')
+        self.assertEqual([p['projectId'] for p in list_projects_in_folder('123', crm_v3)], ['a', 'b'])
+
+    def test_filters_use_search(self):
+        crm_v3 = MagicMock()
+        crm_v3.folders().search = paged_method([[
+            {'displayName': 'Hackathon Batch1', 'state': 'ACTIVE'},
+            {'displayName': 'Individual Attendees', 'state': 'ACTIVE'},
+        ]], 'folders')
+        folders = list(list_folders('123', crm_v3, state='ACTIVE', display_name_prefix='Hackathon'))
+        self.assertEqual([f['displayName'] for f in folders], ['Hackathon Batch1'])
+        self.assertEqual(crm_v3.folders().search.calls[0]['query'],
+                         'parent=folders/123 AND state=ACTIVE AND displayName="Hackathon*"')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -22,7 +22,7 @@ from config import PLAYGROUND_PROJECT_SUFFIX, TEAM_PROJECT_SUFFIX
 class TestProjectProvisioning(unittest.TestCase):
 
     @patch('main.get_credentials')
-    @patch('main.build')
+    @patch('main.build_client')
     @patch('main.provision_playground_projects')
     @patch('main.provision_team_projects')
     @patch('main.init_project_folders')
@@ -115,8 +115,14 @@ class TestProjectProvisioning(unittest.TestCase):
 
     def test_enable_apis(self):
         mock_serviceusage_v1 = MagicMock()
-        enable_apis('test-project', mock_serviceusage_v1)
-        self.assertGreater(mock_serviceusage_v1.services().enable.call_count, 0)
+        mock_serviceusage_v1.services().list.return_value.execute.return_value = {
+            'services': [{'config': {'name': 'run.googleapis.com'}}]
+        }
+        mock_serviceusage_v1.services().batchEnable.return_value.execute.return_value = {'name': 'operations/noop.DONE_OPERATION', 'done': True}
+        enabled = enable_apis('test-project', mock_serviceusage_v1)
+        self.assertNotIn('run.googleapis.com', enabled)
+        mock_serviceusage_v1.services().batchEnable.assert_called_once()
+        mock_serviceusage_v1.services().enable.assert_not_called()
 
     
 
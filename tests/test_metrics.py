@@ -0,0 +1,73 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from googleapiclient.errors import HttpError
+from src import api
+from src.metrics import Histogram, MetricsRegistry
+
+
+def http_error(status):
+    resp = MagicMock()
+    resp.status = status
+    return HttpError(resp, b'{}')
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_quantiles_come_from_bucket_bounds(self):
+        histogram = Histogram(buckets=(0.1, 1.0, 10.0))
+        for value in [0.05] * 50 + [0.5] * 45 + [5.0] * 5:
+            histogram.observe(value)
+        self.assertEqual(histogram.quantile(0.5), 0.1)
+        self.assertEqual(histogram.quantile(0.95), 1.0)
+        self.assertEqual(histogram.quantile(1.0), 5.0)
+        self.assertEqual(list(histogram.cumulative()), [(0.1, 50), (1.0, 95), (10.0, 100), ('+Inf', 100)])
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def test_failed_stages_are_counted_and_reraised(self):
+        registry = MetricsRegistry()
+        with self.assertRaises(ValueError):
+            with registry.stage('billing_linked'):
+                raise ValueError('boom')
+        with registry.stage('billing_linked'):
+            pass
+        (stage, runs, failures, _, _, _), = registry.stage_summary()
+        self.assertEqual((stage, runs, failures), ('billing_linked', 2, 1))
+
+    def test_openmetrics_export(self):
+        registry = MetricsRegistry()
+        registry.record_call('cloudbilling.projects.updateBillingInfo', 0.2)
+        registry.record_call('cloudbilling.projects.updateBillingInfo', 0.3, http_error(429))
+        registry.record_retry('cloudbilling.projects.updateBillingInfo')
+        text = registry.to_openmetrics()
+        self.assertIn('playground_api_calls_total{method="cloudbilling.projects.updateBillingInfo"} 2', text)
+        self.assertIn('playground_api_errors_total{method="cloudbilling.projects.updateBillingInfo",error="http_429"} 1', text)
+        self.assertIn('playground_api_retries_total{method="cloudbilling.projects.updateBillingInfo"} 1', text)
+        self.assertIn('playground_api_call_duration_seconds_bucket{method="cloudbilling.projects.updateBillingInfo",le="+Inf"} 2', text)
+        self.assertTrue(text.endswith('# EOF\n'))
+
+
+class TestExecuteInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        api.metrics.reset()
+        self.addCleanup(api.metrics.reset)
+
+    def test_every_attempt_and_retry_is_recorded(self):
+        request = MagicMock()
+        request.execute.side_effect = [http_error(503), {'name': 'ok'}]
+        with patch.object(api.retry_policy, '_sleep'):
+            self.assertEqual(api.execute(request, 'serviceusage.services.list'), {'name': 'ok'})
+        (method, calls, errors, retries, _, _, _), = api.metrics.call_summary()
+        self.assertEqual((method, calls, errors, retries), ('serviceusage.services.list', 2, 1, 1))
+        self.assertEqual(api.metrics.error_counts(), {('serviceusage.services.list', 'http_503'): 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+from unittest.mock import MagicMock
+import threading
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.operations import OperationTracker, OperationError, poll_operation, poll_operations
+
+
+class FakeOperationsClient:
+    """Operations whose `done` flag flips after a fixed number of polls."""
+
+    def __init__(self, polls_until_done, errors=()):
+        self.polls_until_done = dict(polls_until_done)
+        self.errors = set(errors)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def operations(self):
+        return self
+
+    def get(self, name):
+        with self._lock:
+            self.calls.append(name)
+            polls = self.calls.count(name)
+        operation = {'name': name, 'done': polls >= self.polls_until_done[name]}
+        if operation['done'] and name in self.errors:
+            operation['error'] = {'code': 9, 'message': 'failed'}
+        request = MagicMock()
+        request.execute.return_value = operation
+        return request
+
+
+class TestPollOperation(unittest.TestCase):
+
+    def test_returns_finished_operation(self):
+        client = FakeOperationsClient({'operations/a': 3})
+        operation = poll_operation(client, 'operations/a', initial_interval=0.001)
+        self.assertTrue(operation['done'])
+        self.assertEqual(len(client.calls), 3)
+
+    def test_raises_on_operation_error(self):
+        client = FakeOperationsClient({'operations/a': 1}, errors=['operations/a'])
+        with self.assertRaises(OperationError):
+            poll_operation(client, 'operations/a', initial_interval=0.001)
+
+    def test_polls_many_operations_in_rounds(self):
+        client = FakeOperationsClient({'operations/a': 1, 'operations/b': 3})
+        operations = poll_operations(client, ['operations/a', 'operations/b'], initial_interval=0.001)
+        self.assertEqual(set(operations), {'operations/a', 'operations/b'})
+        # a is done on the first round and not polled again; b takes three rounds
+        self.assertEqual(len(client.calls), 4)
+
+    def test_gives_up_after_timeout(self):
+        client = FakeOperationsClient({'operations/a': 1, 'operations/stuck': float('inf')})
+        with self.assertRaises(OperationError) as caught:
+            poll_operations(client, ['operations/a', 'operations/stuck'], initial_interval=0.001, timeout=0.05)
+        self.assertEqual(caught.exception.operation_name, 'operations/stuck')
+
+
+class TestOperationTracker(unittest.TestCase):
+
+    def test_tracks_many_operations_from_one_thread(self):
+        client = FakeOperationsClient({'operations/a': 1, 'operations/b': 4, 'operations/c': 2}, errors=['operations/c'])
+        completed = []
+        with OperationTracker(client, initial_interval=0.001, max_interval=0.01) as tracker:
+            futures = {name: tracker.track(name, callback=lambda future: completed.append(future))
+                       for name in ['operations/a', 'operations/b', 'operations/c']}
+            self.assertTrue(futures['operations/a'].result(timeout=5)['done'])
+            self.assertTrue(futures['operations/b'].result(timeout=5)['done'])
+            with self.assertRaises(OperationError):
+                futures['operations/c'].result(timeout=5)
+        self.assertEqual(len(completed), 3)
+        self.assertEqual(tracker.poll_count, 7)
+
+    def test_tracking_same_operation_returns_same_future(self):
+        client = FakeOperationsClient({'operations/a': 2})
+        with OperationTracker(client, initial_interval=0.001) as tracker:
+            self.assertIs(tracker.track('operations/a'), tracker.track('operations/a'))
+            tracker.wait('operations/a', timeout=5)
+
+    def test_backoff_interval_is_capped(self):
+        client = FakeOperationsClient({'operations/a': 10})
+        with OperationTracker(client, initial_interval=0.001, max_interval=0.004, multiplier=2) as tracker:
+            tracker.wait('operations/a', timeout=5)
+        self.assertEqual(len(client.calls), 10)
+
+    def test_stuck_operation_fails_after_timeout(self):
+        client = FakeOperationsClient({'operations/stuck': float('inf')})
+        with OperationTracker(client, initial_interval=0.001, max_interval=0.004, timeout=0.05) as tracker:
+            with self.assertRaises(OperationError):
+                tracker.wait('operations/stuck', timeout=5)
+            self.assertEqual(tracker.pending_count(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import google.auth.credentials
+from src import config
+from src.emulator import Emulator, EmulatorSettings, DEFAULT_ORGANIZATION_ID
+from src.orgpolicy import ACTION_CREATE, ACTION_DELETE, ACTION_UNCHANGED, ACTION_UPDATE, diff_policies, normalize_spec
+from main import apply_organization_policies, build_client_pool, build_orgpolicy_pool, init_project_folders, revert_organization_policies
+
+
+class TestPolicyDiff(unittest.TestCase):
+
+    def test_server_fields_and_defaults_are_ignored(self):
+        served = {'rules': [{'allowAll': True}], 'etag': 'W/"7"', 'updateTime': '2026-01-01T00:00:00Z'}
+        self.assertEqual(normalize_spec(served), normalize_spec({'rules': [{'allowAll': True, 'enforce': False}]}))
+
+    def test_every_desired_constraint_gets_an_action(self):
+        current = {'gcp.resourceLocations': {'rules': [{'enforce': True}]}, 'compute.vmExternalIpAccess': {'rules': [{'allowAll': True}]}}
+        desired = {
+            'constraints/gcp.resourceLocations': {'rules': [{'enforce': True}]},
+            'constraints/compute.vmExternalIpAccess': {'rules': [{'denyAll': True}]},
+            'constraints/compute.skipDefaultNetworkCreation': {'rules': [{'enforce': True}]},
+            'constraints/iam.disableServiceAccountKeyCreation': None,
+        }
+        actions = [change.action for change in diff_policies('42', current, desired)]
+        self.assertEqual(actions, [ACTION_UNCHANGED, ACTION_UPDATE, ACTION_CREATE, ACTION_UNCHANGED])
+        revert = {constraint: None for constraint in desired}
+        self.assertEqual([change.action for change in diff_policies('42', current, revert)],
+                         [ACTION_DELETE, ACTION_DELETE, ACTION_UNCHANGED, ACTION_UNCHANGED])
+
+
+class TestSyncOrganizationPolicies(unittest.TestCase):
+
+    def setUp(self):
+        self.emulator = Emulator(EmulatorSettings(operation_duration=0.01)).start()
+        self.addCleanup(self.emulator.stop)
+        clients = build_client_pool(google.auth.credentials.AnonymousCredentials(), emulator_url=self.emulator.url)
+        self.pool = build_orgpolicy_pool(clients.credentials, emulator_url=self.emulator.url)
+        self.addCleanup(self.pool.close)
+        self.orgpolicy_v2, = self.pool.acquire()
+        folder_ids = init_project_folders(DEFAULT_ORGANIZATION_ID, clients.acquire()[0])
+        self.folder_ids = [folder_ids['general'], folder_ids['team1'], folder_ids['team2']]
+
+    def apply(self, **kwargs):
+        return apply_organization_policies(self.folder_ids, self.orgpolicy_v2, max_workers=4, client_factory=self.pool, **kwargs)
+
+    def calls(self, suffix):
+        return sum(count for method, count in self.emulator.call_counts().items() if method.endswith(suffix))
+
+    def test_only_drifted_constraints_are_written(self):
+        constraints = len(config.ORGANIZATION_POLICY)
+        self.assertEqual({change.action for change in self.apply()}, {ACTION_CREATE})
+        self.assertEqual(self.calls('policies.create'), 3 * constraints)
+        self.assertEqual(self.calls('policies.list'), 3)
+
+        drifted = f"folders/{self.folder_ids[1]}/policies/gcp.resourceLocations"
+        self.emulator.state.org_policies[drifted]['spec']['rules'] = [{'allowAll': True}]
+        changes = self.apply()
+        self.assertEqual([change.name for change in changes if change.action != ACTION_UNCHANGED], [drifted])
+        self.assertEqual(self.calls('policies.patch'), 1)
+        self.assertEqual(self.calls('policies.list'), 6)
+
+    def test_dry_run_and_revert(self):
+        changes = self.apply(dry_run=True)
+        self.assertEqual(len(changes), 3 * len(config.ORGANIZATION_POLICY))
+        self.assertEqual(self.emulator.state.org_policies, {})
+        self.apply()
+        revert_organization_policies(self.folder_ids, self.orgpolicy_v2, max_workers=4, client_factory=self.pool)
+        self.assertEqual(self.emulator.state.org_policies, {})
+        self.assertEqual(self.calls('policies.delete'), 3 * len(config.ORGANIZATION_POLICY))
+
+
+if __name__ == '__main__':
+    unittest.main()
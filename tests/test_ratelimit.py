@@ -0,0 +1,64 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.ratelimit import RateLimiter, TokenBucket, surface_for
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_paced_at_configured_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, clock=clock, sleep=clock.sleep)
+        for _ in range(int(bucket.capacity)):
+            bucket.acquire()
+        self.assertEqual(clock.sleeps, [])
+        bucket.acquire()
+        self.assertAlmostEqual(sum(clock.sleeps), 1.0)
+
+    def test_throttling_halves_rate_and_success_recovers_it(self):
+        bucket = TokenBucket(100)
+        bucket.record_throttled()
+        self.assertEqual(bucket.rate, 50)
+        for _ in range(10):
+            bucket.record_throttled()
+        self.assertEqual(bucket.rate, 10)
+        for _ in range(100):
+            bucket.record_success()
+        self.assertEqual(bucket.rate, 100)
+        self.assertEqual(bucket.throttled, 11)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_surfaces(self):
+        limits = {'cloudresourcemanager.projects.create': 60, 'cloudresourcemanager.read': 600}
+        self.assertEqual(surface_for('cloudresourcemanager.projects.create', limits), 'cloudresourcemanager.projects.create')
+        self.assertEqual(surface_for('cloudresourcemanager.operations.get', limits), 'cloudresourcemanager.read')
+        self.assertEqual(surface_for('cloudresourcemanager.projects.setIamPolicy', limits), 'cloudresourcemanager.write')
+
+    def test_unconfigured_surfaces_are_not_limited(self):
+        limiter = RateLimiter({'serviceusage.read': 60})
+        self.assertIsNone(limiter.bucket('oauth2.userinfo.get'))
+        limiter.acquire('oauth2.userinfo.get')
+        limiter.record_throttled('serviceusage.services.list')
+        self.assertEqual(limiter.rates(), {'serviceusage.read': (30.0, 60.0, 1)})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httplib2
+from googleapiclient.errors import HttpError
+from src.retry import RetryPolicy, RetryBudget, is_retryable, retry_after_seconds
+
+
+def http_error(status, headers=None):
+    resp = httplib2.Response(dict(headers or {}, status=status))
+    return HttpError(resp, b'{}')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_policy(clock, **kwargs):
+    return RetryPolicy(clock=clock, sleep=clock.sleep, rand=lambda: 1.0, **kwargs)
+
+
+class TestClassification(unittest.TestCase):
+
+    def test_reads_and_idempotent_writes_retry_on_transient_errors(self):
+        for error in [http_error(503), http_error(500), http_error(429), TimeoutError(), ConnectionResetError()]:
+            self.assertTrue(is_retryable(error, 'cloudbilling.projects.updateBillingInfo'))
+        self.assertFalse(is_retryable(http_error(403), 'cloudresourcemanager.projects.get'))
+        self.assertFalse(is_retryable(ValueError(), 'cloudresourcemanager.projects.get'))
+
+    def test_creates_only_retry_on_429(self):
+        self.assertTrue(is_retryable(http_error(429), 'cloudresourcemanager.projects.create'))
+        self.assertFalse(is_retryable(http_error(503), 'cloudresourcemanager.projects.create'))
+        self.assertFalse(is_retryable(TimeoutError(), 'cloudresourcemanager.folders.create'))
+
+    def test_retry_after_header(self):
+        self.assertEqual(retry_after_seconds(http_error(429, {'retry-after': '7'})), 7.0)
+        self.assertIsNone(retry_after_seconds(http_error(429)))
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def test_retries_with_exponential_backoff_until_success(self):
+        clock = FakeClock()
+        func = MagicMock(side_effect=[http_error(503), http_error(503), http_error(503), 'ok'])
+        policy = make_policy(clock, initial_backoff=1, max_backoff=3)
+        self.assertEqual(policy.call(func, 'serviceusage.services.list'), 'ok')
+        self.assertEqual(clock.sleeps, [1, 2, 3])
+
+    def test_retry_after_overrides_backoff(self):
+        clock = FakeClock()
+        func = MagicMock(side_effect=[http_error(429, {'retry-after': '5'}), 'ok'])
+        make_policy(clock).call(func, 'cloudresourcemanager.projects.create')
+        self.assertEqual(clock.sleeps, [5.0])
+
+    def test_gives_up_at_max_attempts_deadline_or_budget(self):
+        clock = FakeClock()
+        func = MagicMock(side_effect=http_error(503))
+        with self.assertRaises(HttpError):
+            make_policy(clock, max_attempts=3).call(func, 'serviceusage.services.list')
+        self.assertEqual(func.call_count, 3)
+
+        func.reset_mock()
+        with self.assertRaises(HttpError):
+            make_policy(clock, initial_backoff=10, deadline=25).call(func, 'serviceusage.services.list')
+        self.assertEqual(func.call_count, 2)
+
+        func.reset_mock()
+        policy = make_policy(clock, budget=RetryBudget(ratio=0, reserve=1))
+        with self.assertRaises(HttpError):
+            policy.call(func, 'serviceusage.services.list')
+        self.assertEqual(func.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
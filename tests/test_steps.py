@@ -0,0 +1,47 @@
+import unittest
+import threading
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.steps import STEP_OK, Step, run_steps
+
+
+class TestRunSteps(unittest.TestCase):
+
+    def test_independent_steps_overlap(self):
+        # Each of the two steps waits for the other to start, which only works if they run concurrently
+        barrier = threading.Barrier(2, timeout=5)
+        order = []
+        steps = [
+            Step('billing', lambda: (barrier.wait(), order.append('billing'))),
+            Step('iam', lambda: (barrier.wait(), order.append('iam'))),
+            Step('apis', lambda: order.append('apis'), requires=('billing',)),
+        ]
+        self.assertEqual(run_steps(steps), {'billing': STEP_OK, 'iam': STEP_OK, 'apis': STEP_OK})
+        self.assertLess(order.index('billing'), order.index('apis'))
+
+    def test_failure_cancels_only_dependents(self):
+        ran = []
+
+        def fail():
+            raise RuntimeError("billing account closed")
+
+        steps = [
+            Step('billing', fail),
+            Step('iam', lambda: ran.append('iam')),
+            Step('apis', lambda: ran.append('apis'), requires=('billing',)),
+            Step('budget', lambda: ran.append('budget'), requires=('apis',)),
+        ]
+        with self.assertRaisesRegex(RuntimeError, "billing account closed"):
+            run_steps(steps)
+        self.assertEqual(ran, ['iam'])
+
+    def test_cycles_are_rejected(self):
+        with self.assertRaises(ValueError):
+            run_steps([Step('a', lambda: None, requires=('b',)), Step('b', lambda: None, requires=('a',))])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import google.auth.credentials
+from src import config
+from src.emulator import Emulator, EmulatorSettings, Fault, DEFAULT_ORGANIZATION_ID
+from main import build_client_pool, init_project_folders, plan_teardown, teardown_folder, wait_for_operations
+
+
+class TestTeardown(unittest.TestCase):
+
+    def start(self, **settings):
+        for name, value in [('OPERATION_POLL_INITIAL_INTERVAL', 0.01), ('OPERATION_POLL_MAX_INTERVAL', 0.05)]:
+            patcher = patch.object(config, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.emulator = Emulator(EmulatorSettings(operation_duration=0.01, **settings)).start()
+        self.addCleanup(self.emulator.stop)
+        self.pool = build_client_pool(google.auth.credentials.AnonymousCredentials(), emulator_url=self.emulator.url)
+        self.addCleanup(self.pool.close)
+        self.crm_v3 = self.pool.acquire()[0]
+        folder_ids = init_project_folders(DEFAULT_ORGANIZATION_ID, self.crm_v3)
+        operations = []
+        for key, count in [('general', 3), ('team1', 2)]:
+            for number in range(count):
+                body = {'projectId': f"hack-{key}-{number:02d}", 'parent': f"folders/{folder_ids[key]}"}
+                operations.append(self.crm_v3.projects().create(body=body).execute()['name'])
+        wait_for_operations(self.crm_v3, operations)
+        return folder_ids
+
+    def states(self):
+        return ({p['state'] for p in self.emulator.state.projects.values()},
+                {f['state'] for f in self.emulator.state.folders.values()})
+
+    def test_plan_walks_the_whole_tree(self):
+        folder_ids = self.start()
+        plan = plan_teardown(folder_ids['main'], self.crm_v3)
+        self.assertEqual(len(plan.projects), 5)
+        self.assertEqual([len(level) for level in plan.folder_levels()], [3, 1])
+        self.assertEqual(self.states(), ({'ACTIVE'}, {'ACTIVE'}))
+        self.assertEqual([len(level) for level in plan_teardown(folder_ids['main'], self.crm_v3, include_root=False).folder_levels()], [3])
+
+    def test_projects_then_folders_bottom_up(self):
+        folder_ids = self.start()
+        report = teardown_folder(plan_teardown(folder_ids['main'], self.crm_v3), self.crm_v3, max_workers=4, client_factory=self.pool)
+        self.assertEqual((len(report.deleted_projects), len(report.deleted_folders)), (5, 4))
+        self.assertEqual(report.deleted_folders[-1], f"folders/{folder_ids['main']}")
+        self.assertEqual((report.failures, report.skipped), ([], []))
+        self.assertEqual(self.states(), ({'DELETE_REQUESTED'}, {'DELETE_REQUESTED'}))
+
+    def test_failed_project_keeps_its_ancestors(self):
+        folder_ids = self.start()
+        plan = plan_teardown(folder_ids['main'], self.crm_v3)
+        self.emulator.state.settings.faults.append(Fault('cloudresourcemanager.projects.delete', status=403, times=1))
+        report = teardown_folder(plan, self.crm_v3, max_workers=4, client_factory=self.pool)
+        self.assertEqual(len(report.deleted_projects), 4)
+        self.assertEqual(len(report.failures), 1)
+        failed_parent = self.emulator.state.projects[report.failures[0][0]]['parent']
+        self.assertEqual({name for name, _ in report.skipped}, {failed_parent, f"folders/{folder_ids['main']}"})
+        self.assertEqual(len(report.deleted_folders), 2)
+
+    def test_retried_delete_that_already_happened_succeeds(self):
+        folder_ids = self.start()
+        plan = plan_teardown(folder_ids['main'], self.crm_v3)
+        faults = self.emulator.state.settings.faults
+        faults.append(Fault('cloudresourcemanager.projects.delete', status=503, times=1, after_commit=True))
+        faults.append(Fault('cloudresourcemanager.folders.delete', status=503, times=1, after_commit=True))
+        report = teardown_folder(plan, self.crm_v3, max_workers=4, client_factory=self.pool)
+        self.assertEqual((report.failures, report.skipped), ([], []))
+        self.assertEqual((len(report.deleted_projects), len(report.deleted_folders)), (5, 4))
+        self.assertEqual(self.states(), ({'DELETE_REQUESTED'}, {'DELETE_REQUESTED'}))
+        calls = self.emulator.call_counts()
+        self.assertEqual((calls['cloudresourcemanager.projects.delete'], calls['cloudresourcemanager.folders.delete']), (6, 5))
+
+
+if __name__ == '__main__':
+    unittest.main()
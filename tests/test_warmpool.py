@@ -0,0 +1,129 @@
+import unittest
+from unittest.mock import patch
+import threading
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import google.auth.credentials
+from googleapiclient.errors import HttpError
+from src import config
+from src.emulator import Emulator, EmulatorSettings, Fault, DEFAULT_ORGANIZATION_ID
+from src.journal import KIND_ATTENDEE, ProvisioningJournal
+from src.warmpool import LABEL_POOL, POOL_ASSIGNED, POOL_READY, PoolRefiller, ProjectPool
+from main import assign_pool_project, build_client_pool, fill_project_pool, init_project_folders, load_project_pool
+
+
+class TestProjectPool(unittest.TestCase):
+
+    def test_fill_accounting_and_order(self):
+        pool = ProjectPool(size=3, low_watermark=2)
+        self.assertEqual(pool.start_fill(), 3)
+        self.assertEqual(pool.deficit(), 0)
+        pool.add('a')
+        pool.add('b')
+        pool.end_fill(2)
+        self.assertFalse(pool.is_low())
+        self.assertEqual(pool.take(), 'a')
+        self.assertTrue(pool.is_low())
+        pool.put_back('a')
+        self.assertEqual(pool.take(), 'a')
+        self.assertEqual(pool.take(), 'b')
+        self.assertIsNone(pool.take())
+        pool.end_fill(1)
+        self.assertEqual(pool.deficit(), 3)
+
+    def test_refiller_fills_when_woken(self):
+        pool = ProjectPool(size=2, low_watermark=1)
+        filled = threading.Event()
+
+        def fill():
+            for _ in range(pool.start_fill()):
+                pool.add('p')
+                pool.end_fill(1)
+            filled.set()
+
+        refiller = PoolRefiller(pool, fill, interval=60).start()
+        self.addCleanup(refiller.stop)
+        self.assertTrue(filled.wait(5))
+        self.assertEqual(pool.level(), 2)
+        pool.take()
+        filled.clear()
+        refiller.wake()
+        self.assertTrue(filled.wait(5))
+        self.assertEqual(pool.level(), 2)
+
+
+class TestWarmPoolProvisioning(unittest.TestCase):
+
+    def setUp(self):
+        for name, value in [('OPERATION_POLL_INITIAL_INTERVAL', 0.01), ('OPERATION_POLL_MAX_INTERVAL', 0.05)]:
+            patcher = patch.object(config, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.emulator = Emulator(EmulatorSettings(operation_duration=0.01)).start()
+        self.addCleanup(self.emulator.stop)
+        self.clients = build_client_pool(google.auth.credentials.AnonymousCredentials(), emulator_url=self.emulator.url)
+        self.addCleanup(self.clients.close)
+        self.crm_v3, self.serviceusage_v1, self.cloudbilling_v1 = self.clients.acquire()
+        self.folder_id = init_project_folders(DEFAULT_ORGANIZATION_ID, self.crm_v3)['general']
+
+    def fill(self, pool, **kwargs):
+        return fill_project_pool(pool, self.folder_id, self.crm_v3, self.serviceusage_v1, self.cloudbilling_v1,
+                                 max_workers=2, client_factory=self.clients, **kwargs)
+
+    def test_pool_projects_are_ready_before_check_in(self):
+        pool = ProjectPool(size=2, low_watermark=1)
+        summary = self.fill(pool)
+        self.assertEqual((summary.created, summary.failed), (2, 0))
+        self.assertEqual(pool.level(), 2)
+        state = self.emulator.state
+        for project_id in state.projects:
+            self.assertTrue(project_id.startswith(config.PROJECT_POOL_ID_PREFIX))
+            self.assertEqual(state.projects[project_id]['labels'][LABEL_POOL], POOL_READY)
+            self.assertTrue(state.billing[project_id]['billingEnabled'])
+            self.assertTrue(set(config.APIS_TO_ENABLE) <= state.services[project_id])
+
+        # A restarted CLI finds the same ready projects
+        reloaded, pending = load_project_pool(self.folder_id, self.crm_v3, ProjectPool(size=2))
+        self.assertEqual(sorted(reloaded._ready), sorted(pool._ready))
+        self.assertEqual(pending, [])
+
+    def test_listing_errors_are_not_an_empty_pool(self):
+        pool = ProjectPool(size=1, low_watermark=1)
+        self.fill(pool)
+        self.emulator.state.settings.faults.append(Fault('cloudresourcemanager.projects.search', 403, times=1))
+        with self.assertRaises(HttpError):
+            load_project_pool(self.folder_id, self.crm_v3)
+        self.assertEqual(load_project_pool(self.folder_id, self.crm_v3)[0].level(), 1)
+
+    def test_check_in_only_grants_access_and_relabels(self):
+        pool = ProjectPool(size=1, low_watermark=1)
+        self.fill(pool)
+        journal = ProvisioningJournal(':memory:')
+        before = self.emulator.call_counts()
+
+        project_id = assign_pool_project(pool, ' Alice@Example.com', self.crm_v3, journal=journal)
+
+        calls = {method: count - before.get(method, 0) for method, count in self.emulator.call_counts().items()
+                 if count != before.get(method, 0)}
+        self.assertNotIn('cloudresourcemanager.projects.create', calls)
+        self.assertNotIn('serviceusage.services.batchEnable', calls)
+        self.assertNotIn('cloudbilling.projects.updateBillingInfo', calls)
+        project = self.emulator.state.projects[project_id]
+        self.assertEqual(project['labels'][LABEL_POOL], POOL_ASSIGNED)
+        self.assertEqual(project['displayName'], f"{config.PLAYGROUND_PROJECT_NAME_PREFIX}alice")
+        policy = self.crm_v3.projects().getIamPolicy(resource=f"projects/{project_id}", body={}).execute()
+        self.assertIn({'role': 'roles/editor', 'members': ['user:alice@example.com']}, policy['bindings'])
+        self.assertTrue(journal.entry(KIND_ATTENDEE, 'alice@example.com').is_complete())
+
+        # Checking in again is a no-op; a new attendee finds the pool empty
+        self.assertEqual(assign_pool_project(pool, 'alice@example.com', self.crm_v3, journal=journal), project_id)
+        self.assertIsNone(assign_pool_project(pool, 'bob@example.com', self.crm_v3, journal=journal))
+        self.assertEqual(load_project_pool(self.folder_id, self.crm_v3)[0].level(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+import unittest
+from unittest.mock import patch
+import tempfile
+import threading
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import google.auth.credentials
+from src import config
+from src.emulator import Emulator, EmulatorSettings, Fault, DEFAULT_ORGANIZATION_ID
+from src.ingest import ATTENDEE_COLUMNS, CsvValidationError, IngestReport
+from src.journal import ProvisioningJournal
+from src.watch import CsvTail, WatchCursor
+from main import (build_budget_pool, build_client_pool, init_project_folders, provision_project_budgets,
+                  watch_playground_projects)
+
+
+class TestCsvTail(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.csv_file = os.path.join(directory.name, 'attendees.csv')
+        self.cursor_file = os.path.join(directory.name, 'cursor.json')
+
+    def write(self, text, mode='a'):
+        with open(self.csv_file, mode) as f:
+            f.write(text)
+
+    def tail(self):
+        return CsvTail(self.csv_file, WatchCursor(self.cursor_file), ATTENDEE_COLUMNS)
+
+    def test_reads_only_complete_appended_rows(self):
+        tail = self.tail()
+        self.assertEqual(tail.poll(), [])  # not exported yet
+        self.write("email\nalice@example.com\n", 'w')
+        self.assertEqual(tail.poll(), [(2, {'email': 'alice@example.com'})])
+        tail.commit()
+
+        self.write("bob@example.com\ncarol@exa")  # carol is still being written
+        self.assertEqual(tail.poll(), [(3, {'email': 'bob@example.com'})])
+        tail.commit()
+        self.write("mple.com\n")
+        self.assertEqual(tail.poll(), [(4, {'email': 'carol@example.com'})])
+
+        # Not committed: a restart reads carol again, but not alice and bob
+        restarted = self.tail()
+        self.assertEqual(restarted.row_number, 3)
+        self.assertEqual(restarted.poll(), [(4, {'email': 'carol@example.com'})])
+        restarted.commit()
+        self.assertEqual(self.tail().poll(), [])
+
+    def test_rewritten_file_is_read_again(self):
+        self.write("email\nalice@example.com\nbob@example.com\n", 'w')
+        tail = self.tail()
+        tail.poll()
+        tail.commit()
+        self.write("email\ndave@example.com\n", 'w')
+        report = IngestReport()
+        self.assertEqual(tail.poll(report), [(2, {'email': 'dave@example.com'})])
+        self.assertTrue(tail.rewritten)
+
+        self.write("name\nx\n", 'w')
+        with self.assertRaises(CsvValidationError):
+            self.tail().poll()
+
+
+class TestWatchPlaygroundProjects(unittest.TestCase):
+
+    def setUp(self):
+        for name, value in [('OPERATION_POLL_INITIAL_INTERVAL', 0.01), ('OPERATION_POLL_MAX_INTERVAL', 0.05)]:
+            patcher = patch.object(config, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.emulator = Emulator(EmulatorSettings(operation_duration=0.01)).start()
+        self.addCleanup(self.emulator.stop)
+        self.pool = build_client_pool(google.auth.credentials.AnonymousCredentials(), emulator_url=self.emulator.url)
+        self.addCleanup(self.pool.close)
+        self.crm_v3, self.serviceusage_v1, self.cloudbilling_v1 = self.pool.acquire()
+        self.folder_id = init_project_folders(DEFAULT_ORGANIZATION_ID, self.crm_v3)['general']
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write("email\nalice@example.com\n")
+        self.addCleanup(os.remove, f.name)
+        self.csv_file = f.name
+
+    def test_appended_rows_are_provisioned(self):
+        batches = []
+        batch_done = threading.Event()
+        stop = threading.Event()
+
+        def on_batch(summary):
+            batches.append(summary)
+            batch_done.set()
+
+        watcher = threading.Thread(target=watch_playground_projects, args=(
+            self.csv_file, self.crm_v3, self.serviceusage_v1, self.cloudbilling_v1, self.folder_id),
+            kwargs={'max_workers': 2, 'client_factory': self.pool, 'journal': ProvisioningJournal(':memory:'),
+                    'poll_interval': 0.05, 'stop': stop, 'on_batch': on_batch})
+        watcher.start()
+        self.addCleanup(watcher.join)
+        self.addCleanup(stop.set)
+
+        self.assertTrue(batch_done.wait(10))
+        batch_done.clear()
+        with open(self.csv_file, 'a') as f:
+            f.write("bob@example.com\nnot-an-email\nalice@example.com\n")
+        self.assertTrue(batch_done.wait(10))
+        stop.set()
+
+        self.assertEqual([[result.project_id for result in batch.results] for batch in batches],
+                         [['idv-alice'], ['idv-bob', None]])
+        self.assertEqual(self.emulator.call_counts()['cloudresourcemanager.projects.create'], 2)
+        self.assertTrue(self.emulator.state.billing['idv-bob']['billingEnabled'])
+
+    def test_budgets_cover_each_batch_without_listing_the_folder(self):
+        budget_pool = build_budget_pool(self.pool.credentials, emulator_url=self.emulator.url)
+        self.addCleanup(budget_pool.close)
+        billingbudgets_v1, = budget_pool.acquire()
+        batches = []
+        stop = threading.Event()
+
+        def on_batch(summary):
+            batches.append(summary)
+            provision_project_budgets([result.project_id for result in summary.results if result.project_id], 5,
+                                      self.crm_v3, billingbudgets_v1)
+            if len(batches) == 1:
+                with open(self.csv_file, 'a') as f:
+                    f.write("bob@example.com\n")
+            else:
+                stop.set()
+
+        timeout = threading.Timer(10, stop.set)
+        timeout.start()
+        self.addCleanup(timeout.cancel)
+        before = self.emulator.call_counts()
+        watch_playground_projects(self.csv_file, self.crm_v3, self.serviceusage_v1, self.cloudbilling_v1, self.folder_id,
+                                  poll_interval=0.01, stop=stop, on_batch=on_batch)
+
+        calls = {method: count - before.get(method, 0) for method, count in self.emulator.call_counts().items()}
+        self.assertEqual(len(batches), 2)
+        self.assertEqual(calls.get('billingbudgets.billingAccounts.budgets.list'), 2)
+        self.assertEqual(calls.get('billingbudgets.billingAccounts.budgets.create'), 2)
+        self.assertEqual(calls.get('cloudresourcemanager.projects.list', 0) + calls.get('cloudresourcemanager.projects.search', 0), 0)
+        self.assertEqual(len(self.emulator.state.budgets), 2)
+
+    def test_failed_rows_are_retried_with_the_next_poll(self):
+        self.emulator.state.settings.faults.append(Fault('cloudresourcemanager.projects.create', 403, times=1))
+        batches = []
+        stop = threading.Event()
+
+        def on_batch(summary):
+            batches.append(summary)
+            if summary.created:
+                stop.set()
+
+        # Without a retry nothing would end the watch
+        timeout = threading.Timer(10, stop.set)
+        timeout.start()
+        self.addCleanup(timeout.cancel)
+        watch_playground_projects(self.csv_file, self.crm_v3, self.serviceusage_v1, self.cloudbilling_v1, self.folder_id,
+                                  journal=ProvisioningJournal(':memory:'), poll_interval=0.01, stop=stop, on_batch=on_batch)
+
+        self.assertEqual([(batch.failed, batch.created) for batch in batches], [(1, 0), (0, 1)])
+        self.assertEqual(batches[1].results[0].project_id, 'idv-alice')
+        self.assertTrue(self.emulator.state.billing['idv-alice']['billingEnabled'])
+
+
+if __name__ == '__main__':
+    unittest.main()